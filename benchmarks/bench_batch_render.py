@@ -0,0 +1,71 @@
+"""
+Throughput of batch PDF regeneration with different process pool sizes.
+
+Saves synthetic invoices into a fresh database, then regenerates all of
+them with BatchRender for 1, 2, 4, ... workers up to the number of CPUs.
+
+    python benchmarks/bench_batch_render.py [invoices] [lines per invoice]
+"""
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import invoice_batch
+from database import Database
+
+
+def fill_invoices(db, invoices, lines):
+    rng = random.Random(42)
+    db.conn.execute(
+        "INSERT INTO customers (name, address, phone, email) VALUES (?, ?, ?, ?)",
+        ("Asha Traders", "14 Market Road, Pune", "9876543210", "asha@example.com")
+    )
+    db.conn.commit()
+    for _ in range(invoices):
+        items = []
+        for i in range(lines):
+            quantity = float(rng.randint(1, 20))
+            price = round(rng.uniform(1, 500), 2)
+            items.append((f"Product {rng.randint(1, 99999):05d}", quantity, "pcs",
+                          "Retail", price, quantity * price, None))
+        db.save_invoice(1, items, sum(item[5] for item in items))
+
+
+def main():
+    invoices = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    lines = int(sys.argv[2]) if len(sys.argv) > 2 else 8
+    with tempfile.TemporaryDirectory() as tmp:
+        db_file = os.path.join(tmp, "bench.db")
+        db = Database(db_file)
+        fill_invoices(db, invoices, lines)
+        invoice_ids = invoice_batch.select_invoices(db.read_conn)
+        db.close()
+
+        workers = [1]
+        while workers[-1] * 2 <= (os.cpu_count() or 1):
+            workers.append(workers[-1] * 2)
+        if workers[-1] != os.cpu_count():
+            workers.append(os.cpu_count())
+
+        print(f"{invoices:,} invoices, {lines} lines each, {os.cpu_count()} CPUs")
+        print(f"{'workers':>8}{'seconds':>10}{'PDFs/s':>10}{'speedup':>10}")
+        baseline = None
+        for count in workers:
+            job = invoice_batch.BatchRender(db_file, invoice_ids,
+                                            output_dir=os.path.join(tmp, f"out{count}"),
+                                            workers=count)
+            start = time.perf_counter()
+            job.run()
+            elapsed = time.perf_counter() - start
+            assert not job.errors, job.errors[:3]
+            rate = len(invoice_ids) / elapsed
+            baseline = baseline or rate
+            print(f"{count:>8}{elapsed:>10.2f}{rate:>10.0f}{rate / baseline:>9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
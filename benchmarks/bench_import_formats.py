@@ -0,0 +1,84 @@
+"""
+Time product import and export for each supported file format.
+
+Builds a synthetic catalog, exports it to .xlsx, .csv and .parquet, then
+imports each file into a fresh database with StreamingImport.
+
+    python benchmarks/bench_import_formats.py [rows]
+"""
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import product_import
+from database import Database
+
+UNITS = ["pcs", "box", "kg", "ltr", "pack"]
+
+
+def fill_catalog(db, rows):
+    rng = random.Random(42)
+    products = []
+    for i in range(rows):
+        price = round(rng.uniform(1, 500), 2)
+        products.append((
+            f"Product {i:06d} {rng.choice(['Pen', 'Soap', 'Rice', 'Tea', 'Oil'])}",
+            price,
+            round(price * 1.2, 2),
+            rng.choice(UNITS),
+            rng.choice(UNITS),
+            float(rng.choice([1, 6, 12, 24])),
+            f"Item number {i}",
+            f"SKU{i:06d}",
+        ))
+    db.conn.execute("BEGIN IMMEDIATE")
+    db.conn.executemany(product_import.INSERT_PRODUCT_SQL, products)
+    db.conn.commit()
+
+
+def run_import(file_path, db_file):
+    db = Database(db_file)
+    job = product_import.StreamingImport(file_path, db.create_connection, chunk_size=5000)
+    job.run()
+    progress = None
+    while not job.progress.empty():
+        progress = job.progress.get()
+    db.close()
+    if progress.error:
+        raise RuntimeError(progress.error)
+    if job.report_path:
+        os.remove(job.report_path)
+    return progress.imported
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    with tempfile.TemporaryDirectory() as tmp:
+        source = Database(os.path.join(tmp, "source.db"))
+        fill_catalog(source, rows)
+
+        print(f"{rows:,} products")
+        print(f"{'format':<10}{'export s':>10}{'import s':>10}{'size MB':>10}")
+        for extension in (".csv", ".parquet", ".xlsx"):
+            file_path = os.path.join(tmp, "products" + extension)
+
+            start = time.perf_counter()
+            product_import.export_products(source.read_conn, file_path)
+            export_time = time.perf_counter() - start
+
+            start = time.perf_counter()
+            imported = run_import(file_path, os.path.join(tmp, f"import{extension}.db"))
+            import_time = time.perf_counter() - start
+            assert imported == rows, (extension, imported)
+
+            size = os.path.getsize(file_path) / 1e6
+            print(f"{extension:<10}{export_time:>10.2f}{import_time:>10.2f}{size:>10.1f}")
+        source.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""
+Compare invoices per second for the two PDF engines.
+
+Renders the same single-page invoices with the platypus layout and with the
+fixed canvas layout, into memory and to files, with one warmed-up printer.
+
+    python benchmarks/bench_invoice_render.py [invoices]
+"""
+import io
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import invoice_canvas
+from invoice_printer import InvoicePrinter
+
+CUSTOMER = (1, "Asha Traders", "14 Market Road, Pune", "9876543210", "asha@example.com")
+CREATED_AT = "2026-01-01 10:00:00"
+
+
+def make_items(count):
+    return [(f"Product {i:03d}", float(i % 5 + 1), "pcs", "Retail", 12.5, 12.5 * (i % 5 + 1), i)
+            for i in range(count)]
+
+
+def rate(render, invoices):
+    start = time.perf_counter()
+    for i in range(invoices):
+        render(i)
+    return invoices / (time.perf_counter() - start)
+
+
+def main():
+    invoices = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    printer = InvoicePrinter()
+    printer.warm_up()
+
+    print(f"{invoices:,} invoices per run")
+    print(f"{'lines':<8}{'target':<8}{'platypus/s':>12}{'canvas/s':>12}{'speedup':>10}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for lines in (1, 5, 9):
+            items = make_items(lines)
+            total = sum(item[5] for item in items)
+            assert invoice_canvas.fits_one_page(CUSTOMER, items, "INV-000000", CREATED_AT)
+            for target in ("memory", "file"):
+                def output(i):
+                    if target == "memory":
+                        return io.BytesIO()
+                    return os.path.join(tmp, f"INV-{i:06d}.pdf")
+
+                platypus = rate(lambda i: printer.build(
+                    output(i), CUSTOMER, items, total, f"INV-{i:06d}", CREATED_AT), invoices)
+                canvas = rate(lambda i: invoice_canvas.draw_invoice(
+                    output(i), CUSTOMER, items, total, f"INV-{i:06d}", CREATED_AT), invoices)
+                print(f"{lines:<8}{target:<8}{platypus:>12.0f}{canvas:>12.0f}{canvas / platypus:>9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
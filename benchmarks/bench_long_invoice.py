@@ -0,0 +1,50 @@
+"""
+Time and peak memory for rendering long multi-page invoices.
+
+Builds invoices of increasing length with InvoicePrinter and reports the
+time per line, which should stay flat as invoices grow.
+
+    python benchmarks/bench_long_invoice.py [max lines]
+"""
+import io
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from invoice_printer import InvoicePrinter
+
+CUSTOMER = (1, "Asha Distributors", "14 Market Road, Pune", "9876543210", "asha@example.com")
+
+
+def render(printer, lines):
+    items = [(f"Product {i:05d}", 2.0, "pcs", "Wholesale", 12.5, 25.0, i) for i in range(lines)]
+    output = io.BytesIO()
+    start = time.perf_counter()
+    printer.build(output, CUSTOMER, items, 25.0 * lines, "INV-000001", "2026-01-01 10:00:00")
+    return time.perf_counter() - start, len(output.getvalue())
+
+
+def main():
+    max_lines = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    printer = InvoicePrinter()
+    printer.warm_up()
+
+    print(f"{'lines':>8}{'seconds':>10}{'ms/line':>10}{'peak MB':>10}{'PDF MB':>10}")
+    lines = 250
+    while lines <= max_lines:
+        elapsed, size = render(printer, lines)
+        # Memory in a second run, since tracing slows rendering down
+        tracemalloc.start()
+        render(printer, lines)
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        print(f"{lines:>8}{elapsed:>10.2f}{elapsed * 1000 / lines:>10.3f}"
+              f"{peak / 1e6:>10.1f}{size / 1e6:>10.2f}")
+        lines *= 2
+
+
+if __name__ == "__main__":
+    main()
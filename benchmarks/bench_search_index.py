@@ -0,0 +1,72 @@
+"""
+Time top-K lookups in the combobox search index.
+
+Builds a SearchIndex over synthetic "id - name" product strings, then times
+single queries (prefix, infix, rare, no hits, one and two characters) and
+every keystroke of a few typed words, fetching as many matches as the
+combobox dropdown does.
+
+    python benchmarks/bench_search_index.py [values]
+"""
+import gc
+import os
+import random
+import sys
+import time
+from itertools import islice
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from modern_combobox import ModernSearchableCombobox
+from search_index import SearchIndex
+
+WORDS = ["Pen", "Pencil", "Blue", "Red", "Notebook", "A4", "Paper", "Ream", "Marker",
+         "Stapler", "Ink", "Cartridge", "Black", "Green", "File", "Folder", "Box",
+         "Glue", "Stick", "Tape", "Clip", "Board", "Chalk", "Eraser", "Sharpener"]
+QUERIES = ["12", "pen", "pencil", "ream 12", "box 7", "abc", "zzzq", "y", "zq", "a4"]
+TYPED = ["stapler gl", "sharpener 9", "chalk 55"]
+TOP_K = ModernSearchableCombobox.VISIBLE_ROWS + ModernSearchableCombobox.PAGE_SIZE
+
+
+def make_values(count):
+    rng = random.Random(42)
+    return [f"{i} - {' '.join(rng.choice(WORDS) for _ in range(3))} {rng.randint(1, 999)}"
+            for i in range(count)]
+
+
+def lookup_ms(index, query, repeat=5):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        hits = len(list(islice(index.iter_matches(query), TOP_K)))
+        best = min(best, time.perf_counter() - start)
+    return best * 1000, hits
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+    values = make_values(count)
+    start = time.perf_counter()
+    index = SearchIndex(values)
+    print(f"{count:,} values, index built in {time.perf_counter() - start:.2f} s, top {TOP_K}")
+    index.search("warm up")  # The first lookup pays numpy's one-time setup
+    # Keep a full collection over the freshly built index out of the timings
+    gc.collect()
+    gc.freeze()
+
+    print(f"{'query':<14}{'ms':>8}{'hits':>8}")
+    for query in QUERIES:
+        ms, hits = lookup_ms(index, query)
+        print(f"{query!r:<14}{ms:>8.3f}{hits:>8}")
+
+    # Keystroke by keystroke, as typed: each query extends the last one
+    for word in TYPED:
+        times = []
+        for n in range(1, len(word) + 1):
+            ms, _ = lookup_ms(index, word[:n], repeat=1)
+            times.append(ms)
+        print(f"typing {word!r}: max {max(times):.3f} ms, mean {sum(times) / len(times):.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+from collections import defaultdict
+from typing import Callable, Iterable, NamedTuple, Tuple
+
+# Change actions
+INSERT = "insert"
+UPDATE = "update"
+DELETE = "delete"
+RELOAD = "reload"  # Bulk change (import, delete all): reload everything
+
+
+class Change(NamedTuple):
+    table: str              # "products", "customers" or "invoices"
+    action: str             # INSERT, UPDATE, DELETE or RELOAD
+    ids: Tuple[int, ...]    # Affected row ids, empty for RELOAD
+
+
+class ChangeBus:
+    """
+    Application-wide notifications of committed data changes.
+
+    Pages publish a Change after they commit, naming the table, the action
+    and the row ids. Subscribers apply just those rows to their lists,
+    pickers and caches instead of reloading everything. Callbacks run
+    synchronously on the publishing (Tk) thread.
+    """
+
+    def __init__(self):
+        self.subscribers = defaultdict(list)  # Table -> callbacks
+
+    def subscribe(self, table: str, callback: Callable[[Change], None]) -> Callable[[], None]:
+        """Call `callback` with every Change to `table`. Returns an unsubscribe function."""
+        self.subscribers[table].append(callback)
+        return lambda: self.subscribers[table].remove(callback)
+
+    def publish(self, table: str, action: str, ids: Iterable[int] = ()):
+        change = Change(table, action, tuple(ids))
+        # Copy so callbacks can unsubscribe while being notified
+        for callback in list(self.subscribers[table]):
+            callback(change)
+
+
+def apply_to_rows(rows: list, change: Change, fetched: Iterable[tuple]):
+    """
+    Apply a change in place to a list of rows whose first column is the id.
+
+    `fetched` holds the current rows for change.ids (nothing for DELETE).
+    Updated rows are replaced where they are, new rows are appended and
+    deleted rows are removed. Only the list is touched; no query is run.
+    """
+    if change.action == DELETE:
+        ids = set(change.ids)
+        rows[:] = [row for row in rows if row[0] not in ids]
+        return
+    by_id = {row[0]: row for row in fetched}
+    if change.action == UPDATE:
+        for i, row in enumerate(rows):
+            if row[0] in by_id:
+                rows[i] = by_id.pop(row[0])
+    rows.extend(by_id.values())
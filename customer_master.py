@@ -1,6 +1,9 @@
 import customtkinter as ctk
 from tkinter import messagebox
 import sqlite3
+from virtual_table import VirtualTable
+from debounced_search import DebouncedSearch
+from change_bus import INSERT, DELETE, RELOAD, apply_to_rows
 
 class AddCustomerForm(ctk.CTkToplevel):
     def __init__(self, parent, db_conn, callback):
@@ -121,26 +124,30 @@ class AddCustomerForm(ctk.CTkToplevel):
                 VALUES (?, ?, ?, ?)
             ''', (name, self.address.get(), self.phone.get(), self.email.get()))
             self.db_conn.commit()
-            self.callback()  # Refresh the customer list
+            self.callback(cursor.lastrowid)  # Announce the new customer
             self.destroy()
         except Exception as e:
             messagebox.showerror("Error", f"Failed to save customer: {str(e)}")
 
 class CustomerMaster(ctk.CTkFrame):
-    def __init__(self, parent, db_conn, refresh_callback=None):
+    def __init__(self, parent, db, changes):
         super().__init__(parent)
-        self.db_conn = db_conn
-        self.refresh_callback = refresh_callback
+        self.db = db
+        self.db_conn = db.conn
+        self.read_conn = db.read_conn
+        self.changes = changes
         self.setup_ui()
         self.setup_bindings()
+        changes.subscribe("customers", self.on_customers_changed)
         
     def setup_bindings(self):
         # Bind keyboard shortcuts to the frame itself
         self.bind('<Control-n>', lambda e: self.show_add_form())
         self.bind('<Delete>', lambda e: self.delete_customer())
+        self.customer_table.bind('<Delete>', lambda e: self.delete_customer())
         
         # Bind Enter key to search entry
-        self.search_entry.bind('<Return>', lambda e: self.on_search())
+        self.search_entry.bind('<Return>', lambda e: self.search.search_now(self.search_var.get().lower()))
         
     def setup_ui(self):
         # Title and Add Button Frame
@@ -164,20 +171,28 @@ class CustomerMaster(ctk.CTkFrame):
                                   font=("Arial", 12))
         search_label.pack(side="left", padx=5)
         
+        # Typing is debounced; queries run on a worker thread
+        self.search = DebouncedSearch(
+            self,
+            connect=lambda: self.db.create_connection(readonly=True),
+            query=self.query_customers,
+            render=self.customer_table_source,
+            name="customer-search"
+        )
         self.search_var = ctk.StringVar()
         self.search_var.trace('w', self.on_search)
         self.search_entry = ctk.CTkEntry(search_frame, textvariable=self.search_var, 
                                        width=300, font=("Arial", 12))
         self.search_entry.pack(side="left", padx=5)
+        # How much typing the debounce saved, updated after every search
+        self.search_stats = ctk.CTkLabel(search_frame, text="", font=("Arial", 11),
+                                        text_color="gray")
+        self.search_stats.pack(side="left", padx=10)
         
         # Customer List Frame
         list_frame = ctk.CTkFrame(self)
         list_frame.pack(fill="both", expand=True, padx=20, pady=(0, 10))
         
-        # Header for customer list
-        header_frame = ctk.CTkFrame(list_frame)
-        header_frame.pack(fill="x", padx=5, pady=5)
-        
         # Column headers
         columns = [
             ("ID", 50),
@@ -187,49 +202,67 @@ class CustomerMaster(ctk.CTkFrame):
             ("Email", 200)
         ]
         
-        for col, width in columns:
-            ctk.CTkLabel(header_frame, text=col, width=width,
-                        font=("Arial", 12, "bold")).pack(side="left", padx=2)
-        
-        # Scrollable frame for customer list
-        self.customer_list = ctk.CTkScrollableFrame(list_frame)
-        self.customer_list.pack(fill="both", expand=True, padx=5, pady=5)
+        # Virtualized customer list: only visible rows have widgets
+        self.customer_table = VirtualTable(list_frame, columns, self.format_customer_row)
+        self.customer_table.pack(fill="both", expand=True)
         
         # Load customers
         self.load_customers()
         
     def show_add_form(self):
-        def on_customer_added():
-            self.load_customers()
-            if self.refresh_callback:
-                self.refresh_callback()
+        def on_customer_added(customer_id):
+            self.changes.publish("customers", INSERT, [customer_id])
                 
         AddCustomerForm(self, self.db_conn, on_customer_added)
             
     def delete_customer(self):
-        # Get the selected customer frame
-        for child in self.customer_list.winfo_children():
-            if hasattr(child, 'selected') and child.selected:
-                if messagebox.askyesno("Confirm Delete", "Are you sure you want to delete this customer?"):
-                    customer_id = child.customer_id
-                    cursor = self.db_conn.cursor()
-                    cursor.execute('DELETE FROM customers WHERE id = ?', (customer_id,))
-                    self.db_conn.commit()
-                    self.load_customers()
-                    if self.refresh_callback:
-                        self.refresh_callback()
-                break
+        # Get the selected customer row
+        customer = self.customer_table.selected_row()
+        if customer and messagebox.askyesno("Confirm Delete", "Are you sure you want to delete this customer?"):
+            cursor = self.db_conn.cursor()
+            cursor.execute('DELETE FROM customers WHERE id = ?', (customer[0],))
+            self.db_conn.commit()
+            self.changes.publish("customers", DELETE, [customer[0]])
             
     def on_search(self, *args):
         search_term = self.search_var.get().lower()
-        self.load_customers(search_term)
+        self.search.schedule(search_term)
+        
+    def customer_table_source(self, customers):
+        self.customer_table.set_source(customers)
+        self.show_search_stats()
+        
+    def show_search_stats(self):
+        stats = self.search.stats()
+        self.search_stats.configure(
+            text=f"{stats['executed']} searches, {stats['coalesced']} keystrokes merged, "
+                 f"{stats['cancelled']} stale results dropped"
+        )
         
     def load_customers(self, search_term=''):
-        # Clear existing customer list
-        for widget in self.customer_list.winfo_children():
-            widget.destroy()
-            
-        cursor = self.db_conn.cursor()
+        self.customer_table.set_source(self.query_customers(self.read_conn, search_term))
+        
+    def on_customers_changed(self, change):
+        """Apply a customer change to the list without reloading it."""
+        search_term = self.search_var.get().lower()
+        if change.action == RELOAD:
+            self.load_customers(search_term)
+        elif search_term:
+            # Changed rows may enter or leave the results; search again off the Tk thread
+            self.search.search_now(search_term)
+        else:
+            fetched = []
+            if change.action != DELETE:
+                placeholders = ', '.join('?' * len(change.ids))
+                fetched = self.read_conn.execute(
+                    f'SELECT * FROM customers WHERE id IN ({placeholders})', change.ids
+                ).fetchall()
+            apply_to_rows(self.customer_table.source, change, fetched)
+            self.customer_table.refresh()
+        
+    def query_customers(self, conn, search_term=''):
+        """Customers matching the search term, run on the given connection."""
+        cursor = conn.cursor()
         if search_term:
             cursor.execute('''
                 SELECT * FROM customers 
@@ -238,35 +271,18 @@ class CustomerMaster(ctk.CTkFrame):
         else:
             cursor.execute('SELECT * FROM customers')
             
-        for customer in cursor.fetchall():
-            self.create_customer_row(customer)
-            
-    def create_customer_row(self, customer):
-        # Create frame for customer row
-        row = ctk.CTkFrame(self.customer_list)
-        row.pack(fill="x", pady=2)
-        row.customer_id = customer[0]  # Store customer ID
-        row.selected = False  # Track selection state
-        
-        # Add customer details
-        ctk.CTkLabel(row, text=str(customer[0]), width=50).pack(side="left", padx=2)
-        ctk.CTkLabel(row, text=customer[1], width=200).pack(side="left", padx=2)
-        ctk.CTkLabel(row, text=customer[2] or "", width=200).pack(side="left", padx=2)
-        ctk.CTkLabel(row, text=customer[3] or "", width=150).pack(side="left", padx=2)
-        ctk.CTkLabel(row, text=customer[4] or "", width=200).pack(side="left", padx=2)
-        
-        # Add selection handling
-        def on_click(event):
-            # Deselect all other rows
-            for child in self.customer_list.winfo_children():
-                if hasattr(child, 'selected'):
-                    child.selected = False
-                    child.configure(fg_color=("gray85", "gray25"))
-            
-            # Select this row
-            row.selected = True
-            row.configure(fg_color=("gray75", "gray35"))
+        return cursor.fetchall()
             
-        row.bind('<Button-1>', on_click)
-        for widget in row.winfo_children():
-            widget.bind('<Button-1>', on_click)
+    def close(self):
+        """Stop the background search before the app exits."""
+        self.search.close()
+        
+    def format_customer_row(self, customer):
+        """Display strings for one customer row of the table."""
+        return (
+            str(customer[0]),
+            customer[1],
+            customer[2] or "",
+            customer[3] or "",
+            customer[4] or "",
+        )
@@ -1,108 +1,605 @@
 import sqlite3
 import os
+from datetime import datetime
+from invoice_numbers import DEFAULT_PREFIX, DEFAULT_FORMAT, format_number, check_format
+
+
+def _add_column_if_missing(cursor, table, column, definition):
+    columns = [row[1] for row in cursor.execute(f"PRAGMA table_info({table})")]
+    if column not in columns:
+        cursor.execute(f"ALTER TABLE {table} ADD COLUMN {column} {definition}")
+
+
+def _migration_1_initial_schema(cursor):
+    """Base tables, plus columns missing from databases created by older versions."""
+    # Create customers table
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS customers (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT NOT NULL,
+            address TEXT,
+            phone TEXT,
+            email TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+    
+    # Create products table with additional columns
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS products (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT NOT NULL,
+            wholesale_price REAL,
+            retail_price REAL,
+            base_unit TEXT,
+            alt_unit TEXT,
+            unit_ratio REAL DEFAULT 1,
+            description TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+    
+    # Create invoices table
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS invoices (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            customer_id INTEGER,
+            total_amount REAL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (customer_id) REFERENCES customers (id)
+        )
+    ''')
+    
+    # Create invoice_items table
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS invoice_items (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            invoice_id INTEGER,
+            product_id INTEGER,
+            quantity REAL,
+            price_type TEXT,
+            unit_price REAL,
+            total_price REAL,
+            FOREIGN KEY (invoice_id) REFERENCES invoices (id),
+            FOREIGN KEY (product_id) REFERENCES products (id)
+        )
+    ''')
+    
+    # Databases created before these columns existed
+    _add_column_if_missing(cursor, "customers", "email", "TEXT")
+    _add_column_if_missing(cursor, "products", "alt_unit", "TEXT")
+    _add_column_if_missing(cursor, "products", "unit_ratio", "REAL DEFAULT 1")
+    _add_column_if_missing(cursor, "products", "description", "TEXT")
+
+
+def _migration_2_lookup_indexes(cursor):
+    """Secondary indexes for the lookups the application runs."""
+    # Line items of an invoice, and invoice history of a product
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_invoice_items_invoice ON invoice_items (invoice_id)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_invoice_items_product ON invoice_items (product_id)")
+    # Invoices of a customer (newest first) and the recent invoices list
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_invoices_customer ON invoices (customer_id, created_at)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_invoices_created ON invoices (created_at)")
+    # Case-insensitive name lookups, sorting and prefix LIKE searches
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_products_name_nocase ON products (name COLLATE NOCASE)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_customers_name_nocase ON customers (name COLLATE NOCASE)")
+
+
+def _migration_3_product_search(cursor):
+    """Trigram FTS5 index over product name and description, synced by triggers."""
+    cursor.execute("SAVEPOINT product_fts")
+    try:
+        cursor.execute('''
+            CREATE VIRTUAL TABLE products_fts USING fts5(
+                name, description,
+                content='products', content_rowid='id',
+                tokenize='trigram'
+            )
+        ''')
+    except sqlite3.OperationalError:
+        # SQLite built without FTS5 or without the trigram tokenizer (< 3.34).
+        # Database.search_products falls back to LIKE queries in that case.
+        cursor.execute("ROLLBACK TO product_fts")
+        cursor.execute("RELEASE product_fts")
+        return
+        
+    cursor.execute('''
+        CREATE TRIGGER products_fts_insert AFTER INSERT ON products BEGIN
+            INSERT INTO products_fts (rowid, name, description)
+            VALUES (new.id, new.name, new.description);
+        END
+    ''')
+    cursor.execute('''
+        CREATE TRIGGER products_fts_delete AFTER DELETE ON products BEGIN
+            INSERT INTO products_fts (products_fts, rowid, name, description)
+            VALUES ('delete', old.id, old.name, old.description);
+        END
+    ''')
+    cursor.execute('''
+        CREATE TRIGGER products_fts_update AFTER UPDATE OF name, description ON products BEGIN
+            INSERT INTO products_fts (products_fts, rowid, name, description)
+            VALUES ('delete', old.id, old.name, old.description);
+            INSERT INTO products_fts (rowid, name, description)
+            VALUES (new.id, new.name, new.description);
+        END
+    ''')
+    # Index the products that already exist
+    cursor.execute("INSERT INTO products_fts (products_fts) VALUES ('rebuild')")
+    cursor.execute("RELEASE product_fts")
+
+
+def _migration_4_invoice_records(cursor):
+    """Columns needed to keep generated invoices in the database."""
+    _add_column_if_missing(cursor, "invoices", "invoice_number", "TEXT")
+    _add_column_if_missing(cursor, "invoices", "pdf_path", "TEXT")
+    cursor.execute("CREATE UNIQUE INDEX IF NOT EXISTS idx_invoices_number ON invoices (invoice_number)")
+    # Snapshot of the product as billed, so reprints survive product edits
+    _add_column_if_missing(cursor, "invoice_items", "product_name", "TEXT")
+    _add_column_if_missing(cursor, "invoice_items", "unit", "TEXT")
+
+
+def _migration_5_register_legacy_pdfs(cursor):
+    """Register PDFs written before invoices were stored in the database."""
+    invoice_dir = "invoices"
+    if not os.path.isdir(invoice_dir):
+        return
+    rows = []
+    for filename in os.listdir(invoice_dir):
+        # Format: invoice_YYYYMMDD_HHMMSS.pdf
+        if not (filename.startswith("invoice_") and filename.endswith(".pdf")):
+            continue
+        stem = filename[:-len(".pdf")]
+        try:
+            created = datetime.strptime(stem[len("invoice_"):], "%Y%m%d_%H%M%S")
+        except ValueError:
+            continue
+        rows.append((stem, created.strftime("%Y-%m-%d %H:%M:%S"),
+                     os.path.join(invoice_dir, filename)))
+    cursor.executemany(
+        "INSERT OR IGNORE INTO invoices (invoice_number, created_at, pdf_path) VALUES (?, ?, ?)",
+        rows
+    )
+
+
+def _migration_6_product_sku(cursor):
+    """Optional stock-keeping code, unique when set, used to match imports."""
+    _add_column_if_missing(cursor, "products", "sku", "TEXT")
+    cursor.execute(
+        "CREATE UNIQUE INDEX IF NOT EXISTS idx_products_sku ON products (sku) WHERE sku IS NOT NULL"
+    )
+
+
+def _migration_7_invoice_series(cursor):
+    """Numbering series, each allocating invoice numbers from its own counter."""
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS invoice_series (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT NOT NULL UNIQUE,
+            prefix TEXT NOT NULL DEFAULT '',
+            number_format TEXT NOT NULL,
+            next_number INTEGER NOT NULL DEFAULT 1
+        )
+    ''')
+    _add_column_if_missing(cursor, "invoices", "series_id", "INTEGER REFERENCES invoice_series(id)")
+    # Invoice PDFs are named after the number, and Windows file names ignore case
+    cursor.execute(
+        "CREATE INDEX IF NOT EXISTS idx_invoices_number_nocase ON invoices (invoice_number COLLATE NOCASE)"
+    )
+    # The default series carries on from the INV-{id:06d} numbers issued so far
+    cursor.execute('''
+        INSERT OR IGNORE INTO invoice_series (name, prefix, number_format, next_number)
+        SELECT 'Default', ?, ?, COALESCE(MAX(id), 0) + 1 FROM invoices
+    ''', (DEFAULT_PREFIX, DEFAULT_FORMAT))
+
+
+def _migration_8_pdf_errors(cursor):
+    """Why the last render of an invoice's PDF failed, so it is not mistaken for pending."""
+    _add_column_if_missing(cursor, "invoices", "pdf_error", "TEXT")
+    # Invoices still waiting for a PDF are looked up at every startup
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_invoices_no_pdf ON invoices (id) WHERE pdf_path IS NULL")
+
+
+# Ordered (version, migration) pairs. Each migration runs exactly once;
+# never edit an applied migration, append a new one instead.
+MIGRATIONS = [
+    (1, _migration_1_initial_schema),
+    (2, _migration_2_lookup_indexes),
+    (3, _migration_3_product_search),
+    (4, _migration_4_invoice_records),
+    (5, _migration_5_register_legacy_pdfs),
+    (6, _migration_6_product_sku),
+    (7, _migration_7_invoice_series),
+    (8, _migration_8_pdf_errors),
+]
+
+SCHEMA_VERSION = MIGRATIONS[-1][0]
+
+# Queries on hot paths that must be answered from an index.
+# Checked by Database.check_query_plans() with EXPLAIN QUERY PLAN.
+HOT_QUERIES = [
+    ("invoice lines", "SELECT * FROM invoice_items WHERE invoice_id = ?", (1,)),
+    ("product sales", "SELECT * FROM invoice_items WHERE product_id = ?", (1,)),
+    ("customer invoices",
+     "SELECT * FROM invoices WHERE customer_id = ? ORDER BY created_at DESC", (1,)),
+    ("recent invoices", "SELECT * FROM invoices ORDER BY created_at DESC LIMIT 50", ()),
+    ("invoice list page",
+     "SELECT * FROM invoices WHERE (created_at, id) < (?, ?) ORDER BY created_at DESC, id DESC LIMIT 50",
+     ("2024-01-01 00:00:00", 1)),
+    ("invoices by date",
+     "SELECT * FROM invoices WHERE created_at >= ? AND created_at < ?", ("2024-01-01", "2024-02-01")),
+    ("invoices without pdf", "SELECT id FROM invoices WHERE pdf_path IS NULL", ()),
+    ("invoice by number",
+     "SELECT 1 FROM invoices WHERE invoice_number = ? COLLATE NOCASE", ("INV-000001",)),
+    ("product by name", "SELECT * FROM products WHERE name = ? COLLATE NOCASE", ("pen",)),
+    ("product by sku", "SELECT * FROM products WHERE sku = ?", ("ABC-1",)),
+    ("product name prefix", "SELECT * FROM products WHERE name LIKE ?", ("pen%",)),
+    ("products by name", "SELECT * FROM products ORDER BY name COLLATE NOCASE", ()),
+    ("customer by name", "SELECT * FROM customers WHERE name = ? COLLATE NOCASE", ("john",)),
+    ("customers by name", "SELECT * FROM customers ORDER BY name COLLATE NOCASE", ()),
+]
+
+
+class QueryPlanError(sqlite3.DatabaseError):
+    """Raised when a hot query would fall back to a full table scan."""
+
 
 class Database:
-    def __init__(self):
-        self.db_file = "invoice_system.db"
+    # Pragmas applied to every connection handed out by the factory.
+    # WAL lets readers keep working while a writer is committing.
+    PRAGMAS = (
+        ("journal_mode", "WAL"),
+        ("synchronous", "NORMAL"),      # Safe with WAL, avoids an fsync per commit
+        ("cache_size", -32000),         # Negative value is in KiB (~32 MB)
+        ("mmap_size", 268435456),       # 256 MB memory-mapped I/O
+        ("temp_store", "MEMORY"),
+        ("busy_timeout", 5000),         # Wait up to 5s for a lock instead of failing
+    )
+
+    def __init__(self, db_file="invoice_system.db"):
+        self.db_file = db_file
+        # Writer connection (inserts, updates, imports) and a separate
+        # query-only reader connection for listing and searching
         self.conn = self.create_connection()
-        self.create_tables()
+        self.read_conn = self.create_connection(readonly=True) if self.conn else None
+        self.has_product_fts = False
+        if self.conn:
+            self.migrate()
+            self.has_product_fts = self.conn.execute(
+                "SELECT 1 FROM sqlite_master WHERE name = 'products_fts'"
+            ).fetchone() is not None
         
-    def create_connection(self):
+    def create_connection(self, readonly=False):
+        """Open a new tuned connection. Each thread must use its own connection."""
         try:
-            conn = sqlite3.connect(self.db_file)
+            conn = sqlite3.connect(self.db_file, timeout=5.0)
+            for name, value in self.PRAGMAS:
+                conn.execute(f"PRAGMA {name}={value}")
+            if readonly:
+                conn.execute("PRAGMA query_only=ON")
             return conn
         except sqlite3.Error as e:
             print(f"Error connecting to database: {e}")
             return None
             
-    def create_tables(self):
+    def migrate(self):
+        """
+        Apply pending schema migrations in a single transaction.
+
+        The schema version is kept in PRAGMA user_version, so an up-to-date
+        database costs one pragma read at startup.
+
+        Returns:
+            List of migration versions that were applied
+        """
+        cursor = self.conn.cursor()
+        if cursor.execute("PRAGMA user_version").fetchone()[0] >= SCHEMA_VERSION:
+            return []
+            
         try:
-            cursor = self.conn.cursor()
+            cursor.execute("BEGIN IMMEDIATE")
+            # Re-read under the write lock in case another instance migrated first
+            current = cursor.execute("PRAGMA user_version").fetchone()[0]
+            applied = []
+            for version, migration in MIGRATIONS:
+                if version > current:
+                    migration(cursor)
+                    applied.append(version)
+            if applied:
+                cursor.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+            self.conn.commit()
+        except Exception:
+            self.conn.rollback()
+            raise
             
-            # Create customers table
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS customers (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    name TEXT NOT NULL,
-                    address TEXT,
-                    phone TEXT,
-                    email TEXT,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                )
-            ''')
+        if applied:
+            self.check_query_plans()
+        return applied
+        
+    def check_query_plans(self):
+        """
+        Verify that every query in HOT_QUERIES is served by an index.
+
+        Raises:
+            QueryPlanError: If any hot query scans a table or sorts in a temp b-tree
+        """
+        # Plan against an empty copy of the schema. With planner statistics
+        # from a small database SQLite rightly prefers scanning a few rows,
+        # which says nothing about how the query behaves once tables grow.
+        schema = self.conn.execute(
+            "SELECT type, name, sql FROM sqlite_master "
+            "WHERE sql IS NOT NULL AND name NOT LIKE 'sqlite_%'"
+        ).fetchall()
+        # Full-text tables and their shadow tables are not part of any hot query
+        virtual = [name for _, name, sql in schema if sql.upper().startswith("CREATE VIRTUAL")]
+        probe = sqlite3.connect(":memory:")
+        try:
+            for kind, name, sql in schema:
+                if kind in ("table", "index") and not any(
+                        name == v or name.startswith(v + "_") for v in virtual):
+                    probe.execute(sql)
+                    
+            failures = []
+            for name, sql, params in HOT_QUERIES:
+                for row in probe.execute(f"EXPLAIN QUERY PLAN {sql}", params):
+                    detail = row[-1]
+                    full_scan = detail.startswith("SCAN") and "USING" not in detail
+                    if full_scan or "USE TEMP B-TREE" in detail:
+                        failures.append(f"{name}: {detail}")
+        finally:
+            probe.close()
+                    
+        if failures:
+            raise QueryPlanError(
+                "Hot queries are not using an index:\n" + "\n".join(failures)
+            )
             
-            # Create products table with additional columns
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS products (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    name TEXT NOT NULL,
-                    wholesale_price REAL,
-                    retail_price REAL,
-                    base_unit TEXT,
-                    alt_unit TEXT,
-                    unit_ratio REAL DEFAULT 1,
-                    description TEXT,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                )
-            ''')
+    def search_products(self, term, conn=None):
+        """
+        Ranked search over product name and description.
+
+        Words of three or more characters are matched through the trigram
+        FTS index, so they match anywhere in the text; shorter words are too
+        short for a trigram and are applied as substring LIKE filters, on the
+        FTS hits or, when the query has no longer word, on every product.
+        Name prefix matches rank first, then FTS5 bm25 relevance or name.
+
+        Args:
+            term: Search text as typed by the user
+            conn: Connection to query on (default: the reader connection)
+
+        Returns:
+            List of product rows
+        """
+        words = term.split()
+        if not words:
+            return []
             
-            # Create invoices table
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS invoices (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    customer_id INTEGER,
-                    total_amount REAL,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    FOREIGN KEY (customer_id) REFERENCES customers (id)
-                )
-            ''')
+        long_words = [w for w in words if len(w) >= 3]
+        short_words = [w for w in words if len(w) < 3]
+        params = []
+        
+        if self.has_product_fts and long_words:
+            match = " ".join('"' + w.replace('"', '""') + '"' for w in long_words)
+            sql = '''
+                SELECT p.* FROM products_fts
+                JOIN products p ON p.id = products_fts.rowid
+                WHERE products_fts MATCH ?
+            '''
+            params.append(match)
+            for word in short_words:
+                sql += " AND (p.name LIKE '%' || ? || '%' OR p.description LIKE '%' || ? || '%')"
+                params += [word, word]
+            sql += " ORDER BY p.name LIKE ? DESC, bm25(products_fts)"
+        else:
+            # Only short words, or no FTS5 available: plain substring scan
+            sql = "SELECT p.* FROM products p WHERE 1"
+            for word in words:
+                sql += " AND (p.name LIKE '%' || ? || '%' OR p.description LIKE '%' || ? || '%')"
+                params += [word, word]
+            sql += " ORDER BY p.name LIKE ? DESC, p.name COLLATE NOCASE"
+        params.append(f"{term.strip()}%")
             
-            # Create invoice_items table
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS invoice_items (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    invoice_id INTEGER,
-                    product_id INTEGER,
-                    quantity REAL,
-                    price_type TEXT,
-                    unit_price REAL,
-                    total_price REAL,
-                    FOREIGN KEY (invoice_id) REFERENCES invoices (id),
-                    FOREIGN KEY (product_id) REFERENCES products (id)
+        return (conn or self.read_conn).execute(sql, params).fetchall()
+        
+    def list_series(self):
+        """All numbering series as (id, name, prefix, number_format, next_number), default first."""
+        return self.read_conn.execute(
+            "SELECT id, name, prefix, number_format, next_number FROM invoice_series ORDER BY id"
+        ).fetchall()
+        
+    def save_series(self, name, prefix, number_format, next_number=1, series_id=None):
+        """
+        Add a numbering series, or change one when series_id is given.
+
+        Raises:
+            ValueError: If the name is empty or the format is unusable
+            sqlite3.IntegrityError: If another series has the same name
+
+        Returns:
+            The series id
+        """
+        name = name.strip()
+        if not name:
+            raise ValueError("Series name is required")
+        check_format(number_format, prefix)
+        if int(next_number) < 1:
+            raise ValueError("Next number must be at least 1")
+        cursor = self.conn.cursor()
+        try:
+            if series_id is None:
+                cursor.execute(
+                    "INSERT INTO invoice_series (name, prefix, number_format, next_number) VALUES (?, ?, ?, ?)",
+                    (name, prefix, number_format, int(next_number))
+                )
+                series_id = cursor.lastrowid
+            else:
+                cursor.execute(
+                    "UPDATE invoice_series SET name = ?, prefix = ?, number_format = ?, next_number = ? WHERE id = ?",
+                    (name, prefix, number_format, int(next_number), series_id)
                 )
-            ''')
-            
-            # Add any missing columns to existing tables
-            try:
-                # Add email column to customers if it doesn't exist
-                cursor.execute("ALTER TABLE customers ADD COLUMN email TEXT")
-            except sqlite3.OperationalError:
-                # Column already exists
-                pass
-                
-            try:
-                # Add alt_unit column to products if it doesn't exist
-                cursor.execute("ALTER TABLE products ADD COLUMN alt_unit TEXT")
-            except sqlite3.OperationalError:
-                pass
-                
-            try:
-                # Add unit_ratio column to products if it doesn't exist
-                cursor.execute("ALTER TABLE products ADD COLUMN unit_ratio REAL DEFAULT 1")
-            except sqlite3.OperationalError:
-                pass
-                
-            try:
-                # Add description column to products if it doesn't exist
-                cursor.execute("ALTER TABLE products ADD COLUMN description TEXT")
-            except sqlite3.OperationalError:
-                pass
-            
             self.conn.commit()
-            
-        except sqlite3.Error as e:
-            print(f"Error creating tables: {e}")
+        except Exception:
+            self.conn.rollback()
+            raise
+        return series_id
+        
+    def _allocate_number(self, cursor, series_id, created_at):
+        # Must run inside the invoice's write transaction: the counter is read
+        # and advanced under the lock, so concurrent saves never share a number
+        if series_id is None:
+            row = cursor.execute(
+                "SELECT id, prefix, number_format, next_number FROM invoice_series ORDER BY id LIMIT 1"
+            ).fetchone()
+        else:
+            row = cursor.execute(
+                "SELECT id, prefix, number_format, next_number FROM invoice_series WHERE id = ?",
+                (series_id,)
+            ).fetchone()
+        if row is None:
+            raise ValueError("Unknown invoice series")
+        series_id, prefix, number_format, number = row
+        while True:
+            invoice_number = format_number(number_format, prefix, number, created_at)
+            taken = cursor.execute(
+                "SELECT 1 FROM invoices WHERE invoice_number = ? COLLATE NOCASE", (invoice_number,)
+            ).fetchone()
+            if not taken:
+                break
+            number += 1  # Already issued, e.g. by a series with the same prefix
+        cursor.execute(
+            "UPDATE invoice_series SET next_number = ? WHERE id = ?", (number + 1, series_id)
+        )
+        return series_id, invoice_number
+        
+    def save_invoice(self, customer_id, items, total_amount, series_id=None):
+        """
+        Store an invoice header and all of its lines in one transaction.
+
+        Args:
+            customer_id: Customer id, or None for a walk-in sale
+            items: Line tuples (name, quantity, unit, price_type, unit_price, total, product_id)
+            total_amount: Invoice total
+            series_id: Numbering series, or None for the default series
+
+        Returns:
+            Tuple of (invoice_id, invoice_number, created_at)
+        """
+        created_at = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        cursor = self.conn.cursor()
+        try:
+            cursor.execute("BEGIN IMMEDIATE")
+            series_id, invoice_number = self._allocate_number(cursor, series_id, created_at)
+            cursor.execute(
+                "INSERT INTO invoices (customer_id, total_amount, created_at, invoice_number, series_id) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (customer_id, total_amount, created_at, invoice_number, series_id)
+            )
+            invoice_id = cursor.lastrowid
+            cursor.executemany('''
+                INSERT INTO invoice_items (
+                    invoice_id, product_id, product_name, unit,
+                    quantity, price_type, unit_price, total_price
+                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            ''', [
+                (invoice_id, item[6], item[0], item[2], item[1], item[3], item[4], item[5])
+                for item in items
+            ])
+            self.conn.commit()
+        except Exception:
+            self.conn.rollback()
+            raise
+        return invoice_id, invoice_number, created_at
+        
+    def set_invoice_pdf(self, invoice_id, pdf_path):
+        """Record where the PDF of an invoice was written."""
+        self.conn.execute("UPDATE invoices SET pdf_path = ?, pdf_error = NULL WHERE id = ?",
+                          (pdf_path, invoice_id))
+        self.conn.commit()
+        
+    def set_invoice_pdf_error(self, invoice_id, error):
+        """Record that rendering the PDF of an invoice failed."""
+        self.conn.execute("UPDATE invoices SET pdf_error = ? WHERE id = ?", (error, invoice_id))
+        self.conn.commit()
+        
+    def invoices_without_pdf(self):
+        """
+        Ids of stored invoices whose PDF was never written, oldest first:
+        saved, but the app closed before the render finished. Failed
+        renders are left out; they are retried when the invoice is opened.
+        """
+        return [row[0] for row in self.read_conn.execute('''
+            SELECT i.id FROM invoices i
+            WHERE i.pdf_path IS NULL AND i.pdf_error IS NULL
+              AND EXISTS (SELECT 1 FROM invoice_items ii WHERE ii.invoice_id = i.id)
+            ORDER BY i.id
+        ''')]
+        
+    INVOICE_SUMMARY_SQL = '''
+        SELECT i.id, i.invoice_number, i.created_at, c.name, i.total_amount, i.pdf_path, i.pdf_error
+        FROM invoices i
+        LEFT JOIN customers c ON c.id = i.customer_id
+    '''
+
+    def get_invoice_summary(self, invoice_id):
+        """One invoice in the list_invoices row format, or None."""
+        return self.read_conn.execute(
+            self.INVOICE_SUMMARY_SQL + " WHERE i.id = ?", (invoice_id,)
+        ).fetchone()
+
+    def list_invoices(self, before=None, limit=100):
+        """
+        Fetch one page of invoices, newest first.
+
+        Args:
+            before: (created_at, id) of the last row of the previous page,
+                or None for the first page
+            limit: Page size
+
+        Returns:
+            List of (id, invoice_number, created_at, customer_name, total_amount,
+            pdf_path, pdf_error)
+        """
+        sql = self.INVOICE_SUMMARY_SQL
+        params = []
+        if before is not None:
+            # Keyset pagination: seek in idx_invoices_created instead of OFFSET
+            sql += " WHERE (i.created_at, i.id) < (?, ?)"
+            params += list(before)
+        sql += " ORDER BY i.created_at DESC, i.id DESC LIMIT ?"
+        params.append(limit)
+        return self.read_conn.execute(sql, params).fetchall()
+        
+    def delete_invoice(self, invoice_id):
+        """Delete an invoice and its lines in one transaction."""
+        cursor = self.conn.cursor()
+        try:
+            cursor.execute("BEGIN IMMEDIATE")
+            cursor.execute("DELETE FROM invoice_items WHERE invoice_id = ?", (invoice_id,))
+            cursor.execute("DELETE FROM invoices WHERE id = ?", (invoice_id,))
+            self.conn.commit()
+        except Exception:
+            self.conn.rollback()
+            raise
             
     def close(self):
+        if self.read_conn:
+            self.read_conn.close()
         if self.conn:
+            try:
+                # Refresh planner statistics for tables that changed this session
+                self.conn.execute("PRAGMA optimize")
+            except sqlite3.Error:
+                pass
             self.conn.close()
+
+
+if __name__ == "__main__":
+    # Self-check: python database.py [path/to/database.db]
+    import sys
+    
+    db = Database(sys.argv[1] if len(sys.argv) > 1 else "invoice_system.db")
+    try:
+        db.check_query_plans()
+        print(f"Schema version {SCHEMA_VERSION}: all {len(HOT_QUERIES)} hot queries use an index")
+    finally:
+        db.close()
@@ -0,0 +1,141 @@
+import logging
+import queue
+import sqlite3
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Sequence
+
+logger = logging.getLogger(__name__)
+
+class DebouncedSearch:
+    """
+    Run a search query once typing pauses, off the Tk main thread.
+
+    Every keystroke restarts a short timer, so a burst of typing becomes a
+    single query. Queries run on one worker thread with its own read-only
+    connection. Starting a new query interrupts one that is still running,
+    and results are only rendered if they belong to the latest query.
+    """
+
+    POLL_MS = 20  # How often the Tk thread checks for finished queries
+
+    def __init__(self, widget, connect: Callable[[], sqlite3.Connection],
+                 query: Callable[[sqlite3.Connection, str], Sequence],
+                 render: Callable[[Sequence], None],
+                 delay_ms: int = 250, name: str = "search"):
+        """
+        Args:
+            widget: Any Tk widget, used for scheduling on the main thread
+            connect: Opens the worker's connection (called on the worker thread)
+            query: Runs the search on the worker: query(conn, term) -> rows
+            render: Shows the rows, called on the main thread
+            delay_ms: Quiet time after the last keystroke before querying
+            name: Names the worker thread and the stats logged on close()
+        """
+        self.widget = widget
+        self.connect = connect
+        self.query = query
+        self.render = render
+        self.delay_ms = delay_ms
+        self.name = name
+
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix=name)
+        self.conn = None          # Worker-thread connection, opened lazily
+        self.results = queue.Queue()
+        self.pending = None       # after() id of the scheduled query
+        self.generation = 0       # Id of the latest query started
+        self.running = 0          # Queries submitted but not finished
+        self.polling = False
+
+        # Metrics
+        self.coalesced = 0        # Keystrokes merged into a later query
+        self.cancelled = 0        # Started queries interrupted or discarded as stale
+        self.executed = 0         # Queries whose results were rendered
+
+    def schedule(self, term: str):
+        """Search for `term` once typing has paused for delay_ms."""
+        if self.pending is not None:
+            self.widget.after_cancel(self.pending)
+            self.coalesced += 1
+        self.pending = self.widget.after(self.delay_ms, self._start, term)
+
+    def search_now(self, term: str):
+        """Search immediately (e.g. on Enter), dropping any scheduled query."""
+        if self.pending is not None:
+            self.widget.after_cancel(self.pending)
+            self.coalesced += 1
+        self._start(term)
+
+    def _start(self, term: str):
+        self.pending = None
+        self.generation += 1
+        if self.running and self.conn is not None:
+            # Abort the stale query; it raises OperationalError on the worker
+            self.conn.interrupt()
+        self.running += 1
+        self.executor.submit(self._run, self.generation, term)
+        if not self.polling:
+            self.polling = True
+            self.widget.after(self.POLL_MS, self._poll)
+
+    def _run(self, generation: int, term: str):
+        # Worker thread
+        try:
+            if self.conn is None:
+                self.conn = self.connect()
+            rows = None
+            for _ in range(2):
+                if generation != self.generation:
+                    break  # Superseded, don't bother running it
+                try:
+                    rows = self.query(self.conn, term)
+                    break
+                except sqlite3.OperationalError:
+                    # Interrupted. If this is still the latest query the
+                    # interrupt was meant for its predecessor, so retry once.
+                    rows = None
+        except sqlite3.Error:
+            rows = None
+        self.results.put((generation, rows))
+
+    def _poll(self):
+        try:
+            while True:
+                generation, rows = self.results.get_nowait()
+                self.running -= 1
+                if generation == self.generation and rows is not None:
+                    self.executed += 1
+                    self.render(rows)
+                else:
+                    self.cancelled += 1
+        except queue.Empty:
+            pass
+
+        if self.running:
+            self.widget.after(self.POLL_MS, self._poll)
+        else:
+            self.polling = False
+
+    def stats(self):
+        return {
+            "coalesced": self.coalesced,
+            "cancelled": self.cancelled,
+            "executed": self.executed,
+        }
+
+    def close(self):
+        """Stop the worker and log how the searches went."""
+        logger.info("%s: %d keystrokes coalesced, %d queries cancelled, %d executed",
+                    self.name, self.coalesced, self.cancelled, self.executed)
+        if self.pending is not None:
+            self.widget.after_cancel(self.pending)
+            self.pending = None
+        if self.conn is not None:
+            self.conn.interrupt()
+        self.executor.submit(self._close_connection)
+        self.executor.shutdown(wait=False)
+
+    def _close_connection(self):
+        # Worker thread: the connection must be closed where it was opened
+        if self.conn is not None:
+            self.conn.close()
+            self.conn = None
@@ -6,8 +6,11 @@ from product_master import ProductMaster
 from invoice_list import InvoiceList
 from invoice_page import InvoicePage
 from database import Database
+from change_bus import ChangeBus
 import sys
 import os
+import logging
+import multiprocessing
 from about_page import AboutPage  # Add this import at the top
 from PIL import Image  # Add this import at the top with other imports
 
@@ -25,6 +28,14 @@ def setup_customtkinter():
         except:
             pass
 
+def setup_logging():
+    """Write the app's log, e.g. search statistics, to a file next to the database."""
+    logging.basicConfig(
+        filename="invoice_system.log",
+        level=logging.INFO,
+        format="%(asctime)s %(levelname)s %(name)s: %(message)s"
+    )
+
 class MainApplication:
     """
     Main application class that manages the invoice system interface.
@@ -98,7 +109,8 @@ class MainApplication:
         """Initialize database connection."""
         try:
             self.db = Database()
-            if not self.db.conn:
+            self.changes = ChangeBus()  # Pages announce data changes to each other here
+            if not self.db.conn or not self.db.read_conn:
                 messagebox.showerror(
                     "Database Error",
                     "Failed to connect to database.\nPlease ensure the database file exists and is not corrupted."
@@ -212,37 +224,23 @@ class MainApplication:
         """Create and initialize all application pages."""
         try:
             # Create invoice page
-            self.pages["Invoice"] = InvoicePage(self.main_container, self.db.conn)
+            self.pages["Invoice"] = InvoicePage(self.main_container, self.db, self.changes)
             
             # Create customer management page
-            self.pages["Customers"] = CustomerMaster(
-                self.main_container,
-                self.db.conn,
-                refresh_callback=self.pages["Invoice"].refresh
-            )
+            self.pages["Customers"] = CustomerMaster(self.main_container, self.db, self.changes)
             
             # Create product management page
-            self.pages["Products"] = ProductMaster(
-                self.main_container,
-                self.db.conn,
-                refresh_callback=self.pages["Invoice"].refresh
-            )
+            self.pages["Products"] = ProductMaster(self.main_container, self.db, self.changes)
             
             # Create invoice list page
-            self.pages["All Invoices"] = InvoiceList(self.main_container)
+            self.pages["All Invoices"] = InvoiceList(
+                self.main_container, self.db, self.changes,
+                render_pdf=self.pages["Invoice"].render_stored
+            )
             
             # Add About page
             self.pages["About"] = AboutPage(self.main_container)
             
-            # Setup invoice generation callback
-            original_generate = self.pages["Invoice"].generate_invoice
-            def new_generate():
-                result = original_generate()
-                if result:  # Only refresh if invoice was generated successfully
-                    self.pages["All Invoices"].refresh()
-                return result
-            self.pages["Invoice"].generate_invoice = new_generate
-            
         except Exception as e:
             messagebox.showerror(
                 "Initialization Error",
@@ -291,6 +289,11 @@ class MainApplication:
     def on_closing(self) -> None:
         """Clean up resources and close the application."""
         try:
+            # Let queued PDFs finish and be recorded, and stop background
+            # searches, while the database is open
+            for page in getattr(self, 'pages', {}).values():
+                if hasattr(page, 'close'):
+                    page.close()
             if hasattr(self, 'db'):
                 self.db.close()
         except Exception as e:
@@ -319,6 +322,7 @@ def main():
     try:
         # Configure customtkinter
         setup_customtkinter()
+        setup_logging()
         
         # Create and run application
         app = MainApplication()
@@ -331,4 +335,6 @@ def main():
         )
 
 if __name__ == "__main__":
+    # Batch PDF regeneration uses a process pool; needed in the frozen build
+    multiprocessing.freeze_support()
     main()
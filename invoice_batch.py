@@ -0,0 +1,220 @@
+import os
+import queue
+import sqlite3
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime, timedelta
+from typing import List, NamedTuple, Optional
+
+INVOICE_HEADER_SQL = '''
+    SELECT i.invoice_number, i.created_at, i.total_amount,
+           c.id, c.name, c.address, c.phone, c.email
+    FROM invoices i
+    LEFT JOIN customers c ON c.id = i.customer_id
+    WHERE i.id = ?
+'''
+
+# Lines as billed; invoices saved before the snapshot columns fall back
+# to the current product
+INVOICE_ITEMS_SQL = '''
+    SELECT COALESCE(ii.product_name, p.name, ''), ii.quantity,
+           COALESCE(ii.unit, p.base_unit, ''), ii.price_type,
+           ii.unit_price, ii.total_price, ii.product_id
+    FROM invoice_items ii
+    LEFT JOIN products p ON p.id = ii.product_id
+    WHERE ii.invoice_id = ?
+    ORDER BY ii.id
+'''
+
+
+def select_invoices(conn, start=None, end=None, customer_id=None, invoice_ids=None) -> List[int]:
+    """
+    Ids of the invoices to regenerate, oldest first.
+
+    Args:
+        start, end: Inclusive "YYYY-MM-DD" dates, either may be None
+        customer_id: Only this customer's invoices
+        invoice_ids: Only these invoices
+
+    Invoices without stored lines (PDFs registered from before invoices were
+    kept in the database) are never selected: their PDF is the only copy.
+    """
+    sql = '''
+        SELECT i.created_at, i.id FROM invoices i
+        WHERE EXISTS (SELECT 1 FROM invoice_items ii WHERE ii.invoice_id = i.id)
+    '''
+    params = []
+    if start:
+        sql += " AND i.created_at >= ?"
+        params.append(datetime.strptime(start, "%Y-%m-%d").strftime("%Y-%m-%d"))
+    if end:
+        day_after = datetime.strptime(end, "%Y-%m-%d") + timedelta(days=1)
+        sql += " AND i.created_at < ?"
+        params.append(day_after.strftime("%Y-%m-%d"))
+    if customer_id is not None:
+        sql += " AND i.customer_id = ?"
+        params.append(customer_id)
+    if invoice_ids is None:
+        sql += " ORDER BY i.created_at, i.id"
+        return [row[1] for row in conn.execute(sql, params)]
+
+    # Stay well below SQLite's bound parameter limit
+    invoice_ids = list(dict.fromkeys(invoice_ids))  # Each invoice once
+    rows = []
+    for first in range(0, len(invoice_ids), 500):
+        batch = invoice_ids[first:first + 500]
+        rows += conn.execute(sql + f" AND i.id IN ({', '.join('?' * len(batch))})",
+                             params + batch).fetchall()
+    rows.sort(key=lambda row: (row[0] is not None, row[0], row[1]))
+    return [row[1] for row in rows]
+
+
+def load_invoice(conn, invoice_id):
+    """
+    Everything needed to print a stored invoice.
+
+    Returns:
+        (invoice_number, created_at, customer, items, total_amount), with
+        customer as (id, name, address, phone, email) or None
+    """
+    header = conn.execute(INVOICE_HEADER_SQL, (invoice_id,)).fetchone()
+    if header is None:
+        raise LookupError(f"Invoice {invoice_id} not found")
+    invoice_number, created_at, total_amount = header[:3]
+    customer = tuple(header[3:]) if header[3] is not None else None
+    items = conn.execute(INVOICE_ITEMS_SQL, (invoice_id,)).fetchall()
+    return invoice_number, created_at, customer, items, total_amount or 0.0
+
+
+_printer = None  # One InvoicePrinter per worker process
+
+
+def render_invoices(db_file, invoice_ids, output_dir):
+    """
+    Worker: render a chunk of invoices from the database.
+
+    Runs in a pool process with its own read-only connection and printer.
+
+    Returns:
+        List of (invoice_id, pdf_path, error), with pdf_path None on failure
+    """
+    global _printer
+    if _printer is None:
+        from invoice_printer import InvoicePrinter
+        _printer = InvoicePrinter()
+    conn = sqlite3.connect(db_file, timeout=5.0)
+    conn.execute("PRAGMA query_only=ON")
+    results = []
+    try:
+        for invoice_id in invoice_ids:
+            try:
+                invoice_number, created_at, customer, items, total_amount = load_invoice(conn, invoice_id)
+                pdf_path = _printer.generate_pdf(customer, items, total_amount,
+                                                 invoice_number=invoice_number,
+                                                 created_at=created_at, output_dir=output_dir)
+                results.append((invoice_id, pdf_path, None))
+            except Exception as e:
+                results.append((invoice_id, None, str(e)))
+    finally:
+        conn.close()
+    return results
+
+
+class BatchProgress(NamedTuple):
+    rendered: int               # PDFs written so far
+    failed: int
+    total: int                  # Invoices in the batch
+    elapsed: float              # Seconds since the batch started
+    eta: Optional[float]        # Estimated seconds left, None until known
+    finished: bool = False
+    cancelled: bool = False
+    error: Optional[str] = None
+
+
+class BatchRender:
+    """
+    Regenerate the PDFs of many stored invoices across a process pool.
+
+    Invoices are handed to the workers in small chunks; each worker reads
+    its invoices itself and keeps one printer, and every PDF is written to
+    a temporary file and renamed into place. A coordinating thread collects
+    the results, records the new paths with the writer connection and posts
+    BatchProgress tuples to `self.progress` for the UI thread to poll.
+    """
+
+    def __init__(self, db_file, invoice_ids, connect=None, output_dir="invoices",
+                 workers=None, chunk_size=20):
+        """
+        Args:
+            db_file: Database file the workers read the invoices from
+            invoice_ids: Invoices to render, e.g. from select_invoices()
+            connect: Opens a writer connection to record the new PDF paths,
+                or None to leave the stored paths alone (export to a folder)
+            output_dir: Folder the PDFs are written to
+            workers: Pool size, defaults to the number of CPUs
+            chunk_size: Invoices per task sent to a worker
+        """
+        self.db_file = db_file
+        self.invoice_ids = list(invoice_ids)
+        self.connect = connect
+        self.output_dir = output_dir
+        self.workers = workers or os.cpu_count() or 1
+        self.chunk_size = chunk_size
+        self.progress = queue.Queue()
+        self.cancel_event = threading.Event()
+        self.errors = []            # (invoice_id, error) of failed invoices
+        self.thread = None
+
+    def start(self):
+        self.thread = threading.Thread(target=self.run, name="invoice-batch", daemon=True)
+        self.thread.start()
+
+    def cancel(self):
+        """Stop handing out work; chunks already being rendered are finished and recorded."""
+        self.cancel_event.set()
+
+    def run(self):
+        started = time.monotonic()
+        total = len(self.invoice_ids)
+        rendered = failed = 0
+        conn = None
+
+        def report(eta, **status):
+            return BatchProgress(rendered, failed, total, time.monotonic() - started, eta, **status)
+
+        try:
+            conn = self.connect() if self.connect else None
+            chunks = [self.invoice_ids[i:i + self.chunk_size]
+                      for i in range(0, total, self.chunk_size)]
+            with ProcessPoolExecutor(max_workers=min(self.workers, max(1, len(chunks)))) as pool:
+                futures = [pool.submit(render_invoices, self.db_file, chunk, self.output_dir)
+                           for chunk in chunks]
+                for future in as_completed(futures):
+                    if self.cancel_event.is_set():
+                        # Drop the chunks not started yet; running ones are still recorded
+                        for pending in futures:
+                            pending.cancel()
+                    if future.cancelled():
+                        continue
+                    paths = []
+                    for invoice_id, pdf_path, error in future.result():
+                        if error:
+                            failed += 1
+                            self.errors.append((invoice_id, error))
+                        else:
+                            rendered += 1
+                            paths.append((pdf_path, invoice_id))
+                    if conn is not None and paths:
+                        conn.executemany("UPDATE invoices SET pdf_path = ?, pdf_error = NULL WHERE id = ?", paths)
+                        conn.commit()
+                    done = rendered + failed
+                    elapsed = time.monotonic() - started
+                    self.progress.put(report(elapsed / done * (total - done)))
+
+            self.progress.put(report(0, finished=True, cancelled=self.cancel_event.is_set()))
+        except Exception as e:
+            self.progress.put(report(None, finished=True, error=str(e)))
+        finally:
+            if conn is not None:
+                conn.close()
@@ -0,0 +1,165 @@
+from reportlab.pdfbase.pdfmetrics import stringWidth
+from reportlab.pdfgen import canvas
+
+from invoice_layout import PAGE_SIZE, MARGINS, COLUMN_WIDTHS, TABLE_HEADER
+
+# Fixed layout mirroring InvoicePrinter's platypus output. Platypus frames
+# add 6pt of padding inside the page margins.
+FRAME_PADDING = 6
+PAGE_WIDTH, PAGE_HEIGHT = PAGE_SIZE
+LEFT = MARGINS['leftMargin'] + FRAME_PADDING
+RIGHT = PAGE_WIDTH - MARGINS['rightMargin'] - FRAME_PADDING
+TOP = PAGE_HEIGHT - MARGINS['topMargin'] - FRAME_PADDING
+BOTTOM = MARGINS['bottomMargin'] + FRAME_PADDING
+CUSTOMER_INDENT = 20
+
+# (font, size, leading, space before, space after) of each paragraph style
+TITLE = ('Helvetica-Bold', 18, 22, 0, 10)
+BODY = ('Helvetica', 12, 12, 0, 12)
+HEADING = ('Helvetica-Bold', 14, 18, 12, 6)
+CUSTOMER = ('Helvetica', 12, 12, 0, 6)
+
+# Table rows: (font, size, top padding, bottom padding). Table cells keep
+# the default 12pt leading whatever their font size, so a row is 12pt plus
+# its padding and text sits on leading - size above the bottom padding.
+ROW_LEADING = 12
+HEADER_ROW = ('Helvetica-Bold', 14, 3, 12)
+ITEM_ROW = ('Helvetica', 12, 12, 3)
+TOTAL_ROW = ('Helvetica-Bold', 12, 12, 12)
+CELL_PADDING = 6  # Left/right padding used for right-aligned cells
+
+TABLE_WIDTH = sum(COLUMN_WIDTHS)
+TABLE_LEFT = LEFT + (RIGHT - LEFT - TABLE_WIDTH) / 2  # Tables are centered
+FOOTER_SPACE = 30
+
+
+def row_height(row_style):
+    _, size, top, bottom = row_style
+    return ROW_LEADING + top + bottom
+
+
+def clean(text) -> str:
+    """Text as a paragraph would show it: whitespace runs become one space."""
+    return " ".join(str(text).split())
+
+
+def paragraph_lines(invoice_number, created_at, customer):
+    """The paragraphs above the table as (style, text, indent) in page order,
+    with None for the platypus spacers."""
+    lines = [(TITLE, "INVOICE", 0), (None, 10, 0)]
+    if invoice_number:
+        lines.append((BODY, f"Invoice No: {invoice_number}", 0))
+    lines.append((BODY, f"Date: {created_at}", 0))
+    lines.append((None, 20, 0))
+    if customer:
+        lines.append((HEADING, "Customer Information:", 0))
+        lines.append((CUSTOMER, f"Name: {clean(customer[1])}", CUSTOMER_INDENT))
+        lines.append((CUSTOMER, f"Address: {clean(customer[2] or 'N/A')}", CUSTOMER_INDENT))
+        lines.append((CUSTOMER, f"Phone: {clean(customer[3] or 'N/A')}", CUSTOMER_INDENT))
+        if len(customer) > 4:
+            lines.append((CUSTOMER, f"Email: {clean(customer[4] or 'N/A')}", CUSTOMER_INDENT))
+        lines.append((None, 20, 0))
+    lines.append((HEADING, "Items:", 0))
+    return lines
+
+
+def fits_one_page(customer, items, invoice_number=None, created_at="") -> bool:
+    """
+    True when the fixed layout can draw this invoice: every paragraph fits
+    on one line and every item row fits on the page. Anything else is left
+    to platypus, which wraps and breaks pages.
+    """
+    height = 0
+    first = True
+    for style, text, indent in paragraph_lines(invoice_number, created_at, customer):
+        if style is None:
+            height += text
+            continue
+        font, size, leading, before, after = style
+        if stringWidth(text, font, size) > RIGHT - LEFT - indent:
+            return False
+        height += (0 if first else before) + leading + after
+        first = False
+    height += row_height(HEADER_ROW) + len(items) * row_height(ITEM_ROW) + row_height(TOTAL_ROW)
+    height += FOOTER_SPACE + BODY[2]
+    return height <= TOP - BOTTOM
+
+
+def draw_invoice(target, customer, items, total_amount, invoice_number, created_at):
+    """
+    Draw a single-page invoice straight onto a canvas. Call only when
+    fits_one_page() is True; `target` is a file name or a binary file.
+    """
+    pdf = canvas.Canvas(target, pagesize=PAGE_SIZE)
+    y = TOP
+    first = True
+    for style, text, indent in paragraph_lines(invoice_number, created_at, customer):
+        if style is None:
+            y -= text
+            continue
+        font, size, leading, before, after = style
+        if not first:
+            y -= before
+        first = False
+        pdf.setFont(font, size)
+        if style is TITLE:
+            pdf.drawCentredString((LEFT + RIGHT) / 2, y - size, text)
+        else:
+            pdf.drawString(LEFT + indent, y - size, text)
+        y -= leading + after
+
+    # Column edges and centers
+    edges = [TABLE_LEFT]
+    for width in COLUMN_WIDTHS:
+        edges.append(edges[-1] + width)
+    centers = [(left + right) / 2 for left, right in zip(edges, edges[1:])]
+
+    rows = [(HEADER_ROW, TABLE_HEADER)]
+    for item in items:
+        # item format: (name, quantity, base_unit, price_type, price, total, product_id)
+        rows.append((ITEM_ROW, [clean(item[0]), str(item[1]), clean(item[2]), f"{item[5]:.2f}"]))
+
+    table_top = y
+    header_height = row_height(HEADER_ROW)
+    pdf.setFillColorRGB(0.5, 0.5, 0.5)  # colors.grey
+    pdf.rect(TABLE_LEFT, y - header_height, TABLE_WIDTH, header_height, stroke=0, fill=1)
+    for row_style, cells in rows:
+        font, size, top, bottom = row_style
+        height = row_height(row_style)
+        if row_style is HEADER_ROW:
+            pdf.setFillColorRGB(0.96, 0.96, 0.96)  # colors.whitesmoke
+        else:
+            pdf.setFillColorRGB(0, 0, 0)
+        pdf.setFont(font, size)
+        baseline = y - height + bottom + ROW_LEADING - size
+        for center, text in zip(centers, cells):
+            pdf.drawCentredString(center, baseline, text)
+        y -= height
+
+    # Total row: label and amount right-aligned, with a line below
+    font, size, top, bottom = TOTAL_ROW
+    height = row_height(TOTAL_ROW)
+    pdf.setFillColorRGB(0, 0, 0)
+    pdf.setFont(font, size)
+    baseline = y - height + bottom + ROW_LEADING - size
+    pdf.drawRightString(edges[3] - CELL_PADDING, baseline, "Total:")
+    pdf.drawRightString(edges[4] - CELL_PADDING, baseline, f"{total_amount:.2f}")
+    y -= height
+
+    # Grid over everything but the total row
+    pdf.setLineWidth(1)
+    pdf.setStrokeColorRGB(0, 0, 0)
+    row_lines = [table_top]
+    for row_style, _ in rows:
+        row_lines.append(row_lines[-1] - row_height(row_style))
+    pdf.grid(edges, row_lines)
+    pdf.line(edges[2], y, edges[4], y)
+
+    # Footer
+    y -= FOOTER_SPACE
+    font, size = BODY[0], BODY[1]
+    pdf.setFont(font, size)
+    pdf.drawString(LEFT, y - size, "Thank you for your business!")
+
+    pdf.showPage()
+    pdf.save()
@@ -0,0 +1,8 @@
+from reportlab.lib.pagesizes import letter
+from reportlab.lib.units import inch
+
+# Page layout shared by both invoice renderers
+PAGE_SIZE = letter
+MARGINS = dict(rightMargin=72, leftMargin=72, topMargin=72, bottomMargin=72)
+COLUMN_WIDTHS = [3*inch, 1.25*inch, 1*inch, 1.25*inch]
+TABLE_HEADER = ['Product', 'Quantity', 'Unit', 'Total']
@@ -0,0 +1,111 @@
+from typing import Dict, Iterator, List, Optional, Tuple
+
+LineKey = Tuple[int, str]  # (product id, price type)
+
+
+class InvoiceLine:
+    """One product at one price type on the invoice being built."""
+
+    __slots__ = ("product_id", "name", "unit", "price_type", "quantity", "price", "total")
+
+    def __init__(self, product_id: int, name: str, unit: str, price_type: str,
+                 quantity: float, price: float):
+        self.product_id = product_id
+        self.name = name
+        self.unit = unit
+        self.price_type = price_type
+        self.quantity = float(quantity)
+        self.price = float(price)
+        self.total = self.quantity * self.price
+
+    @property
+    def key(self) -> LineKey:
+        return (self.product_id, self.price_type)
+
+    def as_item(self) -> tuple:
+        """The item tuple used by save_invoice and the PDF printer:
+        (name, qty, unit, price_type, price, total, product_id)."""
+        return (self.name, self.quantity, self.unit, self.price_type,
+                self.price, self.total, self.product_id)
+
+
+class InvoiceLines:
+    """
+    Line items of the invoice being built, keyed by (product id, price type).
+
+    This is the source of truth for the invoice page; the grid only
+    displays it. Lines keep the order they were added in and can be indexed
+    by position, so the model can be a VirtualTable source directly. Lookups
+    by key are dict lookups, and the invoice total is adjusted by the
+    difference each time a line changes instead of being summed again.
+    """
+
+    def __init__(self):
+        self.lines: Dict[LineKey, InvoiceLine] = {}
+        self.order: List[InvoiceLine] = []  # Lines by position
+        self.total = 0.0
+
+    def __len__(self):
+        return len(self.order)
+
+    def __getitem__(self, position: int) -> InvoiceLine:
+        return self.order[position]
+
+    def __iter__(self) -> Iterator[InvoiceLine]:
+        return iter(self.order)
+
+    def __contains__(self, key: LineKey):
+        return key in self.lines
+
+    def get(self, key: LineKey) -> Optional[InvoiceLine]:
+        return self.lines.get(key)
+
+    def index(self, key: LineKey) -> int:
+        """Position of the line with this key."""
+        return self.order.index(self.lines[key])
+
+    def add(self, product_id: int, name: str, unit: str, price_type: str,
+            quantity: float, price: float) -> InvoiceLine:
+        """Add a new line. Raises KeyError if the product is already on the
+        invoice at this price type."""
+        line = InvoiceLine(product_id, name, unit, price_type, quantity, price)
+        if line.key in self.lines:
+            raise KeyError(line.key)
+        self.lines[line.key] = line
+        self.order.append(line)
+        self.total += line.total
+        return line
+
+    def update(self, key: LineKey, quantity: Optional[float] = None,
+               price: Optional[float] = None) -> InvoiceLine:
+        """Change a line's quantity and/or price and adjust the invoice total."""
+        line = self.lines[key]
+        if quantity is not None:
+            line.quantity = float(quantity)
+        if price is not None:
+            line.price = float(price)
+        old_total = line.total
+        line.total = line.quantity * line.price
+        self.total += line.total - old_total
+        return line
+
+    def increment(self, key: LineKey, quantity: float = 1) -> InvoiceLine:
+        line = self.lines[key]
+        return self.update(key, quantity=line.quantity + quantity)
+
+    def remove(self, key: LineKey) -> InvoiceLine:
+        line = self.lines.pop(key)
+        self.order.remove(line)
+        self.total -= line.total
+        if not self.lines:
+            self.total = 0.0  # Drop any floating point residue
+        return line
+
+    def clear(self):
+        self.lines.clear()
+        self.order.clear()
+        self.total = 0.0
+
+    def items(self) -> List[tuple]:
+        """All lines as item tuples, in the order they were added."""
+        return [line.as_item() for line in self.order]
@@ -1,16 +1,159 @@
 import customtkinter as ctk
-from tkinter import messagebox
+from tkinter import messagebox, filedialog
 import os
+import queue
 import subprocess
 import platform
 from datetime import datetime
+import sqlite3
 import webbrowser
+from change_bus import INSERT, DELETE, RELOAD
+from modern_combobox import ModernSearchableCombobox
+import invoice_batch
+
+class RegenerateForm(ctk.CTkToplevel):
+    """Choose which stored invoices to render again, and where to."""
+    
+    def __init__(self, parent, db, selected_id, callback):
+        """
+        Args:
+            selected_id: Invoice selected in the list, or None
+            callback: Called with (invoice_ids, output_dir) to start the batch
+        """
+        super().__init__(parent)
+        self.db = db
+        self.selected_id = selected_id
+        self.callback = callback
+        self.customer_ids = {}  # Picker label -> customer id
+        
+        self.title("Regenerate Invoice PDFs")
+        self.geometry("560x420")
+        
+        # Make the window modal
+        self.transient(parent)
+        self.grab_set()
+        
+        self.setup_ui()
+        self.bind('<Return>', lambda e: self.regenerate())
+        self.bind('<Escape>', lambda e: self.destroy())
+        
+    def setup_ui(self):
+        main_frame = ctk.CTkFrame(self)
+        main_frame.pack(fill="both", expand=True, padx=20, pady=20)
+        
+        ctk.CTkLabel(main_frame, text="Invoices to Regenerate",
+                    font=("Arial", 16, "bold")).pack(pady=(0, 20))
+        
+        self.start = self.add_field(main_frame, "From (YYYY-MM-DD):")
+        self.end = self.add_field(main_frame, "To (YYYY-MM-DD):")
+        
+        customer_frame = ctk.CTkFrame(main_frame)
+        customer_frame.pack(fill="x", pady=5)
+        ctk.CTkLabel(customer_frame, text="Customer:", width=150, anchor="w",
+                    font=("Arial", 12)).pack(side="left")
+        self.customer_cb = ModernSearchableCombobox(customer_frame, width=300, font=("Arial", 12))
+        self.customer_cb.pack(side="left", padx=5)
+        try:
+            customers = self.db.read_conn.execute(
+                "SELECT id, name FROM customers ORDER BY name COLLATE NOCASE"
+            ).fetchall()
+        except sqlite3.Error:
+            customers = []
+        self.customer_ids = {f"{c[0]} - {c[1]}": c[0] for c in customers}
+        self.customer_cb.set_values(list(self.customer_ids))
+        
+        self.selected_only = ctk.CTkCheckBox(main_frame, text="Only the selected invoice",
+                                           font=("Arial", 12))
+        self.selected_only.pack(anchor="w", pady=5)
+        if self.selected_id is None:
+            self.selected_only.configure(state="disabled")
+        
+        folder_frame = ctk.CTkFrame(main_frame)
+        folder_frame.pack(fill="x", pady=5)
+        ctk.CTkLabel(folder_frame, text="Save to folder:", width=150, anchor="w",
+                    font=("Arial", 12)).pack(side="left")
+        self.folder = ctk.CTkEntry(folder_frame, width=220, font=("Arial", 12))
+        self.folder.pack(side="left", padx=5)
+        self.folder.insert(0, "invoices")
+        ctk.CTkButton(folder_frame, text="Browse", width=70, font=("Arial", 12),
+                     command=self.browse_folder).pack(side="left", padx=5)
+        
+        ctk.CTkLabel(main_frame,
+                    text="Leave fields empty to include everything. PDFs saved to the\n"
+                         "invoices folder replace the current ones.",
+                    font=("Arial", 11), text_color="gray", justify="left").pack(anchor="w", pady=5)
+        
+        button_frame = ctk.CTkFrame(main_frame)
+        button_frame.pack(pady=15)
+        ctk.CTkButton(button_frame, text="Regenerate (Enter)", font=("Arial", 12),
+                     command=self.regenerate).pack(side="left", padx=10)
+        ctk.CTkButton(button_frame, text="Cancel (Esc)", font=("Arial", 12),
+                     command=self.destroy).pack(side="left", padx=10)
+        self.start.focus()
+        
+    def add_field(self, parent, label):
+        frame = ctk.CTkFrame(parent)
+        frame.pack(fill="x", pady=5)
+        ctk.CTkLabel(frame, text=label, width=150, anchor="w",
+                    font=("Arial", 12)).pack(side="left")
+        entry = ctk.CTkEntry(frame, width=300, font=("Arial", 12))
+        entry.pack(side="left", padx=5)
+        return entry
+        
+    def browse_folder(self):
+        folder = filedialog.askdirectory(title="Save PDFs to")
+        if folder:
+            self.folder.delete(0, "end")
+            self.folder.insert(0, folder)
+            
+    def regenerate(self):
+        customer = self.customer_cb.get().strip()
+        if customer and customer not in self.customer_ids:
+            messagebox.showerror("Error", "Please choose a customer from the list.")
+            return
+        output_dir = self.folder.get().strip()
+        if not output_dir:
+            messagebox.showerror("Error", "Please choose a folder.")
+            return
+        try:
+            invoice_ids = invoice_batch.select_invoices(
+                self.db.read_conn,
+                start=self.start.get().strip() or None,
+                end=self.end.get().strip() or None,
+                customer_id=self.customer_ids.get(customer),
+                invoice_ids=[self.selected_id] if self.selected_only.get() else None
+            )
+        except ValueError:
+            messagebox.showerror("Error", "Dates must be in YYYY-MM-DD format.")
+            return
+        except sqlite3.Error as e:
+            messagebox.showerror("Database Error", f"Failed to find invoices: {str(e)}")
+            return
+        if not invoice_ids:
+            messagebox.showinfo("Nothing to Do", "No stored invoices match these choices.")
+            return
+        self.destroy()
+        self.callback(invoice_ids, output_dir)
 
 class InvoiceList(ctk.CTkFrame):
-    def __init__(self, parent):
+    PAGE_SIZE = 100  # Invoices fetched per page
+    
+    def __init__(self, parent, db, changes, render_pdf=None):
+        """
+        Args:
+            render_pdf: Queues the PDFs of stored invoices again, called with
+                a list of invoice ids; returns True if they were queued
+        """
         super().__init__(parent)
+        self.db = db
+        self.changes = changes
+        self.render_pdf = render_pdf
+        self.last_key = None  # (created_at, id) of the last loaded row
+        self.loaded = False  # Loaded when first shown, then kept current by the change bus
+        self.batch_job = None  # Running BatchRender, if any
         self.setup_ui()
         self.setup_bindings()
+        changes.subscribe("invoices", self.on_invoices_changed)
         
     def setup_bindings(self):
         # Bind keyboard shortcuts - only within this frame
@@ -49,6 +192,22 @@ class InvoiceList(ctk.CTkFrame):
                                       state="disabled")
         self.delete_btn.pack(side="left", padx=5)
         
+        self.regenerate_btn = ctk.CTkButton(button_frame, text="Regenerate PDFs",
+                                          font=("Arial", 12),
+                                          command=self.show_regenerate_form)
+        self.regenerate_btn.pack(side="left", padx=5)
+        
+        # Batch progress, shown while PDFs are being regenerated
+        self.batch_frame = ctk.CTkFrame(title_frame)
+        self.batch_label = ctk.CTkLabel(self.batch_frame, text="", font=("Arial", 11))
+        self.batch_label.pack(side="left", padx=5)
+        self.batch_bar = ctk.CTkProgressBar(self.batch_frame, width=150)
+        self.batch_bar.pack(side="left", padx=5)
+        self.batch_cancel_btn = ctk.CTkButton(self.batch_frame, text="Cancel", width=70,
+                                            font=("Arial", 12),
+                                            command=self.cancel_batch)
+        self.batch_cancel_btn.pack(side="left", padx=5)
+        
         # Create main list frame
         list_frame = ctk.CTkFrame(self)
         list_frame.pack(fill="both", expand=True, padx=20, pady=5)
@@ -62,7 +221,8 @@ class InvoiceList(ctk.CTkFrame):
             ("Invoice Number", 200),
             ("Date", 150),
             ("Time", 150),
-            ("File Type", 100)
+            ("Customer", 200),
+            ("Total", 100)
         ]
         
         for col, width in columns:
@@ -73,8 +233,10 @@ class InvoiceList(ctk.CTkFrame):
         self.invoice_list = ctk.CTkScrollableFrame(list_frame)
         self.invoice_list.pack(fill="both", expand=True, padx=5, pady=5)
         
-        # Load invoices
-        self.load_invoices()
+        # Next page button
+        self.more_btn = ctk.CTkButton(list_frame, text="Load More",
+                                    font=("Arial", 12),
+                                    command=self.load_more)
         
     def update_button_states(self):
         """Update button states based on selection"""
@@ -88,58 +250,94 @@ class InvoiceList(ctk.CTkFrame):
         self.delete_btn.configure(state="normal" if has_selection else "disabled")
         
     def load_invoices(self):
+        """Reload the list from the first (newest) page."""
         # Clear existing items
         for widget in self.invoice_list.winfo_children():
             widget.destroy()
             
-        # Get list of files in invoices directory
-        invoice_dir = "invoices"
-        if not os.path.exists(invoice_dir):
-            os.makedirs(invoice_dir)
+        self.last_key = None
+        self.loaded = True
+        self.load_more()
+        
+    def load_more(self):
+        """Append the next page of invoices from the database."""
+        try:
+            invoices = self.db.list_invoices(before=self.last_key, limit=self.PAGE_SIZE)
+        except sqlite3.Error as e:
+            messagebox.showerror("Database Error", f"Failed to load invoices: {str(e)}")
+            return
+            
+        for invoice in invoices:
+            self.create_invoice_row(invoice)
+        if invoices:
+            self.last_key = (invoices[-1][2], invoices[-1][0])
             
-        # Get all invoices and sort by date (newest first)
-        invoices = []
-        for filename in os.listdir(invoice_dir):
-            if filename.startswith("invoice_"):
-                try:
-                    # Format: invoice_YYYYMMDD_HHMMSS.pdf
-                    date_str = filename.split('_')[1]
-                    time_str = filename.split('_')[2].split('.')[0]
-                    file_type = filename.split('.')[-1].upper()
-                    
-                    # Convert to datetime for sorting
-                    date_obj = datetime.strptime(f"{date_str}_{time_str}", "%Y%m%d_%H%M%S")
-                    
-                    # Format for display
-                    display_date = date_obj.strftime("%Y-%m-%d")
-                    display_time = date_obj.strftime("%H:%M:%S")
-                    
-                    invoices.append((date_obj, filename, display_date, display_time, file_type))
-                except (IndexError, ValueError):
-                    continue
-                    
-        # Sort invoices by date (newest first)
-        invoices.sort(reverse=True)
-        
-        # Create invoice rows
-        for _, filename, display_date, display_time, file_type in invoices:
-            self.create_invoice_row(filename, display_date, display_time, file_type)
+        # Only offer another page if this one was full
+        if len(invoices) == self.PAGE_SIZE:
+            self.more_btn.pack(pady=(0, 5))
+        else:
+            self.more_btn.pack_forget()
             
         # Update button states after loading
         self.update_button_states()
         
-    def create_invoice_row(self, filename, date, time, file_type):
+    def find_row(self, invoice_id):
+        for child in self.invoice_list.winfo_children():
+            if getattr(child, 'invoice_id', None) == invoice_id:
+                return child
+        return None
+        
+    def on_invoices_changed(self, change):
+        """Show new invoices at the top and pick up finished PDFs, without reloading."""
+        if not self.loaded:
+            return  # The first load picks everything up
+        if change.action == RELOAD:
+            self.load_invoices()
+            return
+        for invoice_id in change.ids:
+            row = self.find_row(invoice_id)
+            if change.action == DELETE:
+                if row is not None:
+                    row.destroy()
+                continue
+            invoice = self.db.get_invoice_summary(invoice_id)
+            if invoice is None:
+                continue
+            if row is not None:
+                row.pdf_path, row.pdf_error = invoice[5], invoice[6]
+            elif change.action == INSERT:
+                # Packing order, not creation order: the top row is the newest shown
+                rows = self.invoice_list.pack_slaves()
+                self.create_invoice_row(invoice, before=rows[0] if rows else None)
+        self.update_button_states()
+        
+    def create_invoice_row(self, invoice, before=None):
+        invoice_id, invoice_number, created_at, customer_name, total_amount, pdf_path, pdf_error = invoice
+        try:
+            date_obj = datetime.strptime(created_at, "%Y-%m-%d %H:%M:%S")
+            display_date = date_obj.strftime("%Y-%m-%d")
+            display_time = date_obj.strftime("%H:%M:%S")
+        except (TypeError, ValueError):
+            display_date, display_time = created_at or "", ""
+            
         # Create frame for invoice row
         row = ctk.CTkFrame(self.invoice_list)
-        row.pack(fill="x", pady=2)
-        row.filename = filename  # Store filename
+        if before is not None:
+            row.pack(fill="x", pady=2, before=before)
+        else:
+            row.pack(fill="x", pady=2)
+        row.invoice_id = invoice_id
+        row.pdf_path = pdf_path
+        row.pdf_error = pdf_error  # Why the last render failed, None while pending or done
         row.selected = False  # Track selection state
         
         # Add invoice details with specific widths
-        ctk.CTkLabel(row, text=filename, width=200).pack(side="left", padx=2)
-        ctk.CTkLabel(row, text=date, width=150).pack(side="left", padx=2)
-        ctk.CTkLabel(row, text=time, width=150).pack(side="left", padx=2)
-        ctk.CTkLabel(row, text=file_type, width=100).pack(side="left", padx=2)
+        ctk.CTkLabel(row, text=invoice_number or "", width=200).pack(side="left", padx=2)
+        ctk.CTkLabel(row, text=display_date, width=150).pack(side="left", padx=2)
+        ctk.CTkLabel(row, text=display_time, width=150).pack(side="left", padx=2)
+        ctk.CTkLabel(row, text=customer_name or "", width=200).pack(side="left", padx=2)
+        ctk.CTkLabel(row, text=f"₹{total_amount:.2f}" if total_amount is not None else "",
+                    width=100).pack(side="left", padx=2)
         
         # Add selection and double-click handling
         def on_click(event):
@@ -166,6 +364,88 @@ class InvoiceList(ctk.CTkFrame):
             widget.bind('<Button-1>', on_click)
             widget.bind('<Double-Button-1>', on_double_click)
             
+    def selected_row(self):
+        for child in self.invoice_list.winfo_children():
+            if getattr(child, 'selected', False):
+                return child
+        return None
+        
+    def show_regenerate_form(self):
+        if self.batch_job is not None:
+            return
+        row = self.selected_row()
+        RegenerateForm(self, self.db, row.invoice_id if row else None, self.start_batch)
+        
+    def start_batch(self, invoice_ids, output_dir):
+        """Render the invoices again on all cores without blocking the UI."""
+        # Paths are only recorded for the app's own folder; other folders are exports
+        same_folder = os.path.abspath(output_dir) == os.path.abspath("invoices")
+        self.batch_job = invoice_batch.BatchRender(
+            self.db.db_file, invoice_ids,
+            connect=self.db.create_connection if same_folder else None,
+            output_dir=output_dir
+        )
+        self.batch_label.configure(text=f"Starting {len(invoice_ids):,} PDFs...")
+        self.batch_bar.set(0)
+        self.batch_cancel_btn.configure(state="normal")
+        self.regenerate_btn.configure(state="disabled")
+        self.batch_frame.pack(side="right", padx=5)
+        self.batch_job.start()
+        self.after(100, self.poll_batch)
+        
+    def cancel_batch(self):
+        if self.batch_job is not None:
+            self.batch_job.cancel()
+            self.batch_cancel_btn.configure(state="disabled")
+            self.batch_label.configure(text="Cancelling...")
+            
+    def poll_batch(self):
+        """Show progress posted by the batch thread; finish up when it is done."""
+        job = self.batch_job
+        progress = None
+        try:
+            while True:
+                progress = job.progress.get_nowait()
+        except queue.Empty:
+            pass
+            
+        if progress is None or not progress.finished:
+            if progress is not None:
+                done = progress.rendered + progress.failed
+                self.batch_bar.set(done / progress.total)
+                text = f"{done:,} of {progress.total:,} PDFs"
+                if progress.eta is not None:
+                    minutes, seconds = divmod(int(progress.eta), 60)
+                    text += f" - about {minutes}:{seconds:02d} left"
+                if not job.cancel_event.is_set():
+                    self.batch_label.configure(text=text)
+            self.after(100, self.poll_batch)
+            return
+            
+        # Finished, cancelled or failed
+        self.batch_job = None
+        self.batch_frame.pack_forget()
+        self.regenerate_btn.configure(state="normal")
+        if job.connect is not None and progress.rendered:
+            self.changes.publish("invoices", RELOAD)
+            
+        if progress.error:
+            messagebox.showerror("Error",
+                f"Regeneration stopped: {progress.error}\n\n"
+                f"{progress.rendered:,} PDFs were written before the error."
+            )
+            return
+        title = "Regeneration Cancelled" if progress.cancelled else "Regeneration Complete"
+        rate = progress.rendered / progress.elapsed if progress.elapsed else 0
+        message = (f"{progress.rendered:,} of {progress.total:,} PDFs written to "
+                   f"{job.output_dir} in {progress.elapsed:.1f} seconds ({rate:.0f} per second).")
+        if job.errors:
+            invoice_id, error = job.errors[0]
+            message += f"\n\n{progress.failed:,} failed. First error (invoice {invoice_id}): {error}"
+            messagebox.showwarning(title, message)
+        else:
+            messagebox.showinfo(title, message)
+        
     def delete_invoice(self):
         selected_row = None
         for child in self.invoice_list.winfo_children():
@@ -180,14 +460,14 @@ class InvoiceList(ctk.CTkFrame):
             return
             
         if messagebox.askyesno("Confirm Delete", "Are you sure you want to delete this invoice?"):
-            filename = selected_row.filename
-            filepath = os.path.join("invoices", filename)
+            filepath = selected_row.pdf_path
             
             try:
-                os.remove(filepath)
-                selected_row.destroy()
+                self.db.delete_invoice(selected_row.invoice_id)
+                if filepath and os.path.exists(filepath):
+                    os.remove(filepath)
+                self.changes.publish("invoices", DELETE, [selected_row.invoice_id])
                 messagebox.showinfo("Success", "Invoice deleted successfully")
-                self.update_button_states()
             except Exception as e:
                 messagebox.showerror("Error", f"Failed to delete invoice: {str(e)}")
                 
@@ -205,8 +485,18 @@ class InvoiceList(ctk.CTkFrame):
                                  "then click 'Open Invoice' or press Enter.")
             return
             
-        filename = selected_row.filename
-        filepath = os.path.join("invoices", filename)
+        filepath = selected_row.pdf_path
+        if selected_row.pdf_error:
+            self.offer_regenerate(selected_row, "PDF Failed",
+                                  f"Creating the PDF for this invoice failed:\n{selected_row.pdf_error}")
+            return
+        if not filepath:
+            messagebox.showinfo("PDF Not Ready", "The PDF for this invoice is still being created.")
+            return
+        if not os.path.exists(filepath):
+            self.offer_regenerate(selected_row, "PDF Missing",
+                                  "The PDF file for this invoice is missing.")
+            return
         
         try:
             # Comprehensive method to open PDF
@@ -232,6 +522,18 @@ class InvoiceList(ctk.CTkFrame):
         except Exception as e:
             messagebox.showerror("Error", f"Failed to open invoice: {str(e)}")
             
+    def offer_regenerate(self, row, title, problem):
+        """Explain why the PDF can't be opened and offer to create it again."""
+        if self.render_pdf is None:
+            messagebox.showerror(title, problem)
+            return
+        if not messagebox.askyesno(title, problem + "\n\nCreate it again now?"):
+            return
+        if self.render_pdf([row.invoice_id]):
+            # Pending until the renderer reports back
+            row.pdf_path = row.pdf_error = None
+            
     def refresh(self):
-        """Refresh the invoice list"""
-        self.load_invoices()
+        """Load the invoice list the first time it is shown."""
+        if not self.loaded:
+            self.load_invoices()
@@ -0,0 +1,52 @@
+from datetime import datetime
+from urllib.parse import quote
+
+DEFAULT_PREFIX = "INV-"
+DEFAULT_FORMAT = "{prefix}{number:06d}"
+
+# Fields a series format can use, e.g. "{prefix}{year}/{number:05d}"
+FORMAT_FIELDS = ("prefix", "number", "year", "month", "day")
+
+
+def format_number(number_format: str, prefix: str, number: int, created_at: str) -> str:
+    """
+    Build an invoice number from a series format.
+
+    Args:
+        number_format: str.format template using FORMAT_FIELDS
+        prefix: The series prefix
+        number: Counter value allocated from the series
+        created_at: Invoice timestamp, "YYYY-MM-DD HH:MM:SS"
+
+    Raises:
+        ValueError: If the format is invalid or gives an empty number
+    """
+    created = datetime.strptime(created_at[:10], "%Y-%m-%d")
+    try:
+        text = number_format.format(prefix=prefix, number=number, year=created.year,
+                                    month=f"{created.month:02d}", day=f"{created.day:02d}")
+    except (KeyError, IndexError, ValueError, AttributeError) as e:
+        raise ValueError(f"Invalid number format {number_format!r}: {e}") from None
+    text = text.strip()
+    if not text:
+        raise ValueError("The number format gives an empty invoice number")
+    return text
+
+
+def check_format(number_format: str, prefix: str):
+    """Raise ValueError unless the format gives a distinct number per counter value."""
+    today = datetime.now().strftime("%Y-%m-%d")
+    if format_number(number_format, prefix, 1, today) == format_number(number_format, prefix, 2, today):
+        raise ValueError("The number format must include {number}")
+
+
+def file_stem(invoice_number: str) -> str:
+    """
+    File name (without extension) for an invoice number.
+
+    Letters, digits, '-' and '_' are kept; anything else, including '/',
+    '.', spaces and '%' itself, is percent-encoded. Distinct numbers always
+    give distinct names, so "INV/2024/7" is stored as "INV%2F2024%2F7".
+    """
+    # quote() never encodes '.' or '~'; a trailing '.' is dropped by Windows
+    return quote(invoice_number, safe="-_").replace(".", "%2E").replace("~", "%7E")
@@ -1,16 +1,131 @@
 import customtkinter as ctk
 from tkinter import messagebox
+from datetime import datetime
 import sqlite3
 from modern_combobox import ModernSearchableCombobox
-from invoice_printer import InvoicePrinter
+from pdf_renderer import PdfRenderer
+from invoice_lines import InvoiceLines
+from product_cache import ProductCache
+from change_bus import INSERT, UPDATE, DELETE, RELOAD
+from virtual_table import VirtualTable
+from invoice_numbers import DEFAULT_PREFIX, DEFAULT_FORMAT, FORMAT_FIELDS, format_number
+from invoice_batch import load_invoice
+
+class SeriesForm(ctk.CTkToplevel):
+    """Add or edit an invoice numbering series."""
+    
+    def __init__(self, parent, db, series, callback):
+        """
+        Args:
+            series: (id, name, prefix, number_format, next_number) to edit, or None for a new one
+            callback: Called with the series id after saving
+        """
+        super().__init__(parent)
+        self.db = db
+        self.series = series
+        self.callback = callback
+        
+        self.title("Edit Invoice Series" if series else "New Invoice Series")
+        self.geometry("500x400")
+        
+        # Make the window modal
+        self.transient(parent)
+        self.grab_set()
+        
+        self.setup_ui()
+        self.bind('<Return>', lambda e: self.save_series())
+        self.bind('<Escape>', lambda e: self.destroy())
+        
+    def setup_ui(self):
+        main_frame = ctk.CTkFrame(self)
+        main_frame.pack(fill="both", expand=True, padx=20, pady=20)
+        
+        ctk.CTkLabel(main_frame, text="Invoice Numbering",
+                    font=("Arial", 16, "bold")).pack(pady=(0, 20))
+        
+        _, name, prefix, number_format, next_number = self.series or (
+            None, "", DEFAULT_PREFIX, DEFAULT_FORMAT, 1
+        )
+        self.name = self.add_field(main_frame, "Name*:", name)
+        self.prefix = self.add_field(main_frame, "Prefix:", prefix)
+        self.number_format = self.add_field(main_frame, "Format*:", number_format)
+        self.next_number = self.add_field(main_frame, "Next Number*:", str(next_number))
+        
+        fields = ", ".join("{" + field + "}" for field in FORMAT_FIELDS)
+        ctk.CTkLabel(main_frame, text=f"Format fields: {fields}",
+                    font=("Arial", 11), text_color="gray").pack(anchor="w", pady=5)
+        self.preview = ctk.CTkLabel(main_frame, text="", font=("Arial", 12))
+        self.preview.pack(anchor="w")
+        for entry in (self.prefix, self.number_format, self.next_number):
+            entry.bind('<KeyRelease>', lambda e: self.update_preview())
+        self.update_preview()
+        
+        button_frame = ctk.CTkFrame(main_frame)
+        button_frame.pack(pady=20)
+        ctk.CTkButton(button_frame, text="Save (Enter)", font=("Arial", 12),
+                     command=self.save_series).pack(side="left", padx=10)
+        ctk.CTkButton(button_frame, text="Cancel (Esc)", font=("Arial", 12),
+                     command=self.destroy).pack(side="left", padx=10)
+        self.name.focus()
+        
+    def add_field(self, parent, label, value):
+        frame = ctk.CTkFrame(parent)
+        frame.pack(fill="x", pady=5)
+        ctk.CTkLabel(frame, text=label, width=110, anchor="w",
+                    font=("Arial", 12)).pack(side="left")
+        entry = ctk.CTkEntry(frame, width=300, font=("Arial", 12))
+        entry.pack(side="left", padx=5)
+        entry.insert(0, value)
+        return entry
+        
+    def update_preview(self):
+        """Show the next number this series would issue."""
+        try:
+            number = format_number(self.number_format.get(), self.prefix.get(),
+                                   int(self.next_number.get()),
+                                   datetime.now().strftime("%Y-%m-%d"))
+            self.preview.configure(text=f"Next invoice: {number}", text_color=("gray10", "gray90"))
+        except ValueError as e:
+            self.preview.configure(text=str(e), text_color="red")
+            
+    def save_series(self):
+        try:
+            series_id = self.db.save_series(
+                self.name.get(), self.prefix.get(), self.number_format.get(),
+                int(self.next_number.get()),
+                series_id=self.series[0] if self.series else None
+            )
+        except ValueError as e:
+            messagebox.showerror("Error", str(e))
+            return
+        except sqlite3.IntegrityError:
+            messagebox.showerror("Error", "Another series already has this name.")
+            return
+        except sqlite3.Error as e:
+            messagebox.showerror("Database Error", f"Failed to save series: {str(e)}")
+            return
+        self.callback(series_id)
+        self.destroy()
 
 class InvoicePage(ctk.CTkFrame):
-    def __init__(self, parent, db_conn):
+    QUANTITY_COLUMN = 1  # Editable columns of the line grid
+    PRICE_COLUMN = 2
+    
+    def __init__(self, parent, db, changes):
         super().__init__(parent)
-        self.db_conn = db_conn
+        self.db = db
+        self.db_conn = db.conn
+        self.read_conn = db.read_conn
+        self.changes = changes
         
         # Variables
-        self.items = []
+        self.lines = InvoiceLines()  # Invoice lines; the grid only displays them
+        self.products = ProductCache()  # Typed copy of the products table
+        self.customer_labels = {}  # Customer id -> picker label
+        self.series = {}  # Series name -> (id, name, prefix, number_format, next_number)
+        self.pdf_renderer = PdfRenderer(self, self.on_pdf_ready)
+        self.pdf_renderer.warm_up()
+        self.resumed = set()  # Invoices re-queued at startup; their failures are not shown one by one
         self.total_amount = ctk.StringVar(value="0.00")
         self.selected_customer = None
         self.price_type = ctk.StringVar(value="retail")  # Default to retail price
@@ -18,6 +133,12 @@ class InvoicePage(ctk.CTkFrame):
         self.setup_ui()
         self.setup_bindings()
         
+        # Apply product and customer edits as they happen instead of reloading
+        changes.subscribe("products", self.on_products_changed)
+        changes.subscribe("customers", self.on_customers_changed)
+        
+        self.resume_pdfs()
+        
     def setup_bindings(self):
         # Keyboard shortcuts - bind to frame instead of globally
         self.bind('<Control-s>', lambda e: self.generate_invoice())
@@ -26,14 +147,15 @@ class InvoicePage(ctk.CTkFrame):
         
         # Navigation bindings
         self.customer_cb.bind('<Return>', lambda e: self.on_customer_selected())
+        self.scan_entry.bind('<Return>', lambda e: (self.scan_item(), 'break'))
         self.product_cb.bind('<Return>', lambda e: self.quantity.focus())
         
         # Fix: Bind Return key to add_item for quantity field and ensure it works
         self.quantity.bind('<Return>', lambda e: (self.add_item(), 'break'))
         
-        # Tree bindings
-        self.tree.bind('<Delete>', lambda e: self.remove_item())
-        self.tree.bind('<Return>', lambda e: self.focus_product_entry())
+        # Line grid bindings
+        self.line_grid.bind('<Delete>', lambda e: self.remove_item())
+        self.line_grid.bind('<Return>', lambda e: self.focus_product_entry())
         
         # Add button binding
         self.add_btn.bind('<Return>', lambda e: self.add_item())
@@ -97,30 +219,33 @@ class InvoicePage(ctk.CTkFrame):
         table_frame = ctk.CTkFrame(main_container)
         table_frame.pack(fill="both", expand=True)
         
-        # Items table (using ttk.Treeview as CTk doesn't have a direct equivalent)
-        columns = ('Product', 'Quantity', 'Unit Price', 'Price Type', 'Total')
-        self.tree = ctk.CTkScrollableFrame(table_frame)
-        self.tree.pack(fill="both", expand=True, padx=5, pady=5)
-        
-        # Create headers with modified widths
-        header_frame = ctk.CTkFrame(self.tree)
-        header_frame.pack(fill="x", pady=(0, 5))
-        
-        widths = {
-            'Product': 300, 
-            'Quantity': 100, 
-            'Unit Price': 100,
-            'Price Type': 100, 
-            'Total': 100
-        }
-        
-        for col in columns:
-            ctk.CTkLabel(
-                header_frame, 
-                text=col, 
-                font=("Arial", 12, "bold"),
-                width=widths[col]
-            ).pack(side="left", padx=2)
+        # Virtualized line grid: widgets only for the visible lines,
+        # quantity and unit price are edited in place
+        columns = [
+            ('Product', 300),
+            ('Quantity', 100),
+            ('Unit Price', 100),
+            ('Price Type', 100),
+            ('Total', 100)
+        ]
+        self.line_grid = VirtualTable(
+            table_frame, columns, self.format_line,
+            editable=(self.QUANTITY_COLUMN, self.PRICE_COLUMN),
+            on_edit=self.on_line_edited,
+            action=("×", self.remove_line_at)
+        )
+        self.line_grid.pack(fill="both", expand=True, padx=5, pady=5)
+        self.line_grid.set_source(self.lines)
+        
+        # Barcode scanners type the code and press Enter
+        scan_frame = ctk.CTkFrame(main_container)
+        scan_frame.pack(fill="x", pady=(10, 0))
+        ctk.CTkLabel(scan_frame, text="Scan SKU/Barcode:", 
+                    font=("Arial", 12)).pack(side="left", padx=5)
+        self.scan_entry = ctk.CTkEntry(scan_frame, width=200, font=("Arial", 12))
+        self.scan_entry.pack(side="left", padx=5)
+        self.scan_status = ctk.CTkLabel(scan_frame, text="", font=("Arial", 12))
+        self.scan_status.pack(side="left", padx=10)
         
         # Create input frame at the bottom
         input_frame = ctk.CTkFrame(main_container)
@@ -162,77 +287,34 @@ class InvoicePage(ctk.CTkFrame):
         
         self.load_products()
 
-    def create_item_row(self, item_data):
-        """Create a new row in the items table with editing capability."""
-        frame = ctk.CTkFrame(self.tree)
-        frame.pack(fill="x", pady=2)
-        frame.item_data = item_data
-
-        # Product name (non-editable)
-        product_label = ctk.CTkLabel(
-            frame, 
-            text=item_data[0],
-            width=300,
-            anchor="w"
-        )
-        product_label.pack(side="left", padx=2)
-
-        # Quantity (editable)
-        quantity_entry = ctk.CTkEntry(frame, width=100)
-        quantity_entry.insert(0, str(item_data[1]))
-        quantity_entry.pack(side="left", padx=2)
-        
-        # Unit Price (editable)
-        price_entry = ctk.CTkEntry(frame, width=100)
-        price_entry.insert(0, str(item_data[4]))
-        price_entry.pack(side="left", padx=2)
-
-        # Price Type (non-editable)
-        price_type_label = ctk.CTkLabel(
-            frame, 
-            text=item_data[3],
-            width=100
-        )
-        price_type_label.pack(side="left", padx=2)
-
-        # Total (auto-calculated)
-        total_label = ctk.CTkLabel(
-            frame, 
-            text=f"₹{item_data[5]:.2f}",
-            width=100
-        )
-        total_label.pack(side="left", padx=2)
-
-        # Delete button
-        delete_btn = ctk.CTkButton(
-            frame,
-            text="×",
-            width=30,
-            height=24,
-            command=lambda: self.remove_item(frame)
+    def format_line(self, line):
+        """Display strings for one invoice line of the grid."""
+        return (
+            line.name,
+            f"{line.quantity:.12g}",
+            f"{line.price:.12g}",
+            line.price_type,
+            f"₹{line.total:.2f}",
         )
-        delete_btn.pack(side="left", padx=(5, 0))
-
-        # Update total when quantity or price changes
-        def update_total(*args):
-            try:
-                qty = float(quantity_entry.get())
-                price = float(price_entry.get())
-                new_total = qty * price
-                total_label.configure(text=f"₹{new_total:.2f}")
-                frame.item_data = (
-                    item_data[0], qty, item_data[2],
-                    item_data[3], price, new_total
-                )
-                self.update_total_amount()
-            except ValueError:
-                pass
-
-        # Bind entry changes
-        quantity_entry.bind('<KeyRelease>', update_total)
-        price_entry.bind('<KeyRelease>', update_total)
         
-        return frame
+    def on_line_edited(self, index, column, text):
+        """Apply a quantity or price edit to the line model, keystroke by keystroke."""
+        try:
+            value = float(text)
+        except ValueError:
+            return  # Incomplete input; the cell is reset when it loses focus
+        line = self.lines[index]
+        if column == self.QUANTITY_COLUMN:
+            self.lines.update(line.key, quantity=value)
+        else:
+            self.lines.update(line.key, price=value)
+        self.line_grid.render()
+        self.update_total_amount()
+        
+    def show_line(self, key):
+        """Redraw the grid and bring the line with this key into view."""
+        self.line_grid.refresh()
+        self.line_grid.see(self.lines.index(key))
 
     def create_summary_frame(self):
         frame = ctk.CTkFrame(self)
@@ -247,10 +329,25 @@ class InvoicePage(ctk.CTkFrame):
         ctk.CTkLabel(total_frame, textvariable=self.total_amount, 
                     font=("Arial", 14, "bold")).pack(side="left")
         
+        # Progress of the last generated invoice's PDF
+        self.invoice_status = ctk.CTkLabel(frame, text="", font=("Arial", 12))
+        self.invoice_status.pack(side="left", padx=10)
+        
         # Buttons
         button_frame = ctk.CTkFrame(frame)
         button_frame.pack(side="right", padx=10)
         
+        # Numbering series the next invoice is taken from
+        ctk.CTkLabel(button_frame, text="Series:", font=("Arial", 12)).pack(side="left", padx=5)
+        self.series_menu = ctk.CTkOptionMenu(button_frame, width=140, font=("Arial", 12),
+                                           values=[""])
+        self.series_menu.pack(side="left", padx=5)
+        ctk.CTkButton(button_frame, text="Edit", width=60, font=("Arial", 12),
+                     command=lambda: self.show_series_form(edit=True)).pack(side="left", padx=2)
+        ctk.CTkButton(button_frame, text="New", width=60, font=("Arial", 12),
+                     command=lambda: self.show_series_form(edit=False)).pack(side="left", padx=(2, 10))
+        self.load_series()
+        
         self.generate_btn = ctk.CTkButton(button_frame, 
                                         text="Generate Invoice (Ctrl+S)",
                                         font=("Arial", 12),
@@ -263,6 +360,28 @@ class InvoicePage(ctk.CTkFrame):
                                      command=self.clear_all)
         self.clear_btn.pack(side="left", padx=5)
         
+    def load_series(self, select=None):
+        """Fill the series menu, keeping the current choice unless `select` (an id) is given."""
+        try:
+            rows = self.db.list_series()
+        except sqlite3.Error as e:
+            messagebox.showerror("Database Error", f"Failed to load invoice series: {str(e)}")
+            return
+        current = self.series_menu.get()
+        self.series = {row[1]: row for row in rows}
+        self.series_menu.configure(values=list(self.series) or [""])
+        for row in rows:
+            if row[0] == select:
+                current = row[1]
+        if current not in self.series:
+            current = rows[0][1] if rows else ""
+        self.series_menu.set(current)
+        
+    def show_series_form(self, edit):
+        self.load_series()  # Pick up numbers issued since the menu was filled
+        series = self.series.get(self.series_menu.get()) if edit else None
+        SeriesForm(self, self.db, series, lambda series_id: self.load_series(select=series_id))
+        
     def validate_quantity(self, value):
         if value == "":
             return True
@@ -272,37 +391,72 @@ class InvoicePage(ctk.CTkFrame):
         except ValueError:
             return False
             
-    def remove_item(self, item_frame):
-        """Remove an item from the invoice."""
-        item_frame.destroy()
+    def remove_item(self):
+        """Remove the selected line from the invoice."""
+        if self.line_grid.selected_index >= 0:
+            self.remove_line_at(self.line_grid.selected_index)
+            
+    def remove_line_at(self, index):
+        if not 0 <= index < len(self.lines):
+            return
+        self.lines.remove(self.lines[index].key)
+        self.line_grid.refresh()
         self.update_total_amount()
             
     def load_customers(self):
-        cursor = self.db_conn.cursor()
-        cursor.execute('SELECT * FROM customers')
+        cursor = self.read_conn.cursor()
+        cursor.execute('SELECT * FROM customers ORDER BY name COLLATE NOCASE')
         customers = cursor.fetchall()
-        values = [f"{c[0]} - {c[1]}" for c in customers]
-        self.customer_cb.set_values(values)
+        self.customer_labels = {c[0]: self.format_customer(c) for c in customers}
+        self.customer_cb.set_values(list(self.customer_labels.values()))
+        
+    def format_customer(self, customer):
+        return f"{customer[0]} - {customer[1]}"
+        
+    def on_customers_changed(self, change):
+        """Update the customer picker for just the changed customers."""
+        if change.action == RELOAD:
+            self.load_customers()
+            return
+        for customer_id in change.ids:
+            label = self.customer_labels.pop(customer_id, None)
+            if label is not None:
+                self.customer_cb.remove_value(label)
+        if change.action == DELETE:
+            return
+        placeholders = ', '.join('?' * len(change.ids))
+        rows = self.read_conn.execute(
+            f'SELECT * FROM customers WHERE id IN ({placeholders})', change.ids
+        ).fetchall()
+        for customer in rows:
+            label = self.format_customer(customer)
+            self.customer_labels[customer[0]] = label
+            self.customer_cb.add_value(label)
         
     def load_products(self):
         try:
-            cursor = self.db_conn.cursor()
-            cursor.execute('SELECT id, name, wholesale_price, retail_price, base_unit FROM products')
-            products = cursor.fetchall()
-            if products:
-                values = []
-                for p in products:
-                    try:
-                        wholesale = float(p[2]) if p[2] is not None else 0.0
-                        retail = float(p[3]) if p[3] is not None else 0.0
-                        base_unit = p[4] if p[4] is not None else "Unit"
-                        values.append(f"{p[0]} - {p[1]} (W:₹{wholesale:.2f}, R:₹{retail:.2f})")
-                    except (ValueError, TypeError):
-                        continue
-                self.product_cb.set_values(values)
+            # One query fills the typed cache; the picker and add_item work from it
+            self.products.load(self.read_conn)
         except sqlite3.OperationalError as e:
             messagebox.showerror("Database Error", f"Failed to load products: {str(e)}")
-            self.product_cb.set_values([])
+        self.product_cb.set_values([r.label() for r in self.products.sorted_by_name()])
+        
+    def on_products_changed(self, change):
+        """Apply changed products to the cache and the picker, nothing else."""
+        if change.action == RELOAD:
+            self.load_products()
+            return
+        for product_id in change.ids:
+            old = self.products.remove(product_id)
+            if old is not None:
+                self.product_cb.remove_value(old.label())
+        if change.action == DELETE:
+            return
+        self.products.reload(self.read_conn, change.ids)
+        for product_id in change.ids:
+            record = self.products.get(product_id)
+            if record is not None:
+                self.product_cb.add_value(record.label())
             
     def on_customer_selected(self, event=None):
         if not self.customer_cb.get():
@@ -312,7 +466,7 @@ class InvoicePage(ctk.CTkFrame):
             
         try:
             customer_id = int(self.customer_cb.get().split(' - ')[0])
-            cursor = self.db_conn.cursor()
+            cursor = self.read_conn.cursor()
             cursor.execute('SELECT * FROM customers WHERE id = ?', (customer_id,))
             customer = cursor.fetchone()
             
@@ -330,6 +484,37 @@ class InvoicePage(ctk.CTkFrame):
             self.customer_details.configure(text="")
             messagebox.showerror("Error", "Invalid customer selection format")
         
+    def scan_item(self):
+        """Add the scanned product, or add one more to its existing line."""
+        code = self.scan_entry.get().strip()
+        self.scan_entry.delete(0, "end")
+        if not code:
+            return
+            
+        product = self.products.find_code(code)
+        if product is None:
+            self.bell()
+            self.scan_status.configure(text=f"Unknown code: {code}", text_color="red")
+            return
+            
+        price_type = self.price_type.get()
+        price = product.price(price_type)
+        if price <= 0:
+            self.bell()
+            self.scan_status.configure(
+                text=f"No {price_type.lower()} price for {product.name}", text_color="red"
+            )
+            return
+            
+        key = (product.id, price_type)
+        if key in self.lines:
+            line = self.lines.increment(key)
+        else:
+            line = self.lines.add(product.id, product.name, product.base_unit, price_type, 1, price)
+        self.show_line(key)
+        self.update_total_amount()
+        self.scan_status.configure(text=f"{line.name} × {line.quantity:.12g}", text_color=("gray10", "gray90"))
+        
     def add_item(self):
         """Modified add_item method to use the new row creation."""
         # Validate inputs as before
@@ -352,44 +537,34 @@ class InvoicePage(ctk.CTkFrame):
                 self.quantity.focus()
                 return
 
-            cursor = self.db_conn.cursor()
-            cursor.execute(
-                'SELECT id, name, wholesale_price, retail_price, base_unit FROM products WHERE id = ?', 
-                (product_id,)
-            )
-            product = cursor.fetchone()
+            product = self.products.get(product_id)
+            if product is None:
+                messagebox.showerror("Error", "Selected product not found")
+                self.product_cb.focus()
+                return
 
-            if product:
-                # Get price based on type
-                if price_type.lower() == "wholesale":
-                    price = float(product[2]) if product[2] is not None else 0.0
-                else:
-                    price = float(product[3]) if product[3] is not None else 0.0
+            # Get price based on type
+            price = product.price(price_type)
 
-                if price <= 0:
-                    messagebox.showerror("Error", f"Invalid {price_type.lower()} price for the selected product")
-                    return
+            if price <= 0:
+                messagebox.showerror("Error", f"Invalid {price_type.lower()} price for the selected product")
+                return
 
-                # Check for duplicate
-                for widget in self.tree.winfo_children():
-                    if (hasattr(widget, 'item_data') and 
-                        widget.item_data[0] == product[1] and 
-                        widget.item_data[3] == price_type):
-                        messagebox.showerror("Error", "Product already added with the same price type")
-                        return
+            # Check for duplicate
+            if (product.id, price_type) in self.lines:
+                messagebox.showerror("Error", "Product already added with the same price type")
+                return
 
-                # Create new row
-                item_data = (
-                    product[1], quantity, product[4],
-                    price_type, price, quantity * price
-                )
-                self.create_item_row(item_data)
-                self.update_total_amount()
+            # Create new row
+            line = self.lines.add(product.id, product.name, product.base_unit,
+                                  price_type, quantity, price)
+            self.show_line(line.key)
+            self.update_total_amount()
 
-                # Clear inputs
-                self.quantity.delete(0, "end")
-                self.product_cb.set('')
-                self.product_cb.focus()
+            # Clear inputs
+            self.quantity.delete(0, "end")
+            self.product_cb.set('')
+            self.product_cb.focus()
 
         except ValueError as e:
             messagebox.showerror("Error", "Please enter a valid quantity")
@@ -398,25 +573,16 @@ class InvoicePage(ctk.CTkFrame):
             messagebox.showerror("Error", f"An error occurred: {str(e)}")
         
     def update_total_amount(self):
-        """Update the total amount based on all items."""
-        total = 0
-        for widget in self.tree.winfo_children():
-            if hasattr(widget, 'item_data'):
-                total += widget.item_data[5]
-        self.total_amount.set(f"{total:.2f}")
+        """Show the running total kept by the line model."""
+        self.total_amount.set(f"{self.lines.total:.2f}")
 
     def get_all_items(self):
-        """Get all items from the tree for invoice generation."""
-        items = []
-        # Skip the header frame (first child)
-        for widget in list(self.tree.winfo_children())[1:]:
-            if hasattr(widget, 'item_data'):
-                items.append(widget.item_data)
-        return items
+        """Get all items as tuples for invoice generation."""
+        return self.lines.items()
 
     def generate_invoice(self):
-        """Generate invoice PDF with current items."""
-        # Get all items from the tree
+        """Save the invoice and queue its PDF; returns True once it is saved."""
+        # Get all items from the line model
         items = self.get_all_items()
         
         if not items:
@@ -424,24 +590,98 @@ class InvoicePage(ctk.CTkFrame):
             self.product_cb.focus()
             return False
             
+        total_amount = float(self.total_amount.get())
+        customer_id = self.selected_customer[0] if self.selected_customer else None
+        
         try:
-            printer = InvoicePrinter()
-            pdf_file = printer.generate_pdf(
-                self.selected_customer,
-                items,  # Use items from tree instead of self.items
-                float(self.total_amount.get())
-            )
-            
-            messagebox.showinfo(
-                "Success",
-                f"Invoice generated successfully!\nSaved as: {pdf_file}"
+            # Commit the invoice first so it is never lost to a PDF failure
+            series = self.series.get(self.series_menu.get())
+            invoice_id, invoice_number, created_at = self.db.save_invoice(
+                customer_id, items, total_amount, series_id=series[0] if series else None
             )
-            self.clear_all()
-            return True
-            
-        except Exception as e:
-            messagebox.showerror("Error", f"Failed to generate invoice: {str(e)}")
+        except (sqlite3.Error, ValueError) as e:
+            messagebox.showerror("Database Error", f"Failed to save invoice: {str(e)}")
             return False
+        self.changes.publish("invoices", INSERT, [invoice_id])
+            
+        # Render in the background; the next invoice can be started right away
+        self.pdf_renderer.submit(invoice_id, invoice_number, self.selected_customer,
+                                 items, total_amount, created_at=created_at)
+        self.invoice_status.configure(
+            text=f"Invoice {invoice_number} saved, creating PDF...",
+            text_color=("gray10", "gray90")
+        )
+        self.clear_all()
+        return True
+        
+    def resume_pdfs(self):
+        """Render the PDFs the last session saved invoices for but never wrote."""
+        try:
+            invoice_ids = self.db.invoices_without_pdf()
+        except sqlite3.Error as e:
+            messagebox.showerror("Database Error", f"Failed to look up pending PDFs: {str(e)}")
+            return
+        if not invoice_ids:
+            return
+        self.resumed.update(invoice_ids)
+        self.render_stored(invoice_ids)
+        self.invoice_status.configure(
+            text=f"Creating {len(invoice_ids)} PDF(s) left over from the last session...",
+            text_color=("gray10", "gray90")
+        )
+        
+    def render_stored(self, invoice_ids):
+        """
+        Queue the PDFs of invoices already in the database.
+
+        Returns:
+            True if every invoice was queued
+        """
+        for invoice_id in invoice_ids:
+            try:
+                invoice_number, created_at, customer, items, total_amount = load_invoice(
+                    self.read_conn, invoice_id)
+            except (sqlite3.Error, LookupError) as e:
+                messagebox.showerror("Error", f"Failed to load invoice {invoice_id}: {str(e)}")
+                return False
+            if not items:
+                # Registered from an old PDF; that file is the only copy
+                messagebox.showerror(
+                    "Error",
+                    f"Invoice {invoice_number} has no stored lines, so its PDF cannot be created again."
+                )
+                return False
+            self.pdf_renderer.submit(invoice_id, invoice_number, customer, items,
+                                     total_amount, created_at=created_at)
+        return True
+        
+    def on_pdf_ready(self, invoice_id, invoice_number, pdf_path, error):
+        """Record a finished PDF; called on the Tk thread by the renderer."""
+        resumed = invoice_id in self.resumed
+        self.resumed.discard(invoice_id)
+        try:
+            if error:
+                self.db.set_invoice_pdf_error(invoice_id, error)
+            else:
+                self.db.set_invoice_pdf(invoice_id, pdf_path)
+        except sqlite3.Error as e:
+            messagebox.showerror("Database Error", f"Failed to record the PDF for {invoice_number}: {str(e)}")
+            return
+        self.changes.publish("invoices", UPDATE, [invoice_id])
+        if error:
+            self.invoice_status.configure(text=f"PDF for {invoice_number} failed", text_color="red")
+            if not resumed:
+                messagebox.showerror(
+                    "Error",
+                    f"Invoice {invoice_number} was saved but the PDF failed: {error}"
+                )
+            return
+        self.invoice_status.configure(text=f"Invoice {invoice_number} ready: {pdf_path}",
+                                      text_color=("gray10", "gray90"))
+        
+    def close(self):
+        """Wait for PDFs still being rendered and record them."""
+        self.pdf_renderer.close()
 
     def clear_all(self):
         self.customer_cb.set('')
@@ -449,14 +689,12 @@ class InvoicePage(ctk.CTkFrame):
         self.selected_customer = None
         self.product_cb.set('')
         self.quantity.delete(0, "end")
+        self.scan_entry.delete(0, "end")
+        self.scan_status.configure(text="")
         self.price_type.set("Retail")
         
-        # Clear items from scrollable frame
-        for widget in self.tree.winfo_children():
-            if isinstance(widget, ctk.CTkFrame) and widget != self.tree.winfo_children()[0]:
-                widget.destroy()
-                
-        self.items.clear()
+        self.lines.clear()
+        self.line_grid.set_source(self.lines)
         self.total_amount.set("0.00")
         self.customer_cb.focus()
         
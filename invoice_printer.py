@@ -1,15 +1,95 @@
 from datetime import datetime
+import io
 import os
+import threading
 from reportlab.lib import colors
-from reportlab.lib.pagesizes import letter
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle
+from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle, PageBreak
 from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.lib.units import inch
+import invoice_canvas
+from invoice_numbers import file_stem
+from invoice_layout import PAGE_SIZE, MARGINS, COLUMN_WIDTHS, TABLE_HEADER
+
+def table_style(summary_rows=1):
+    """Items table style; the last `summary_rows` rows are subtotal/total rows."""
+    first = -summary_rows  # First summary row
+    return TableStyle([
+        ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
+        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+        ('FONTSIZE', (0, 0), (-1, 0), 14),
+        ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+        ('BACKGROUND', (0, 1), (-1, first - 1), colors.white),
+        ('TEXTCOLOR', (0, 1), (-1, -1), colors.black),
+        ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),
+        ('FONTSIZE', (0, 1), (-1, -1), 12),
+        ('ALIGN', (-2, first), (-1, -1), 'RIGHT'),
+        ('TEXTCOLOR', (-2, first), (-1, -1), colors.black),
+        ('FONTNAME', (-2, first), (-1, -1), 'Helvetica-Bold'),
+        ('GRID', (0, 0), (-1, first - 1), 1, colors.black),
+        ('LINEBELOW', (-2, first), (-1, -1), 1, colors.black),
+        ('TOPPADDING', (0, 1), (-1, -1), 12),
+        ('BOTTOMPADDING', (0, first), (-1, -1), 12),
+    ])
+
+TABLE_STYLE = table_style(1)          # Items then the total, or a page's subtotal
+LAST_PAGE_STYLE = table_style(2)      # Last page of a long invoice: subtotal and total
+
+# Fixed table row heights; string cells never wrap, so every item row is the same
+HEADER_HEIGHT = invoice_canvas.row_height(invoice_canvas.HEADER_ROW)
+ROW_HEIGHT = invoice_canvas.row_height(invoice_canvas.ITEM_ROW)
+SUMMARY_HEIGHT = invoice_canvas.row_height(invoice_canvas.TOTAL_ROW)
+
+
+def page_chunks(count, first_page, page):
+    """
+    Split `count` item rows into (start, end) ranges, one per page, given
+    the height left for the table on the first page (room for at least one
+    item and a summary row) and on later pages.
+
+    One range is returned when the whole table fits on the first page.
+    Otherwise every page repeats the header and ends with a subtotal row,
+    the last page also has the total row, and every page gets at least one
+    item so the total never sits on a page of its own.
+    """
+    if HEADER_HEIGHT + count * ROW_HEIGHT + SUMMARY_HEIGHT <= first_page:
+        return [(0, count)]
+    chunks = []
+    start = 0
+    available = first_page
+    while True:
+        remaining = count - start
+        if HEADER_HEIGHT + remaining * ROW_HEIGHT + 2 * SUMMARY_HEIGHT <= available:
+            chunks.append((start, count))
+            return chunks
+        rows = int((available - HEADER_HEIGHT - SUMMARY_HEIGHT) // ROW_HEIGHT)
+        rows = min(rows, remaining - 1)
+        chunks.append((start, start + rows))
+        start += rows
+        available = page
+
+# Used by warm_up() to exercise every part of the layout once
+SAMPLE_CUSTOMER = (0, "Sample Customer", "Sample Address", "0000000000", "sample@example.com")
+SAMPLE_ITEMS = [("Sample Product", 1.0, "pcs", "Retail", 1.0, 1.0, 0)]
 
 class InvoicePrinter:
+    """
+    Builds invoice PDFs.
+
+    Meant to be kept for the life of the app: the style sheet, table style
+    and the parts of the page that never change are built once in
+    __init__, and only the invoice's own details are laid out per call.
+    
+    Invoices that fit on one page are drawn directly on a canvas with a
+    fixed layout (see invoice_canvas); longer ones go through platypus,
+    with the items split into one table per page so that even very long
+    invoices take time and memory in proportion to their lines.
+    """
+    
     def __init__(self):
         self.styles = getSampleStyleSheet()
         self.create_custom_styles()
+        self.create_static_parts()
         
     def create_custom_styles(self):
         # Header style - reduced size
@@ -38,39 +118,68 @@ class InvoicePrinter:
             leftIndent=20
         ))
         
-    def generate_pdf(self, customer, items, total_amount):
-        if not os.path.exists("invoices"):
-            os.makedirs("invoices")
+    def create_static_parts(self):
+        # Flowables that are the same on every invoice; reportlab wraps them
+        # afresh on each build, so they can be shared between documents
+        self.title = Paragraph("INVOICE", self.styles['CustomTitle'])
+        self.customer_heading = Paragraph("Customer Information:", self.styles['Heading2'])
+        self.items_heading = Paragraph("Items:", self.styles['Heading2'])
+        self.footer = Paragraph("Thank you for your business!", self.styles['CustomBody'])
+        
+    def warm_up(self):
+        """Render a throwaway invoice in memory so the first real one is not
+        slowed by reportlab's one-time font and module setup."""
+        self.build(io.BytesIO(), SAMPLE_CUSTOMER, SAMPLE_ITEMS, 1.0, "WARMUP", "")
+        invoice_canvas.draw_invoice(io.BytesIO(), SAMPLE_CUSTOMER, SAMPLE_ITEMS, 1.0, "WARMUP", "")
+        
+    def generate_pdf(self, customer, items, total_amount, invoice_number=None, created_at=None,
+                     output_dir="invoices"):
+        if not os.path.exists(output_dir):
+            os.makedirs(output_dir, exist_ok=True)
             
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        filename = f"invoices/invoice_{timestamp}.pdf"
-        
-        doc = SimpleDocTemplate(
-            filename,
-            pagesize=letter,
-            rightMargin=72,
-            leftMargin=72,
-            topMargin=72,
-            bottomMargin=72
-        )
+        if invoice_number:
+            # Unique per invoice, even when several are rendered in the same second
+            filename = f"{output_dir}/{file_stem(invoice_number)}.pdf"
+        else:
+            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+            filename = f"{output_dir}/invoice_{timestamp}.pdf"
         
-        # Build the document content
-        story = []
+        # Date is when the invoice was saved, not when it was rendered
+        created_at = created_at or datetime.now().strftime('%Y-%m-%d %H:%M:%S')
         
-        # Add Invoice Title
-        story.append(Paragraph("INVOICE", self.styles['CustomTitle']))
-        story.append(Spacer(1, 10))  # Reduced spacing
+        # Write next to the target and rename it into place, so a reader or a
+        # crash never leaves a half-written PDF under the invoice's name
+        temp_file = f"{filename}.{os.getpid()}-{threading.get_ident()}.tmp"
+        try:
+            if invoice_canvas.fits_one_page(customer, items, invoice_number, created_at):
+                invoice_canvas.draw_invoice(temp_file, customer, items, total_amount,
+                                            invoice_number, created_at)
+            else:
+                self.build(temp_file, customer, items, total_amount, invoice_number, created_at)
+            os.replace(temp_file, filename)
+        except BaseException:
+            if os.path.exists(temp_file):
+                os.remove(temp_file)
+            raise
+        return filename
         
-        # Add Date
-        story.append(Paragraph(
-            f"Date: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}",
-            self.styles['CustomBody']
-        ))
+    def build(self, target, customer, items, total_amount, invoice_number, created_at):
+        """Lay out one invoice into `target`, a file name or a binary file."""
+        doc = SimpleDocTemplate(target, pagesize=PAGE_SIZE, **MARGINS)
+        
+        # Build the document content
+        story = [self.title, Spacer(1, 10)]
+        
+        # Add Invoice Number
+        if invoice_number:
+            story.append(Paragraph(f"Invoice No: {invoice_number}", self.styles['CustomBody']))
+            
+        story.append(Paragraph(f"Date: {created_at}", self.styles['CustomBody']))
         story.append(Spacer(1, 20))
         
         # Add Customer Information if available
         if customer:
-            story.append(Paragraph("Customer Information:", self.styles['Heading2']))
+            story.append(self.customer_heading)
             story.append(Paragraph(f"Name: {customer[1]}", self.styles['CustomerInfo']))
             story.append(Paragraph(f"Address: {customer[2] or 'N/A'}", self.styles['CustomerInfo']))
             story.append(Paragraph(f"Phone: {customer[3] or 'N/A'}", self.styles['CustomerInfo']))
@@ -79,52 +188,58 @@ class InvoicePrinter:
             story.append(Spacer(1, 20))
         
         # Add Items Table
-        story.append(Paragraph("Items:", self.styles['Heading2']))
-        
-        # Create the items table - removed Price Type column
-        table_data = [['Product', 'Quantity', 'Unit', 'Total']]  # Header row
-        for item in items:
-            # item format: (name, quantity, base_unit, price_type, price, total)
-            table_data.append([
-                item[0],  # Product name
-                str(item[1]),  # Quantity
-                item[2],  # Base unit
-                f"{item[5]:.2f}"  # Total without currency symbol
-            ])
-            
-        # Add total row
-        table_data.append(['', '', 'Total:', f"{total_amount:.2f}"])
-        
-        # Create table style
-        table_style = TableStyle([
-            ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
-            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, 0), 14),
-            ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-            ('BACKGROUND', (0, 1), (-1, -2), colors.white),
-            ('TEXTCOLOR', (0, 1), (-1, -1), colors.black),
-            ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),
-            ('FONTSIZE', (0, 1), (-1, -1), 12),
-            ('ALIGN', (-2, -1), (-1, -1), 'RIGHT'),
-            ('TEXTCOLOR', (-2, -1), (-1, -1), colors.black),
-            ('FONTNAME', (-2, -1), (-1, -1), 'Helvetica-Bold'),
-            ('GRID', (0, 0), (-1, -2), 1, colors.black),
-            ('LINEBELOW', (-2, -1), (-1, -1), 1, colors.black),
-            ('TOPPADDING', (0, 1), (-1, -1), 12),
-            ('BOTTOMPADDING', (0, -1), (-1, -1), 12),
-        ])
-        
-        # Create the table and apply the style - adjusted column widths for 4 columns
-        table = Table(table_data, colWidths=[3*inch, 1.25*inch, 1*inch, 1.25*inch])
-        table.setStyle(table_style)
-        story.append(table)
+        story.append(self.items_heading)
+        
+        # Size the tables so each fills one page: big invoices are laid out
+        # page by page instead of measuring and splitting one huge table
+        width = invoice_canvas.RIGHT - invoice_canvas.LEFT
+        page = invoice_canvas.TOP - invoice_canvas.BOTTOM
+        first_page = page - self.height_of(story, width, page)
+        if first_page < HEADER_HEIGHT + ROW_HEIGHT + SUMMARY_HEIGHT:
+            # No room left under the customer details
+            story.append(PageBreak())
+            first_page = page
+        chunks = page_chunks(len(items), first_page, page)
+        
+        for number, (start, end) in enumerate(chunks):
+            table_data = [TABLE_HEADER]
+            subtotal = 0.0
+            for item in items[start:end]:
+                # item format: (name, quantity, base_unit, price_type, price, total, product_id)
+                table_data.append([
+                    invoice_canvas.clean(item[0]),  # Product name, on one line
+                    str(item[1]),  # Quantity
+                    invoice_canvas.clean(item[2]),  # Base unit
+                    f"{item[5]:.2f}"  # Total without currency symbol
+                ])
+                subtotal += item[5]
+                
+            last = number == len(chunks) - 1
+            if len(chunks) > 1:
+                table_data.append(['', '', 'Subtotal:', f"{subtotal:.2f}"])
+            if last:
+                # Add total row
+                table_data.append(['', '', 'Total:', f"{total_amount:.2f}"])
+                
+            table = Table(table_data, colWidths=COLUMN_WIDTHS, repeatRows=1)
+            table.setStyle(LAST_PAGE_STYLE if last and len(chunks) > 1 else TABLE_STYLE)
+            story.append(table)
+            if not last:
+                story.append(PageBreak())
         
         # Add footer
         story.append(Spacer(1, 30))
-        story.append(Paragraph("Thank you for your business!", self.styles['CustomBody']))
+        story.append(self.footer)
         
         # Build the PDF
         doc.build(story)
-        return filename
+        
+    @staticmethod
+    def height_of(story, width, height):
+        """Height the flowables take at the top of a frame, spacing included."""
+        total = 0
+        for i, flowable in enumerate(story):
+            if i:
+                total += flowable.getSpaceBefore()
+            total += flowable.wrap(width, height)[1] + flowable.getSpaceAfter()
+        return total
@@ -1,12 +1,18 @@
 import customtkinter as ctk
+from itertools import islice
 from typing import List, Optional, Callable
+from search_index import SearchIndex
 
 class ModernSearchableCombobox(ctk.CTkFrame):
+    VISIBLE_ROWS = 6   # Row widgets in the dropdown, recycled while scrolling
+    ROW_HEIGHT = 30
+    PAGE_SIZE = 50     # Matches pulled from the search per page
+    
     def __init__(self, parent, **kwargs):
         super().__init__(parent)
         
-        # Extract and store values
-        self.values = kwargs.pop('values', [])
+        # Extract and store values; matching runs against a prebuilt index
+        self.index = SearchIndex(kwargs.pop('values', []))
         self.width = kwargs.pop('width', 200)
         self.font = kwargs.pop('font', ("Arial", 12))
         
@@ -16,6 +22,10 @@ class ModernSearchableCombobox(ctk.CTkFrame):
         
         # Create dropdown window
         self.dropdown = None
+        self.rows = []            # Recycled row frames of the dropdown
+        self.matches = []         # Matches pulled so far for the current text
+        self.match_iter = None    # Source of further matches, None when exhausted
+        self.first = 0            # Index of the match shown in the top row
         self.selected_index = -1  # Track currently selected item
         
         # Bind events
@@ -34,14 +44,21 @@ class ModernSearchableCombobox(ctk.CTkFrame):
             self.dropdown.withdraw()  # Hide initially
             self.dropdown.overrideredirect(True)
             
-            # Create listbox
-            self.listbox = ctk.CTkScrollableFrame(self.dropdown)
-            self.listbox.pack(fill="both", expand=True)
+            # Fixed pool of rows plus a scrollbar over the matches
+            container = ctk.CTkFrame(self.dropdown)
+            container.pack(fill="both", expand=True)
+            self.scrollbar = ctk.CTkScrollbar(container, command=self._on_scrollbar)
+            self.scrollbar.pack(side="right", fill="y")
+            self.listbox = ctk.CTkFrame(container, fg_color="transparent")
+            self.listbox.pack(side="left", fill="both", expand=True)
+            self.rows = [self._create_row(slot) for slot in range(self.VISIBLE_ROWS)]
+            self.listbox.bind('<MouseWheel>', self._on_mousewheel)
             
             # Position dropdown
             x = self.entry.winfo_rootx()
             y = self.entry.winfo_rooty() + self.entry.winfo_height()
-            self.dropdown.geometry(f"{self.width}x200+{x}+{y}")
+            height = self.VISIBLE_ROWS * self.ROW_HEIGHT + 10
+            self.dropdown.geometry(f"{self.width}x{height}+{x}+{y}")
             
             # Update and show
             self._update_listbox()
@@ -51,65 +68,105 @@ class ModernSearchableCombobox(ctk.CTkFrame):
             # Bind listbox events
             self.dropdown.bind('<FocusOut>', self._on_focus_out)
             
+    def _create_row(self, slot):
+        frame = ctk.CTkFrame(self.listbox, fg_color="transparent")
+        frame.pack(fill="x", padx=2, pady=1)
+        frame.text = ""
+        
+        label = ctk.CTkLabel(
+            frame,
+            text="",
+            font=self.font,
+            anchor="w",
+            padx=5
+        )
+        label.pack(fill="x", expand=True)
+        frame.label = label
+        
+        # Bind click, hover and wheel events once; they act on whatever
+        # match the slot currently shows
+        for widget in (frame, label):
+            widget.bind('<Button-1>', lambda e, s=slot: self._select_slot(s))
+            widget.bind('<MouseWheel>', self._on_mousewheel)
+        frame.bind('<Enter>', lambda e: frame.configure(fg_color=("gray75", "gray25")))
+        frame.bind('<Leave>', lambda e, s=slot: (
+            frame.configure(fg_color=("gray75", "gray25"))
+            if self.first + s == self.selected_index
+            else frame.configure(fg_color="transparent")
+        ))
+        return frame
+            
     def _hide_dropdown(self, event=None):
         if self.dropdown:
             self.dropdown.destroy()
             self.dropdown = None
+            self.rows = []
+            
+    def _iter_matches(self, search_text):
+        """Yield values matching the search text, best match first."""
+        yield from self.index.iter_matches(search_text)
             
+    def _fetch_matches(self, count):
+        """Pull matches from the search until at least `count` are loaded."""
+        while self.match_iter is not None and len(self.matches) < count:
+            batch = list(islice(self.match_iter, self.PAGE_SIZE))
+            self.matches.extend(batch)
+            if len(batch) < self.PAGE_SIZE:
+                self.match_iter = None
+                
     def _update_listbox(self):
         if not self.dropdown:
             return
             
-        # Clear existing items
-        for widget in self.listbox.winfo_children():
-            widget.destroy()
-            
-        # Filter values based on entry text
+        # Restart the search; only the first page is pulled now, the rest
+        # is paged in while scrolling
         search_text = self.entry.get().lower()
-        filtered_values = []
-        
-        # Only filter if there's search text
-        if search_text:
-            filtered_values = [
-                value for value in self.values 
-                if search_text in value.lower()
-            ]
-        else:
-            filtered_values = self.values.copy()
-        
-        # Create frames for each filtered item
-        for i, value in enumerate(filtered_values):
-            frame = ctk.CTkFrame(self.listbox, fg_color="transparent")
-            frame.pack(fill="x", padx=2, pady=1)
-            frame.value = value
-            
-            label = ctk.CTkLabel(
-                frame,
-                text=value,
-                font=self.font,
-                anchor="w",
-                padx=5
-            )
-            label.pack(fill="x", expand=True)
-            
-            # Bind click events
-            frame.bind('<Button-1>', lambda e, v=value: self._select_value(v))
-            label.bind('<Button-1>', lambda e, v=value: self._select_value(v))
-            
-            # Bind hover events
-            frame.bind('<Enter>', lambda e, f=frame: f.configure(fg_color=("gray75", "gray25")))
-            frame.bind('<Leave>', lambda e, f=frame: (
-                f.configure(fg_color=("gray75", "gray25")) 
-                if self.listbox.winfo_children().index(f) == self.selected_index 
-                else f.configure(fg_color="transparent")
-             ))
+        self.matches = []
+        self.match_iter = self._iter_matches(search_text)
+        self.first = 0
+        self._fetch_matches(self.VISIBLE_ROWS + self.PAGE_SIZE)
         
         # Update selection index
-        if filtered_values:
-            self.selected_index = 0
-            self._highlight_selected()
+        self.selected_index = 0 if self.matches else -1
+        self._render_rows()
+        
+    def _scroll_to(self, first):
+        # Page in more matches before reaching the end of what is loaded
+        self._fetch_matches(first + self.VISIBLE_ROWS + self.PAGE_SIZE)
+        max_first = max(0, len(self.matches) - self.VISIBLE_ROWS)
+        self.first = min(max(0, first), max_first)
+        self._render_rows()
+        
+    def _on_mousewheel(self, event):
+        self._scroll_to(self.first + (-3 if event.delta > 0 else 3))
+        
+    def _on_scrollbar(self, *args):
+        if args[0] == "moveto":
+            self._scroll_to(int(float(args[1]) * len(self.matches)))
+        elif args[0] == "scroll":
+            step = self.VISIBLE_ROWS if args[2] == "pages" else 1
+            self._scroll_to(self.first + int(args[1]) * step)
+            
+    def _render_rows(self):
+        """Show the window of matches starting at self.first in the row pool."""
+        for slot, frame in enumerate(self.rows):
+            index = self.first + slot
+            text = self.matches[index] if index < len(self.matches) else ""
+            if frame.text != text:
+                frame.label.configure(text=text)
+                frame.text = text
+        self._highlight_selected()
+        
+        total = len(self.matches)
+        if total > self.VISIBLE_ROWS:
+            self.scrollbar.set(self.first / total, (self.first + self.VISIBLE_ROWS) / total)
         else:
-            self.selected_index = -1
+            self.scrollbar.set(0.0, 1.0)
+            
+    def _select_slot(self, slot):
+        index = self.first + slot
+        if index < len(self.matches):
+            self._select_value(self.matches[index])
             
     def _select_value(self, value):
         self.entry.delete(0, "end")
@@ -125,9 +182,8 @@ class ModernSearchableCombobox(ctk.CTkFrame):
             self._update_listbox()
             
     def _on_enter(self, event):
-        if self.dropdown and self.listbox.winfo_children():
-            if self.selected_index >= 0:
-                self._select_value(self.listbox.winfo_children()[self.selected_index].value)
+        if self.dropdown and 0 <= self.selected_index < len(self.matches):
+            self._select_value(self.matches[self.selected_index])
         return "break"
         
     def _on_focus_out(self, event):
@@ -137,18 +193,30 @@ class ModernSearchableCombobox(ctk.CTkFrame):
             (self.dropdown and self.dropdown.focus_get())
         ) else None)
             
+    def _move_selection(self, index):
+        self.selected_index = index
+        # Keep the selection inside the visible window
+        if index < self.first:
+            self._scroll_to(index)
+        elif index >= self.first + self.VISIBLE_ROWS:
+            self._scroll_to(index - self.VISIBLE_ROWS + 1)
+        else:
+            self._highlight_selected()
+            
     def _handle_up(self, event=None):
         """Handle up arrow key."""
         if not self.dropdown:
             self._show_dropdown()
             return "break"
             
-        items = self.listbox.winfo_children()
-        if not items:
+        if not self.matches:
             return "break"
             
-        self.selected_index = (self.selected_index - 1) % len(items)
-        self._highlight_selected()
+        if self.selected_index > 0:
+            self._move_selection(self.selected_index - 1)
+        elif self.match_iter is None:
+            # All matches are loaded, so wrap to the last one
+            self._move_selection(len(self.matches) - 1)
         return "break"
         
     def _handle_down(self, event=None):
@@ -157,19 +225,17 @@ class ModernSearchableCombobox(ctk.CTkFrame):
             self._show_dropdown()
             return "break"
             
-        items = self.listbox.winfo_children()
-        if not items:
+        self._fetch_matches(self.selected_index + 2)
+        if not self.matches:
             return "break"
             
-        self.selected_index = (self.selected_index + 1) % len(items)
-        self._highlight_selected()
+        self._move_selection((self.selected_index + 1) % len(self.matches))
         return "break"
         
     def _highlight_selected(self):
         """Update the visual selection in the dropdown."""
-        items = self.listbox.winfo_children()
-        for i, frame in enumerate(items):
-            if i == self.selected_index:
+        for slot, frame in enumerate(self.rows):
+            if self.first + slot == self.selected_index and frame.text:
                 frame.configure(fg_color=("gray75", "gray25"))
             else:
                 frame.configure(fg_color="transparent")
@@ -182,14 +248,23 @@ class ModernSearchableCombobox(ctk.CTkFrame):
         return self.entry.get()
         
     def set_values(self, values):
-        self.values = values
+        self.index.build(values)
+        
+    def add_value(self, value):
+        """Add one value without rebuilding the search index."""
+        self.index.add(value)
+        self._update_listbox()
+        
+    def remove_value(self, value):
+        self.index.remove(value)
+        self._update_listbox()
         
     def focus(self):
         self.entry.focus()
         
     def configure(self, **kwargs):
         if 'values' in kwargs:
-            self.values = kwargs.pop('values')
+            self.set_values(kwargs.pop('values'))
         super().configure(**kwargs)
         
 # Example usage
@@ -0,0 +1,91 @@
+import queue
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Optional
+
+
+class PdfRenderer:
+    """
+    Render invoice PDFs on a background thread so the UI never waits for them.
+
+    Invoices are committed before they are submitted here, so a slow or
+    failed render never loses one. Jobs run one at a time, in submission
+    order, on a single worker that keeps one InvoicePrinter for the life of
+    the app. Finished jobs are reported on the Tk main thread through
+    `on_done`. Call warm_up() at startup so the first invoice renders as
+    fast as the rest.
+    """
+
+    POLL_MS = 100  # How often the Tk thread checks for finished renders
+
+    def __init__(self, widget, on_done: Callable[[int, str, Optional[str], Optional[str]], None]):
+        """
+        Args:
+            widget: Any Tk widget, used for scheduling on the main thread
+            on_done: Called on the main thread as
+                on_done(invoice_id, invoice_number, pdf_path, error), with
+                pdf_path None and error set when the render failed
+        """
+        self.widget = widget
+        self.on_done = on_done
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="pdf")
+        self.printer = None     # Created on the worker by the first job
+        self.results = queue.Queue()
+        self.pending = 0        # Jobs submitted but not reported yet
+        self.polling = False
+
+    def submit(self, invoice_id, invoice_number, customer, items, total_amount, created_at=None):
+        """Queue an invoice for rendering; returns immediately."""
+        self.pending += 1
+        self.executor.submit(self._render, invoice_id, invoice_number,
+                             customer, list(items), total_amount, created_at)
+        if not self.polling:
+            self.polling = True
+            self.widget.after(self.POLL_MS, self._poll)
+
+    def warm_up(self):
+        """Load reportlab and prepare the printer on the worker, off the UI thread."""
+        self.executor.submit(self._warm_up)
+
+    def _get_printer(self):
+        # Worker thread; reportlab is imported here so startup does not wait for it
+        if self.printer is None:
+            from invoice_printer import InvoicePrinter
+            self.printer = InvoicePrinter()
+        return self.printer
+
+    def _warm_up(self):
+        try:
+            self._get_printer().warm_up()
+        except Exception:
+            pass  # The first real render reports any problem
+
+    def _render(self, invoice_id, invoice_number, customer, items, total_amount, created_at):
+        # Worker thread
+        try:
+            pdf_path = self._get_printer().generate_pdf(customer, items, total_amount,
+                                                       invoice_number=invoice_number,
+                                                       created_at=created_at)
+            self.results.put((invoice_id, invoice_number, pdf_path, None))
+        except Exception as e:
+            self.results.put((invoice_id, invoice_number, None, str(e)))
+
+    def _poll(self):
+        self._drain()
+        if self.pending:
+            self.widget.after(self.POLL_MS, self._poll)
+        else:
+            self.polling = False
+
+    def _drain(self):
+        try:
+            while True:
+                result = self.results.get_nowait()
+                self.pending -= 1
+                self.on_done(*result)
+        except queue.Empty:
+            pass
+
+    def close(self):
+        """Finish the queued renders and report them before the app exits."""
+        self.executor.shutdown(wait=True)
+        self._drain()
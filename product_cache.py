@@ -0,0 +1,110 @@
+from typing import Dict, Iterable, List, NamedTuple, Optional
+
+
+class ProductRecord(NamedTuple):
+    """The product fields the invoice page needs, with proper types."""
+    id: int
+    name: str
+    wholesale_price: float
+    retail_price: float
+    base_unit: str
+    alt_unit: str
+    unit_ratio: float
+    sku: Optional[str]
+
+    def price(self, price_type: str) -> float:
+        """Unit price for "Wholesale" or "Retail"."""
+        if price_type.lower() == "wholesale":
+            return self.wholesale_price
+        return self.retail_price
+
+    def label(self) -> str:
+        """Display string used by the product picker."""
+        return (f"{self.id} - {self.name} "
+                f"(W:₹{self.wholesale_price:.2f}, R:₹{self.retail_price:.2f})")
+
+
+PRODUCT_RECORD_SQL = '''
+    SELECT id, name, wholesale_price, retail_price, base_unit, alt_unit, unit_ratio, sku
+    FROM products
+'''
+
+
+def to_record(row) -> ProductRecord:
+    """Build a record from a PRODUCT_RECORD_SQL row, defaulting missing values."""
+    product_id, name, wholesale, retail, base_unit, alt_unit, ratio, sku = row
+    return ProductRecord(
+        product_id, name or "",
+        float(wholesale) if wholesale is not None else 0.0,
+        float(retail) if retail is not None else 0.0,
+        base_unit or "", alt_unit or "",
+        float(ratio) if ratio else 1.0,
+        sku or None
+    )
+
+
+class ProductCache:
+    """
+    Typed in-memory copy of the products table.
+
+    Loaded once with a single query; after that lines are added from it by
+    id or by SKU/barcode without touching the database. Call load() again,
+    or reload() with the changed ids, when products change.
+    """
+
+    def __init__(self):
+        self.by_id: Dict[int, ProductRecord] = {}
+        self.by_code: Dict[str, ProductRecord] = {}
+
+    def __len__(self):
+        return len(self.by_id)
+
+    def get(self, product_id: int) -> Optional[ProductRecord]:
+        return self.by_id.get(product_id)
+
+    def find_code(self, code: str) -> Optional[ProductRecord]:
+        return self.by_code.get(code)
+
+    def load(self, conn):
+        """Replace the cache with every product in the database."""
+        self.by_id.clear()
+        self.by_code.clear()
+        for row in conn.execute(PRODUCT_RECORD_SQL):
+            try:
+                self.put(to_record(row))
+            except (ValueError, TypeError):
+                continue  # Skip rows with unusable prices
+
+    def reload(self, conn, product_ids: Iterable[int]):
+        """Refresh the given products; ids no longer in the database are dropped."""
+        product_ids = list(product_ids)
+        for product_id in product_ids:
+            self.remove(product_id)
+        # Stay well below SQLite's bound parameter limit
+        for start in range(0, len(product_ids), 500):
+            batch = product_ids[start:start + 500]
+            rows = conn.execute(
+                PRODUCT_RECORD_SQL + f" WHERE id IN ({', '.join('?' * len(batch))})", batch
+            )
+            for row in rows:
+                try:
+                    self.put(to_record(row))
+                except (ValueError, TypeError):
+                    continue
+
+    def put(self, record: ProductRecord):
+        old = self.by_id.get(record.id)
+        if old is not None and old.sku:
+            self.by_code.pop(old.sku, None)
+        self.by_id[record.id] = record
+        if record.sku:
+            self.by_code[record.sku] = record
+
+    def remove(self, product_id: int) -> Optional[ProductRecord]:
+        record = self.by_id.pop(product_id, None)
+        if record is not None and record.sku:
+            self.by_code.pop(record.sku, None)
+        return record
+
+    def sorted_by_name(self) -> List[ProductRecord]:
+        return sorted(self.by_id.values(), key=lambda r: r.name.casefold())
@@ -0,0 +1,711 @@
+import csv
+import os
+import posixpath
+import queue
+import re
+import tempfile
+import threading
+import time
+import zipfile
+from typing import NamedTuple, Optional
+from xml.etree import ElementTree
+
+import openpyxl
+from openpyxl.utils.cell import range_boundaries
+import pandas as pd
+
+# Columns an import file must have, and optional ones with their defaults
+REQUIRED_COLUMNS = ['name', 'wholesale_price', 'retail_price', 'base_unit']
+OPTIONAL_COLUMNS = {'alt_unit': '', 'unit_ratio': 1.0, 'description': '', 'sku': None}
+
+# Column order used for inserts
+PRODUCT_COLUMNS = REQUIRED_COLUMNS + list(OPTIONAL_COLUMNS)
+
+INSERT_PRODUCT_SQL = f'''
+    INSERT INTO products ({', '.join(PRODUCT_COLUMNS)})
+    VALUES ({', '.join('?' * len(PRODUCT_COLUMNS))})
+'''
+
+
+def update_product_sql(columns):
+    """UPDATE of the given columns of one product; the id is the last parameter."""
+    return f"UPDATE products SET {', '.join(col + ' = ?' for col in columns)} WHERE id = ?"
+
+# Columns an upsert import can match existing products on
+MATCH_KEYS = ('name', 'sku')
+
+
+def missing_columns(columns, match_key=None):
+    """Required columns absent from an import file."""
+    required = REQUIRED_COLUMNS + ([match_key] if match_key not in (None, *REQUIRED_COLUMNS) else [])
+    return [col for col in required if col not in columns]
+
+
+def import_columns(header):
+    """
+    PRODUCT_COLUMNS an import file provides, in PRODUCT_COLUMNS order.
+
+    Upserts compare and update only these; optional columns missing from
+    the file keep their stored values.
+    """
+    return [col for col in PRODUCT_COLUMNS if col in REQUIRED_COLUMNS or col in header]
+
+
+def _text(series):
+    """Column as stripped strings, with blanks for missing cells."""
+    return series.where(series.notna(), '').astype(str).str.strip()
+
+
+def _code_text(series):
+    """
+    Like _text, for codes such as SKUs and barcodes. A numeric column with
+    blank cells is read as floats, so whole numbers drop the '.0' they
+    would otherwise get: 8901234567890.0 becomes "8901234567890".
+    """
+    def text(value):
+        if isinstance(value, float) and value.is_integer():
+            return str(int(value))
+        return str(value)
+    # Strings throughout, or map() would infer floats again for ints next to blanks
+    return _text(series.map(text, na_action='ignore'))
+
+
+def _sku_clashes(conn, clean, candidates, matcher=None):
+    """
+    Rows whose SKU already belongs to a different product, either in the
+    database or to an earlier row of this chunk.
+
+    Without a matcher every row is a new product; with a name matcher a row
+    may keep the SKU of the product it updates.
+    """
+    clash = pd.Series(False, index=clean.index)
+    rows = clean[candidates & clean['sku'].notna()]
+    if rows.empty:
+        return clash
+
+    owners = {}  # SKU -> id of the product that has it
+    skus = list(dict.fromkeys(rows['sku']))
+    # Stay well below SQLite's bound parameter limit
+    for start in range(0, len(skus), 500):
+        batch = skus[start:start + 500]
+        owners.update(conn.execute(
+            f"SELECT sku, id FROM products WHERE sku IN ({', '.join('?' * len(batch))})", batch
+        ))
+
+    claimed = {}  # SKU -> product the first row using it belongs to
+    for position, name, sku in zip(rows.index, rows['name'], rows['sku']):
+        if matcher is None:
+            target, claim = None, position
+        else:
+            claim = name.casefold()
+            target = matcher.index.get(claim, (None,))[0]
+        owner = owners.get(sku)
+        if owner is not None and owner != target:
+            clash[position] = True
+        elif claimed.setdefault(sku, claim) != claim:
+            clash[position] = True
+    return clash
+
+
+def validate_products(df, first_row=2, match_key=None, conn=None, matcher=None):
+    """
+    Validate and coerce a whole DataFrame of products, column by column.
+
+    Args:
+        df: Raw rows as read from the file, indexed by data row position
+        first_row: File row number of data row 0 (2 when the header is on
+            row 1), used in the error report
+        match_key: Column an upsert matches on; rows without it are rejected
+        conn: When given, rows whose SKU is already used by another product
+            (in the database or earlier in `df`) are rejected instead of
+            failing the whole chunk on the unique index
+        matcher: The ProductMatcher of a name upsert, so rows updating a
+            product may keep its SKU
+
+    Returns:
+        Tuple of (valid, rejected). `valid` has PRODUCT_COLUMNS with proper
+        types. `rejected` has the original columns plus 'row' and 'reason'.
+    """
+    clean = pd.DataFrame(index=df.index)
+    problems = []
+
+    for col in ('name', 'base_unit'):
+        clean[col] = _text(df[col])
+        problems.append((clean[col] == '', f"{col} is required"))
+
+    for col in ('wholesale_price', 'retail_price'):
+        clean[col] = pd.to_numeric(df[col], errors='coerce').astype(float)
+        problems.append((clean[col].isna(), f"{col} is not a number"))
+        problems.append((clean[col] < 0, f"{col} is negative"))
+
+    for col in ('alt_unit', 'description'):
+        clean[col] = _text(df[col]) if col in df.columns else OPTIONAL_COLUMNS[col]
+
+    if 'unit_ratio' in df.columns:
+        ratio = pd.to_numeric(df['unit_ratio'], errors='coerce').astype(float)
+        # Blank cells take the default, anything else must be a positive number
+        blank = df['unit_ratio'].isna() | (_text(df['unit_ratio']) == '')
+        problems.append((ratio.isna() & ~blank, "unit_ratio is not a number"))
+        problems.append((ratio <= 0, "unit_ratio must be greater than 0"))
+        clean['unit_ratio'] = ratio.fillna(OPTIONAL_COLUMNS['unit_ratio'])
+    else:
+        clean['unit_ratio'] = OPTIONAL_COLUMNS['unit_ratio']
+
+    # Blank SKUs are stored as NULL so the unique index ignores them
+    sku = _code_text(df['sku']) if 'sku' in df.columns else pd.Series('', index=df.index)
+    clean['sku'] = sku.astype(object).where(sku != '', None)
+    if match_key == 'sku':
+        problems.append((sku == '', "sku is required to match products"))
+
+    # Matching on SKU updates the product that has it, so it cannot clash
+    if conn is not None and 'sku' in df.columns and match_key != 'sku':
+        ok = ~pd.concat([mask.fillna(False) for mask, _ in problems], axis=1).any(axis=1)
+        problems.append((_sku_clashes(conn, clean, ok, matcher),
+                         "sku is already used by another product"))
+
+    # One boolean column per problem; a row is rejected if any is set
+    flags = pd.DataFrame({message: mask.fillna(False) for mask, message in problems},
+                         index=df.index).astype(bool)
+    bad = flags.any(axis=1)
+
+    rejected = df[bad].copy()
+    rejected.insert(0, 'row', rejected.index + first_row)
+    # bool x str: joins the messages of the flags that are set
+    rejected['reason'] = flags[bad].dot(flags.columns + '; ').str.rstrip('; ')
+
+    valid = clean.loc[~bad, PRODUCT_COLUMNS]
+    return valid, rejected
+
+
+def insert_products(conn, valid):
+    """Insert validated rows with a single executemany in one transaction."""
+    if valid.empty:
+        return 0
+    cursor = conn.cursor()
+    try:
+        cursor.execute("BEGIN IMMEDIATE")
+        cursor.executemany(INSERT_PRODUCT_SQL, valid.itertuples(index=False, name=None))
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    return len(valid)
+
+
+def _stored_row(row):
+    """Product values as validate_products produces them, for hashing."""
+    name, wholesale, retail, base_unit, alt_unit, ratio, description, sku = row
+    return (name, float(wholesale), float(retail), base_unit, alt_unit or '',
+            float(ratio if ratio is not None else OPTIONAL_COLUMNS['unit_ratio']),
+            description or '', sku)
+
+
+class ProductMatcher:
+    """
+    Hash index of the existing products, used to diff an import against them.
+
+    Maps each product's match key to (id, hash of its column values), so an
+    incoming row is classified as new, changed or unchanged with one dict
+    lookup and one hash comparison. Names match case-insensitively, like the
+    NOCASE name index; SKUs match exactly.
+
+    Only `columns` (see import_columns) are compared and updated, so a file
+    without, say, a description column leaves descriptions alone.
+    """
+
+    def __init__(self, conn, match_key='name', columns=PRODUCT_COLUMNS):
+        if match_key not in MATCH_KEYS:
+            raise ValueError(f"Cannot match products on {match_key!r}")
+        if match_key not in columns:
+            raise ValueError(f"The file has no {match_key!r} column to match on")
+        self.match_key = match_key
+        self.key_position = PRODUCT_COLUMNS.index(match_key)
+        self.columns = list(columns)
+        self.positions = [PRODUCT_COLUMNS.index(col) for col in self.columns]
+        self.update_sql = update_product_sql(self.columns)
+        self.index = {}     # Match key -> (product id, row hash)
+        self.seen = set()   # Match keys already imported from this file
+        self.last_id = 0    # Highest product id loaded into the index
+        self.load(conn)
+
+    def key(self, row):
+        value = row[self.key_position]
+        if value is None:
+            return None
+        return value.casefold() if self.match_key == 'name' else value
+
+    def project(self, row):
+        """The compared columns of a PRODUCT_COLUMNS row."""
+        return tuple(row[i] for i in self.positions)
+
+    def load(self, conn):
+        """Add products created since the last load (all of them at first)."""
+        cursor = conn.execute(
+            f"SELECT id, {', '.join(PRODUCT_COLUMNS)} FROM products WHERE id > ? ORDER BY id",
+            (self.last_id,)
+        )
+        for product_id, *row in cursor:
+            row = _stored_row(row)
+            key = self.key(row)
+            if key is not None:
+                self.index[key] = (product_id, hash(self.project(row)))
+            self.last_id = product_id
+
+
+class UpsertResult(NamedTuple):
+    inserted: int       # New products
+    updated: int        # Existing products whose values changed
+    unchanged: int      # Existing products already up to date
+    duplicates: int     # Rows repeating a key seen earlier in the file (last one wins)
+
+
+def upsert_products(conn, valid, matcher):
+    """
+    Insert new products, update changed ones and skip unchanged ones.
+
+    Rows are diffed against `matcher` in one pass, then the inserts and
+    updates are written with executemany in a single transaction. The
+    matcher is kept up to date, so it can be reused for the next chunk.
+
+    Returns:
+        UpsertResult with the counts for these rows
+    """
+    inserts, updates = [], []
+    pending = {}  # Match key -> position in inserts, for repeats within this batch
+    index, seen = matcher.index, matcher.seen
+    updated = unchanged = duplicates = 0
+
+    for row in valid[PRODUCT_COLUMNS].itertuples(index=False, name=None):
+        key = matcher.key(row)
+        values = matcher.project(row)
+        row_hash = hash(values)
+        repeat = key in seen
+        seen.add(key)
+        if repeat:
+            duplicates += 1
+
+        if key in pending:
+            inserts[pending[key]] = row
+            continue
+        existing = index.get(key)
+        if existing is None:
+            pending[key] = len(inserts)
+            inserts.append(row)
+            continue
+        product_id, stored_hash = existing
+        if stored_hash == row_hash:
+            if not repeat:
+                unchanged += 1
+            continue
+        updates.append(values + (product_id,))
+        index[key] = (product_id, row_hash)
+        if not repeat:
+            updated += 1
+
+    if inserts or updates:
+        cursor = conn.cursor()
+        try:
+            cursor.execute("BEGIN IMMEDIATE")
+            cursor.executemany(INSERT_PRODUCT_SQL, inserts)
+            cursor.executemany(matcher.update_sql, updates)
+            # Pick up the new ids so later rows update instead of inserting again
+            matcher.load(conn)
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+
+    return UpsertResult(len(inserts), updated, unchanged, duplicates)
+
+
+def write_error_report(rejected, file_path):
+    """Save rejected rows, with their file row numbers and reasons, as CSV."""
+    rejected.to_csv(file_path, index=False)
+
+
+def iter_xlsx_chunks(file_path, chunk_size=5000):
+    """
+    Stream the first sheet of an .xlsx file in DataFrame chunks.
+
+    Uses openpyxl's read-only mode, so only one chunk of rows is held in
+    memory at a time. The first row is the header.
+
+    Yields:
+        DataFrames indexed by data row position (sheet row - 2), like the
+        frame pd.read_excel would return for the same rows
+    """
+    workbook = openpyxl.load_workbook(file_path, read_only=True, data_only=True)
+    try:
+        rows = workbook.worksheets[0].iter_rows(values_only=True)
+        header = next(rows, None)
+        if header is None:
+            return
+        columns = [str(c) if c is not None else '' for c in header]
+        width = len(columns)
+
+        chunk, positions = [], []
+        for position, row in enumerate(rows):
+            if all(cell is None for cell in row):
+                continue  # Blank line, pd.read_excel skips these too
+            # Read-only rows are not padded to the header width
+            chunk.append(row[:width] + (None,) * (width - len(row)))
+            positions.append(position)
+            if len(chunk) == chunk_size:
+                # object keeps cell values as read, e.g. integer codes next to blanks
+                yield pd.DataFrame(chunk, columns=columns, index=positions, dtype=object)
+                chunk, positions = [], []
+        if chunk:
+            yield pd.DataFrame(chunk, columns=columns, index=positions, dtype=object)
+    finally:
+        workbook.close()
+
+
+def xlsx_header(file_path):
+    """Column names on the first row of the first sheet."""
+    workbook = openpyxl.load_workbook(file_path, read_only=True, data_only=True)
+    try:
+        header = next(workbook.worksheets[0].iter_rows(values_only=True, max_row=1), ())
+        return [str(c) for c in header if c is not None]
+    finally:
+        workbook.close()
+
+
+# Start of a <row> element, and the stored used range, with or without a namespace prefix
+ROW_TAG = re.compile(rb"<(?:\w+:)?row[\s/>]")
+DIMENSION_TAG = re.compile(rb'<(?:\w+:)?dimension\s+ref="([^"]+)"')
+
+
+def _first_sheet_member(archive):
+    """Zip member holding the first worksheet, found through the workbook's relationships."""
+    workbook = ElementTree.fromstring(archive.read("xl/workbook.xml"))
+    sheet = next(e for e in workbook.iter() if e.tag.rsplit("}", 1)[-1] == "sheet")
+    rel_id = next(value for key, value in sheet.attrib.items() if key.endswith("}id"))
+    rels = ElementTree.fromstring(archive.read("xl/_rels/workbook.xml.rels"))
+    target = next(rel.get("Target") for rel in rels if rel.get("Id") == rel_id)
+    if target.startswith("/"):
+        return target[1:]
+    return posixpath.normpath(posixpath.join("xl", target))
+
+
+def count_xlsx_rows(file_path):
+    """
+    Rows in the first sheet, header included, counted from the raw sheet XML.
+
+    Only the <row> tags are counted, without parsing any cells, so this is
+    many times faster than reading the rows. Formatted but empty rows count
+    too, so treat the result as an estimate.
+    """
+    with zipfile.ZipFile(file_path) as archive:
+        with archive.open(_first_sheet_member(archive)) as sheet:
+            rows, rest = 0, b""
+            while True:
+                block = sheet.read(1 << 20)
+                if not block:
+                    break
+                data = rest + block
+                # Markup always starts with "<": carry the last tag, which may
+                # continue in the next block, over unsearched
+                cut = data.rfind(b"<")
+                if cut == -1:
+                    cut = len(data)
+                rows += len(ROW_TAG.findall(data, 0, cut))
+                rest = data[cut:]
+            return rows + len(ROW_TAG.findall(rest))
+
+
+def xlsx_row_count(file_path):
+    """
+    Data rows in the first sheet, or None if unknown.
+
+    Uses the <dimension> stored at the top of the sheet when it gives a
+    range. Otherwise, e.g. for files written in openpyxl's write-only mode
+    like export_products does, the rows are counted with count_xlsx_rows.
+    The sheet XML is read directly: openpyxl would parse the whole sheet
+    looking for a missing <dimension>.
+    """
+    try:
+        with zipfile.ZipFile(file_path) as archive:
+            with archive.open(_first_sheet_member(archive)) as sheet:
+                head = sheet.read(1 << 16)
+        match = DIMENSION_TAG.search(head)
+        if match:
+            max_row = range_boundaries(match.group(1).decode("ascii"))[3]
+            # A lone "A1" is what some writers store for an unsized sheet
+            if max_row and max_row > 1:
+                return max_row - 1
+        return max(0, count_xlsx_rows(file_path) - 1)
+    except (KeyError, StopIteration, ValueError, ElementTree.ParseError, zipfile.BadZipFile):
+        return None
+
+
+def _require_pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError:
+        raise RuntimeError("Parquet files need the pyarrow package (pip install pyarrow)")
+    return pyarrow
+
+
+def iter_csv_chunks(file_path, chunk_size=5000):
+    """Stream a CSV file in DataFrame chunks indexed by data row position."""
+    # Read every cell as text; validate_products does the type coercion.
+    # Blank lines are kept while reading so the index stays the line position.
+    for chunk in pd.read_csv(file_path, dtype=str, chunksize=chunk_size,
+                             skip_blank_lines=False):
+        chunk = chunk.dropna(how="all")
+        if len(chunk):
+            yield chunk
+
+
+def csv_row_count(file_path):
+    """
+    Data rows in a CSV file, estimated from its line count.
+
+    Counting newlines in binary blocks is far cheaper than parsing. Quoted
+    values spanning lines and blank lines make this a slight overestimate.
+    """
+    lines, last = 0, b"\n"
+    with open(file_path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            lines += block.count(b"\n")
+            last = block[-1:]
+    if last != b"\n":
+        lines += 1  # Last line without a newline
+    return max(0, lines - 1)
+
+
+def csv_header(file_path):
+    return list(pd.read_csv(file_path, nrows=0).columns)
+
+
+def iter_parquet_chunks(file_path, chunk_size=5000):
+    """Stream a Parquet file by record batches, indexed by data row position."""
+    pyarrow = _require_pyarrow()
+    position = 0
+    for batch in pyarrow.parquet.ParquetFile(file_path).iter_batches(batch_size=chunk_size):
+        chunk = batch.to_pandas()
+        chunk.index = pd.RangeIndex(position, position + len(chunk))
+        position += len(chunk)
+        yield chunk
+
+
+def parquet_header(file_path):
+    return _require_pyarrow().parquet.ParquetFile(file_path).schema_arrow.names
+
+
+def parquet_row_count(file_path):
+    return _require_pyarrow().parquet.ParquetFile(file_path).metadata.num_rows
+
+
+# Streaming readers by file extension: (chunks, header, row count or None)
+FORMATS = {
+    ".xlsx": (iter_xlsx_chunks, xlsx_header, xlsx_row_count),
+    ".csv": (iter_csv_chunks, csv_header, csv_row_count),
+    ".parquet": (iter_parquet_chunks, parquet_header, parquet_row_count),
+}
+
+
+def _format(file_path):
+    extension = os.path.splitext(file_path)[1].lower()
+    if extension not in FORMATS:
+        raise ValueError(f"Unsupported file type: {extension or file_path}")
+    return FORMATS[extension]
+
+
+def iter_chunks(file_path, chunk_size=5000):
+    return _format(file_path)[0](file_path, chunk_size)
+
+
+def file_header(file_path):
+    return _format(file_path)[1](file_path)
+
+
+def row_count(file_path):
+    return _format(file_path)[2](file_path)
+
+
+class ImportProgress(NamedTuple):
+    processed: int              # Rows read so far
+    total: Optional[int]        # Rows in the file, None if unknown
+    imported: int               # New products inserted
+    rejected: int
+    elapsed: float              # Seconds since the import started
+    eta: Optional[float]        # Estimated seconds left, None if unknown
+    finished: bool = False
+    cancelled: bool = False
+    error: Optional[str] = None
+    updated: int = 0            # Upsert imports: existing products changed
+    unchanged: int = 0          # Upsert imports: existing products already up to date
+    duplicates: int = 0         # Upsert imports: rows repeating an earlier key
+
+
+class StreamingImport:
+    """
+    Import a large .xlsx, .csv or .parquet file on a background thread in
+    fixed-size chunks.
+
+    Each chunk is validated and committed in its own transaction, so memory
+    stays bounded by the chunk size and already committed chunks stay in
+    the database if the import is cancelled. Rejected rows are appended to
+    a temporary CSV error report. Progress is posted to `self.progress` as
+    ImportProgress tuples for the UI thread to poll.
+
+    With a match_key the import is an upsert: rows are diffed against the
+    existing products and only new or changed ones are written.
+    """
+
+    def __init__(self, file_path, connect, chunk_size=5000, match_key=None):
+        """
+        Args:
+            file_path: .xlsx, .csv or .parquet file to import
+            connect: Opens the writer connection (called on the import thread)
+            chunk_size: Rows validated and committed per transaction
+            match_key: 'name' or 'sku' to upsert, None to insert every row
+        """
+        self.file_path = file_path
+        self.connect = connect
+        self.chunk_size = chunk_size
+        self.match_key = match_key
+        self.progress = queue.Queue()
+        self.cancel_event = threading.Event()
+        self.report_path = None     # Temporary CSV of rejected rows, if any
+        self.thread = None
+
+    def start(self):
+        self.thread = threading.Thread(target=self.run, name="product-import", daemon=True)
+        self.thread.start()
+
+    def cancel(self):
+        """Stop after the chunk being imported; committed chunks are kept."""
+        self.cancel_event.set()
+
+    def run(self):
+        started = time.monotonic()
+        processed = imported = rejected = 0
+        updated = unchanged = duplicates = 0
+        total = None
+        conn = None
+
+        def report(eta, **status):
+            return ImportProgress(
+                processed, total, imported, rejected, time.monotonic() - started, eta,
+                updated=updated, unchanged=unchanged, duplicates=duplicates, **status
+            )
+
+        try:
+            total = row_count(self.file_path)
+            conn = self.connect()
+            matcher = None
+            if self.match_key:
+                columns = import_columns(file_header(self.file_path))
+                matcher = ProductMatcher(conn, self.match_key, columns)
+            for chunk in iter_chunks(self.file_path, self.chunk_size):
+                if self.cancel_event.is_set():
+                    break
+                valid, bad = validate_products(chunk, match_key=self.match_key,
+                                               conn=conn, matcher=matcher)
+                if matcher is None:
+                    imported += insert_products(conn, valid)
+                else:
+                    result = upsert_products(conn, valid, matcher)
+                    imported += result.inserted
+                    updated += result.updated
+                    unchanged += result.unchanged
+                    duplicates += result.duplicates
+                if len(bad):
+                    self._append_report(bad)
+                    rejected += len(bad)
+                processed += len(chunk)
+
+                eta = None
+                if total and processed:
+                    elapsed = time.monotonic() - started
+                    eta = elapsed / processed * max(0, total - processed)
+                self.progress.put(report(eta))
+
+            self.progress.put(report(0, finished=True, cancelled=self.cancel_event.is_set()))
+        except Exception as e:
+            self.progress.put(report(None, finished=True, error=str(e)))
+        finally:
+            if conn is not None:
+                conn.close()
+
+    def _append_report(self, bad):
+        if self.report_path is None:
+            handle, self.report_path = tempfile.mkstemp(prefix="import_errors_", suffix=".csv")
+            os.close(handle)
+            bad.to_csv(self.report_path, index=False)
+        else:
+            bad.to_csv(self.report_path, mode='a', header=False, index=False)
+
+
+EXPORT_PRODUCTS_SQL = f"SELECT {', '.join(PRODUCT_COLUMNS)} FROM products ORDER BY id"
+
+
+def _iter_product_batches(conn, batch_size):
+    cursor = conn.execute(EXPORT_PRODUCTS_SQL)
+    while True:
+        rows = cursor.fetchmany(batch_size)
+        if not rows:
+            break
+        yield rows
+
+
+def export_products(conn, file_path, batch_size=10000):
+    """
+    Write the products table to .csv, .parquet or .xlsx in batches.
+
+    Rows are fetched with fetchmany and written one batch at a time, so
+    memory stays bounded by batch_size. The columns match the import
+    format, so an exported file can be imported again.
+
+    Returns:
+        Number of products written
+    """
+    extension = os.path.splitext(file_path)[1].lower()
+    count = 0
+
+    if extension == ".csv":
+        with open(file_path, "w", newline="", encoding="utf-8") as f:
+            writer = csv.writer(f)
+            writer.writerow(PRODUCT_COLUMNS)
+            for rows in _iter_product_batches(conn, batch_size):
+                writer.writerows(rows)
+                count += len(rows)
+
+    elif extension == ".parquet":
+        pyarrow = _require_pyarrow()
+        schema = pyarrow.schema([
+            ("name", pyarrow.string()),
+            ("wholesale_price", pyarrow.float64()),
+            ("retail_price", pyarrow.float64()),
+            ("base_unit", pyarrow.string()),
+            ("alt_unit", pyarrow.string()),
+            ("unit_ratio", pyarrow.float64()),
+            ("description", pyarrow.string()),
+            ("sku", pyarrow.string()),
+        ])
+        with pyarrow.parquet.ParquetWriter(file_path, schema) as writer:
+            for rows in _iter_product_batches(conn, batch_size):
+                columns = list(zip(*rows))
+                writer.write_table(pyarrow.Table.from_arrays(
+                    [pyarrow.array(col, type=field.type) for col, field in zip(columns, schema)],
+                    schema=schema
+                ))
+                count += len(rows)
+
+    elif extension == ".xlsx":
+        workbook = openpyxl.Workbook(write_only=True)
+        sheet = workbook.create_sheet("Products")
+        sheet.append(PRODUCT_COLUMNS)
+        for rows in _iter_product_batches(conn, batch_size):
+            for row in rows:
+                sheet.append(row)
+            count += len(rows)
+        workbook.save(file_path)
+
+    else:
+        raise ValueError(f"Unsupported file type: {extension or file_path}")
+
+    return count
@@ -1,7 +1,14 @@
 import customtkinter as ctk
 from tkinter import messagebox, filedialog
+import os
+import queue
+import shutil
 import sqlite3
 import pandas as pd
+import product_import
+from virtual_table import VirtualTable
+from debounced_search import DebouncedSearch
+from change_bus import INSERT, DELETE, RELOAD, apply_to_rows
 
 class AddProductForm(ctk.CTkToplevel):
     def __init__(self, parent, db_conn, callback):
@@ -10,7 +17,7 @@ class AddProductForm(ctk.CTkToplevel):
         self.callback = callback
         
         self.title("Add New Product")
-        self.geometry("600x700")
+        self.geometry("600x750")
         
         # Make the window modal
         self.transient(parent)
@@ -33,7 +40,8 @@ class AddProductForm(ctk.CTkToplevel):
         self.bind('<Escape>', lambda e: self.destroy())
         
         # Add tab order
-        self.name.bind('<Return>', lambda e: self.wholesale_price.focus())
+        self.name.bind('<Return>', lambda e: self.sku.focus())
+        self.sku.bind('<Return>', lambda e: self.wholesale_price.focus())
         self.wholesale_price.bind('<Return>', lambda e: self.retail_price.focus())
         self.retail_price.bind('<Return>', lambda e: self.base_unit.focus())
         self.base_unit.bind('<Return>', lambda e: self.alt_unit.focus())
@@ -62,6 +70,13 @@ class AddProductForm(ctk.CTkToplevel):
         self.name = ctk.CTkEntry(name_frame, width=350, font=("Arial", 12))
         self.name.pack(side="left", padx=5)
         
+        # SKU / Barcode
+        sku_frame = ctk.CTkFrame(fields_frame)
+        sku_frame.pack(fill="x", pady=5)
+        ctk.CTkLabel(sku_frame, text="SKU/Barcode:", font=("Arial", 12), width=120).pack(side="left")
+        self.sku = ctk.CTkEntry(sku_frame, width=350, font=("Arial", 12))
+        self.sku.pack(side="left", padx=5)
+        
         # Wholesale Price
         wholesale_frame = ctk.CTkFrame(fields_frame)
         wholesale_frame.pack(fill="x", pady=5)
@@ -162,37 +177,55 @@ class AddProductForm(ctk.CTkToplevel):
             cursor.execute('''
                 INSERT INTO products (
                     name, wholesale_price, retail_price, 
-                    base_unit, alt_unit, unit_ratio, description
-                ) VALUES (?, ?, ?, ?, ?, ?, ?)
+                    base_unit, alt_unit, unit_ratio, description, sku
+                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?)
             ''', (
                 name, wholesale_price, retail_price,
                 base_unit, self.alt_unit.get(), unit_ratio,
-                self.description.get("1.0", "end-1c")
+                self.description.get("1.0", "end-1c"),
+                self.sku.get().strip() or None  # Blank SKUs are NULL, outside the unique index
             ))
             self.db_conn.commit()
-            self.callback()  # Refresh the product list
+            self.callback(cursor.lastrowid)  # Announce the new product
             self.destroy()
         except ValueError:
             messagebox.showerror("Error", "Prices and unit ratio must be valid numbers!")
+        except sqlite3.IntegrityError:
+            self.db_conn.rollback()
+            messagebox.showerror("Error", "This SKU/barcode is already used by another product!")
         except Exception as e:
             messagebox.showerror("Error", f"Failed to save product: {str(e)}")
 
 class ProductMaster(ctk.CTkFrame):
-    def __init__(self, parent, db_conn, refresh_callback=None):
+    IMPORT_CHUNK_SIZE = 5000  # Rows committed per transaction by streaming imports
+    # Import mode shown in the menu -> match key (None inserts every row)
+    IMPORT_MODES = {
+        "Add All Rows": None,
+        "Update by Name": "name",
+        "Update by SKU": "sku",
+    }
+    
+    def __init__(self, parent, db, changes):
         super().__init__(parent)
-        self.db_conn = db_conn
-        self.refresh_callback = refresh_callback
+        self.db = db
+        self.db_conn = db.conn
+        self.read_conn = db.read_conn
+        self.import_job = None  # Running StreamingImport, if any
+        self.changes = changes
         self.setup_ui()
         self.setup_bindings()
+        changes.subscribe("products", self.on_products_changed)
         
     def setup_bindings(self):
         # Bind keyboard shortcuts to the frame itself
         self.bind('<Control-n>', lambda e: self.show_add_form())
-        self.bind('<Control-i>', lambda e: self.import_from_excel())
+        self.bind('<Control-i>', lambda e: self.import_products())
+        self.bind('<Control-e>', lambda e: self.export_products())
         self.bind('<Delete>', lambda e: self.delete_product())
+        self.product_table.bind('<Delete>', lambda e: self.delete_product())
         
         # Bind Enter key to search entry
-        self.search_entry.bind('<Return>', lambda e: self.on_search())
+        self.search_entry.bind('<Return>', lambda e: self.search.search_now(self.search_var.get().lower()))
         
     def setup_ui(self):
         # Title and Add Button Frame
@@ -219,11 +252,22 @@ class ProductMaster(ctk.CTkFrame):
         delete_all_btn.pack(side="left", padx=5)
         
         # Existing buttons
-        import_btn = ctk.CTkButton(button_frame, text="Import Excel (Ctrl+I)", 
+        self.import_mode_var = ctk.StringVar(value="Add All Rows")
+        import_mode_menu = ctk.CTkOptionMenu(button_frame, variable=self.import_mode_var,
+                                           values=list(self.IMPORT_MODES),
+                                           font=("Arial", 12), width=140)
+        import_mode_menu.pack(side="left", padx=5)
+        
+        import_btn = ctk.CTkButton(button_frame, text="Import (Ctrl+I)", 
                                  font=("Arial", 12),
-                                 command=self.import_from_excel)
+                                 command=self.import_products)
         import_btn.pack(side="left", padx=5)
         
+        export_btn = ctk.CTkButton(button_frame, text="Export (Ctrl+E)", 
+                                 font=("Arial", 12),
+                                 command=self.export_products)
+        export_btn.pack(side="left", padx=5)
+        
         add_btn = ctk.CTkButton(button_frame, text="Add New Product (Ctrl+N)", 
                                font=("Arial", 12),
                                command=self.show_add_form)
@@ -235,20 +279,39 @@ class ProductMaster(ctk.CTkFrame):
         
         ctk.CTkLabel(search_frame, text="Search:", 
                     font=("Arial", 12)).pack(side="left", padx=5)
+        # Typing is debounced; queries run on a worker thread
+        self.search = DebouncedSearch(
+            self,
+            connect=lambda: self.db.create_connection(readonly=True),
+            query=self.query_products,
+            render=self.product_table_source,
+            name="product-search"
+        )
         self.search_var = ctk.StringVar()
         self.search_var.trace('w', self.on_search)
         self.search_entry = ctk.CTkEntry(search_frame, textvariable=self.search_var, 
                                        width=300, font=("Arial", 12))
         self.search_entry.pack(side="left", padx=5)
+        # How much typing the debounce saved, updated after every search
+        self.search_stats = ctk.CTkLabel(search_frame, text="", font=("Arial", 11),
+                                        text_color="gray")
+        self.search_stats.pack(side="left", padx=10)
+        
+        # Import progress (shown while a streaming import runs)
+        self.import_frame = ctk.CTkFrame(search_frame)
+        self.import_label = ctk.CTkLabel(self.import_frame, text="", font=("Arial", 11))
+        self.import_label.pack(side="left", padx=5)
+        self.import_bar = ctk.CTkProgressBar(self.import_frame, width=200)
+        self.import_bar.pack(side="left", padx=5)
+        self.import_cancel_btn = ctk.CTkButton(self.import_frame, text="Cancel Import",
+                                             font=("Arial", 12), width=110,
+                                             command=self.cancel_import)
+        self.import_cancel_btn.pack(side="left", padx=5)
         
         # Product List Frame
         list_frame = ctk.CTkFrame(self)
         list_frame.pack(fill="both", expand=True, padx=20, pady=(0, 10))
         
-        # Header for product list
-        header_frame = ctk.CTkFrame(list_frame)
-        header_frame.pack(fill="x", padx=5, pady=5)
-        
         # Column headers with widths
         columns = [
             ("ID", 50),
@@ -258,112 +321,244 @@ class ProductMaster(ctk.CTkFrame):
             ("Base Unit", 80),
             ("Alt Unit", 80),
             ("Ratio", 60),
-            ("Description", 200)
+            ("Description", 200),
+            ("SKU", 120)
         ]
         
-        for col, width in columns:
-            ctk.CTkLabel(header_frame, text=col, width=width,
-                        font=("Arial", 12, "bold")).pack(side="left", padx=2)
-        
-        # Scrollable frame for product list
-        self.product_list = ctk.CTkScrollableFrame(list_frame)
-        self.product_list.pack(fill="both", expand=True, padx=5, pady=5)
+        # Virtualized product list: only visible rows have widgets
+        self.product_table = VirtualTable(list_frame, columns, self.format_product_row)
+        self.product_table.pack(fill="both", expand=True)
         
         # Load products
         self.load_products()
         
-    def import_from_excel(self):
+    def import_products(self):
         try:
             file_path = filedialog.askopenfilename(
-                title="Select Excel File",
-                filetypes=[("Excel files", "*.xlsx *.xls")]
+                title="Select Product File",
+                filetypes=[
+                    ("Product files", "*.xlsx *.xls *.csv *.parquet"),
+                    ("Excel files", "*.xlsx *.xls"),
+                    ("CSV files", "*.csv"),
+                    ("Parquet files", "*.parquet")
+                ]
             )
             
             if not file_path:
                 return
                 
+            if self.import_job is not None:
+                messagebox.showwarning("Import Running", "Please wait for the current import to finish.")
+                return
+                
+            match_key = self.IMPORT_MODES[self.import_mode_var.get()]
+            if os.path.splitext(file_path)[1].lower() in product_import.FORMATS:
+                # Stream .xlsx, .csv and .parquet files in chunks on a background thread
+                self.start_streaming_import(file_path, match_key)
+                return
+                
             df = pd.read_excel(file_path)
-            required_columns = ['name', 'wholesale_price', 'retail_price', 'base_unit']
             
             # Check if required columns exist
-            missing_columns = [col for col in required_columns if col not in df.columns]
-            if missing_columns:
-                messagebox.showerror("Error", 
-                    f"Missing required columns: {', '.join(missing_columns)}\n"
-                    "Excel file must have columns: name, wholesale_price, retail_price, base_unit"
-                )
+            if not self.check_import_columns(df.columns, match_key):
                 return
             
-            cursor = self.db_conn.cursor()
-            success_count = 0
-            error_count = 0
-            
-            for _, row in df.iterrows():
-                try:
-                    # Get values with validation
-                    name = str(row['name']).strip()
-                    wholesale_price = float(row['wholesale_price'])
-                    retail_price = float(row['retail_price'])
-                    base_unit = str(row['base_unit']).strip()
-                    
-                    # Optional fields
-                    alt_unit = str(row.get('alt_unit', '')).strip()
-                    unit_ratio = float(row.get('unit_ratio', 1))
-                    description = str(row.get('description', '')).strip()
-                    
-                    if not all([name, base_unit]):
-                        error_count += 1
-                        continue
-                        
-                    cursor.execute('''
-                        INSERT INTO products (
-                            name, wholesale_price, retail_price, 
-                            base_unit, alt_unit, unit_ratio, description
-                        ) VALUES (?, ?, ?, ?, ?, ?, ?)
-                    ''', (
-                        name, wholesale_price, retail_price,
-                        base_unit, alt_unit, unit_ratio, description
-                    ))
-                    success_count += 1
-                    
-                except (ValueError, KeyError) as e:
-                    error_count += 1
-                    continue
+            # Validate whole columns at once, then write the good rows in one transaction
+            matcher = None
+            if match_key:
+                matcher = product_import.ProductMatcher(
+                    self.db_conn, match_key, product_import.import_columns(df.columns)
+                )
+            valid, rejected = product_import.validate_products(
+                df, match_key=match_key, conn=self.db_conn, matcher=matcher
+            )
+            if match_key:
+                result = product_import.upsert_products(self.db_conn, valid, matcher)
+            else:
+                result = product_import.UpsertResult(
+                    product_import.insert_products(self.db_conn, valid), 0, 0, 0
+                )
+            error_count = len(rejected)
                     
-            self.db_conn.commit()
-            self.load_products()
-            if self.refresh_callback:
-                self.refresh_callback()
+            self.changes.publish("products", RELOAD)
                 
             messagebox.showinfo("Import Complete", 
-                f"Successfully imported {success_count} products.\n"
-                f"Failed to import {error_count} products."
+                self.import_summary(result, error_count, match_key)
             )
+            if error_count:
+                self.save_error_report(
+                    error_count,
+                    lambda path: product_import.write_error_report(rejected, path)
+                )
             
         except Exception as e:
-            messagebox.showerror("Error", f"Failed to import Excel file: {str(e)}")
+            messagebox.showerror("Error", f"Failed to import file: {str(e)}")
+            
+    def check_import_columns(self, columns, match_key):
+        missing_columns = product_import.missing_columns(columns, match_key)
+        if missing_columns:
+            messagebox.showerror("Error", 
+                f"Missing required columns: {', '.join(missing_columns)}\n"
+                "File must have columns: name, wholesale_price, retail_price, base_unit"
+                + (f", {match_key}" if match_key == "sku" else "")
+            )
+            return False
+        return True
+        
+    def import_summary(self, result, error_count, match_key):
+        """Message text for the counts of a finished import."""
+        if not match_key:
+            return (f"Successfully imported {result.inserted} products.\n"
+                    f"Failed to import {error_count} products.")
+        lines = [
+            f"Added {result.inserted} new products.",
+            f"Updated {result.updated} changed products.",
+            f"Skipped {result.unchanged} unchanged products.",
+        ]
+        if result.duplicates:
+            lines.append(f"{result.duplicates} rows repeated a {match_key} "
+                         "from earlier in the file; the last one was kept.")
+        lines.append(f"Failed to import {error_count} rows.")
+        return "\n".join(lines)
+        
+    def start_streaming_import(self, file_path, match_key=None):
+        """Import a file in committed chunks without blocking the UI."""
+        if not self.check_import_columns(product_import.file_header(file_path), match_key):
+            return
+            
+        self.import_job = product_import.StreamingImport(
+            file_path, self.db.create_connection, chunk_size=self.IMPORT_CHUNK_SIZE,
+            match_key=match_key
+        )
+        self.import_label.configure(text="Starting import...")
+        self.import_bar.configure(mode="indeterminate")
+        self.import_bar.start()
+        self.import_cancel_btn.configure(state="normal")
+        self.import_frame.pack(side="right", padx=5)
+        self.import_job.start()
+        self.after(100, self.poll_import)
+        
+    def cancel_import(self):
+        if self.import_job is not None:
+            self.import_job.cancel()
+            self.import_cancel_btn.configure(state="disabled")
+            self.import_label.configure(text="Cancelling after the current chunk...")
+            
+    def poll_import(self):
+        """Show progress posted by the import thread; finish up when it is done."""
+        job = self.import_job
+        progress = None
+        try:
+            while True:
+                progress = job.progress.get_nowait()
+        except queue.Empty:
+            pass
+            
+        if progress is None:
+            self.after(100, self.poll_import)
+            return
+            
+        if not progress.finished:
+            text = f"Processed {progress.processed:,}"
+            if progress.total:
+                if self.import_bar.cget("mode") != "determinate":
+                    self.import_bar.stop()
+                    self.import_bar.configure(mode="determinate")
+                self.import_bar.set(min(1.0, progress.processed / progress.total))
+                text += f" of {progress.total:,} rows"
+            else:
+                # Row count unknown: the bar stays indeterminate, show the pace instead
+                rate = progress.processed / progress.elapsed if progress.elapsed else 0
+                text += f" rows ({rate:,.0f} per second)"
+            if progress.eta is not None:
+                minutes, seconds = divmod(int(progress.eta), 60)
+                text += f" - about {minutes}:{seconds:02d} left"
+            self.import_label.configure(text=text)
+            self.after(100, self.poll_import)
+            return
+            
+        # Finished, cancelled or failed
+        self.import_job = None
+        self.import_bar.stop()
+        self.import_frame.pack_forget()
+        self.changes.publish("products", RELOAD)
+            
+        if progress.error:
+            messagebox.showerror("Error",
+                f"Import stopped: {progress.error}\n\n"
+                f"{progress.imported + progress.updated} products were saved before the error."
+            )
+        else:
+            title = "Import Cancelled" if progress.cancelled else "Import Complete"
+            result = product_import.UpsertResult(
+                progress.imported, progress.updated, progress.unchanged, progress.duplicates
+            )
+            messagebox.showinfo(title, 
+                self.import_summary(result, progress.rejected, job.match_key) + "\n"
+                f"Time taken: {progress.elapsed:.1f} seconds."
+            )
+        if job.report_path:
+            self.save_error_report(
+                progress.rejected,
+                lambda path: shutil.copyfile(job.report_path, path)
+            )
+            try:
+                os.remove(job.report_path)
+            except OSError:
+                pass
+        
+    def export_products(self):
+        """Save all products as .csv, .parquet or .xlsx in the import format."""
+        file_path = filedialog.asksaveasfilename(
+            title="Export Products",
+            defaultextension=".csv",
+            initialfile="products.csv",
+            filetypes=[
+                ("CSV files", "*.csv"),
+                ("Parquet files", "*.parquet"),
+                ("Excel files", "*.xlsx")
+            ]
+        )
+        if not file_path:
+            return
+        try:
+            count = product_import.export_products(self.read_conn, file_path)
+            messagebox.showinfo("Export Complete", f"Exported {count} products to\n{file_path}")
+        except Exception as e:
+            messagebox.showerror("Error", f"Failed to export products: {str(e)}")
+        
+    def save_error_report(self, error_count, write_report):
+        """Offer to save the rejected rows with their row numbers and reasons."""
+        if not messagebox.askyesno("Import Errors",
+                                   f"{error_count} rows were rejected.\n"
+                                   "Save an error report with row numbers and reasons?"):
+            return
+        file_path = filedialog.asksaveasfilename(
+            title="Save Error Report",
+            defaultextension=".csv",
+            initialfile="import_errors.csv",
+            filetypes=[("CSV files", "*.csv")]
+        )
+        if file_path:
+            try:
+                write_report(file_path)
+            except OSError as e:
+                messagebox.showerror("Error", f"Failed to save error report: {str(e)}")
         
     def show_add_form(self):
-        def on_product_added():
-            self.load_products()
-            if self.refresh_callback:
-                self.refresh_callback()
+        def on_product_added(product_id):
+            self.changes.publish("products", INSERT, [product_id])
                 
         AddProductForm(self, self.db_conn, on_product_added)
             
     def delete_product(self):
-        # Get the selected product frame
-        for child in self.product_list.winfo_children():
-            if hasattr(child, 'selected') and child.selected:
-                if messagebox.askyesno("Confirm Delete", "Are you sure you want to delete this product?"):
-                    product_id = child.product_id
-                    cursor = self.db_conn.cursor()
-                    cursor.execute('DELETE FROM products WHERE id = ?', (product_id,))
-                    self.db_conn.commit()
-                    self.load_products()
-                    if self.refresh_callback:
-                        self.refresh_callback()
-                break
+        # Get the selected product row
+        product = self.product_table.selected_row()
+        if product and messagebox.askyesno("Confirm Delete", "Are you sure you want to delete this product?"):
+            cursor = self.db_conn.cursor()
+            cursor.execute('DELETE FROM products WHERE id = ?', (product[0],))
+            self.db_conn.commit()
+            self.changes.publish("products", DELETE, [product[0]])
             
     def delete_all_products(self):
         """Delete all products after confirmation."""
@@ -397,9 +592,7 @@ class ProductMaster(ctk.CTkFrame):
                 if confirm2:
                     cursor.execute('DELETE FROM products')
                     self.db_conn.commit()
-                    self.load_products()  # Refresh the list
-                    if self.refresh_callback:
-                        self.refresh_callback()
+                    self.changes.publish("products", RELOAD)
                     messagebox.showinfo(
                         "Success", 
                         f"Successfully deleted {count} products."
@@ -419,54 +612,61 @@ class ProductMaster(ctk.CTkFrame):
             
     def on_search(self, *args):
         search_term = self.search_var.get().lower()
-        self.load_products(search_term)
+        self.search.schedule(search_term)
         
-    def load_products(self, search_term=''):
-        # Clear existing product list
-        for widget in self.product_list.winfo_children():
-            widget.destroy()
-            
-        cursor = self.db_conn.cursor()
+    def query_products(self, conn, search_term=''):
+        """Products matching the search term, run on the given connection."""
         if search_term:
-            cursor.execute('''
-                SELECT * FROM products 
-                WHERE lower(name) LIKE ? OR lower(description) LIKE ?
-            ''', (f'%{search_term}%', f'%{search_term}%'))
+            # Ranked full-text search (FTS5 trigram index)
+            return self.db.search_products(search_term, conn=conn)
+        return conn.execute('SELECT * FROM products').fetchall()
+        
+    def product_table_source(self, products):
+        self.product_table.set_source(products)
+        self.show_search_stats()
+        
+    def show_search_stats(self):
+        stats = self.search.stats()
+        self.search_stats.configure(
+            text=f"{stats['executed']} searches, {stats['coalesced']} keystrokes merged, "
+                 f"{stats['cancelled']} stale results dropped"
+        )
+        
+    def load_products(self, search_term=''):
+        self.product_table.set_source(self.query_products(self.read_conn, search_term))
+        
+    def on_products_changed(self, change):
+        """Apply a product change to the list without reloading it."""
+        search_term = self.search_var.get().lower()
+        if change.action == RELOAD:
+            self.load_products(search_term)
+        elif search_term:
+            # Changed rows may enter or leave the results; search again off the Tk thread
+            self.search.search_now(search_term)
         else:
-            cursor.execute('SELECT * FROM products')
+            fetched = []
+            if change.action != DELETE:
+                placeholders = ', '.join('?' * len(change.ids))
+                fetched = self.read_conn.execute(
+                    f'SELECT * FROM products WHERE id IN ({placeholders})', change.ids
+                ).fetchall()
+            apply_to_rows(self.product_table.source, change, fetched)
+            self.product_table.refresh()
             
-        for product in cursor.fetchall():
-            self.create_product_row(product)
-            
-    def create_product_row(self, product):
-        # Create frame for product row
-        row = ctk.CTkFrame(self.product_list)
-        row.pack(fill="x", pady=2)
-        row.product_id = product[0]  # Store product ID
-        row.selected = False  # Track selection state
-        
-        # Add product details with specific widths
-        ctk.CTkLabel(row, text=str(product[0]), width=50).pack(side="left", padx=2)
-        ctk.CTkLabel(row, text=product[1], width=200).pack(side="left", padx=2)
-        ctk.CTkLabel(row, text=f"₹{product[2]:.2f}", width=80).pack(side="left", padx=2)
-        ctk.CTkLabel(row, text=f"₹{product[3]:.2f}", width=80).pack(side="left", padx=2)
-        ctk.CTkLabel(row, text=product[4] or "", width=80).pack(side="left", padx=2)
-        ctk.CTkLabel(row, text=product[5] or "", width=80).pack(side="left", padx=2)
-        ctk.CTkLabel(row, text=str(product[6]) if product[6] else "", width=60).pack(side="left", padx=2)
-        ctk.CTkLabel(row, text=product[7] or "", width=200).pack(side="left", padx=2)
-        
-        # Add selection handling
-        def on_click(event):
-            # Deselect all other rows
-            for child in self.product_list.winfo_children():
-                if hasattr(child, 'selected'):
-                    child.selected = False
-                    child.configure(fg_color=("gray85", "gray25"))
-            
-            # Select this row
-            row.selected = True
-            row.configure(fg_color=("gray75", "gray35"))
-            
-        row.bind('<Button-1>', on_click)
-        for widget in row.winfo_children():
-            widget.bind('<Button-1>', on_click)
+    def close(self):
+        """Stop the background search before the app exits."""
+        self.search.close()
+        
+    def format_product_row(self, product):
+        """Display strings for one product row of the table."""
+        return (
+            str(product[0]),
+            product[1],
+            f"₹{product[2]:.2f}" if product[2] is not None else "",
+            f"₹{product[3]:.2f}" if product[3] is not None else "",
+            product[4] or "",
+            product[5] or "",
+            str(product[6]) if product[6] else "",
+            product[7] or "",
+            product[9] or "",
+        )
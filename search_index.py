@@ -0,0 +1,291 @@
+from bisect import bisect_left
+from heapq import merge
+from itertools import islice
+from typing import Iterator, List, Optional, Sequence
+
+import numpy as np
+
+
+def normalize(text: str) -> str:
+    """Search key for a value or query: case-folded, whitespace collapsed."""
+    return " ".join(text.casefold().split())
+
+
+class SearchIndex:
+    """
+    In-memory index for incremental "type to search" over display strings.
+
+    Built once per value list. Matches are ranked in three tiers:
+
+    1. Keys that start with the query, in alphabetical order. Punctuation
+       and spaces sort before letters and digits, so whole-word hits such as
+       the id in "12 - Pen" come before "120 - ..." within the tier.
+    2. Keys where the query starts a later word, in value order.
+    3. Keys that contain the query anywhere else, in value order.
+
+    Tier 1 is a binary search over the sorted keys. Tiers 2 and 3 come from
+    trigram postings: for every byte trigram of the UTF-8 keys, the sorted
+    positions of the keys containing it. Trigrams at the edges of a key are
+    indexed with a "\\n" standing for the edge, so every one- or two-byte
+    query also lies inside some indexed trigram. A longer query's candidates
+    are the keys holding all of its trigrams; a shorter query's are the keys
+    holding any trigram that contains it. Candidates are intersected or
+    merged lazily in value order and checked with `in`, so asking for the
+    top K stops after K hits and a query with no hits costs next to nothing.
+
+    When a query extends the previous one and that query's candidates were
+    few, the new candidates are narrowed from them instead of starting from
+    the postings again.
+
+    Values can be added and removed without a rebuild: removed positions
+    are tombstoned and skipped, added values go to a short tail that is
+    searched directly. The index compacts itself once the tail or the
+    tombstones grow past a fraction of its size.
+    """
+
+    MIN_TAIL = 256  # Tail size / tombstone count always allowed before compacting
+    CANDIDATE_LIMIT = 4096  # Largest candidate set kept to narrow the next query
+
+    def __init__(self, values: Sequence[str] = ()):
+        self.build(values)
+
+    def build(self, values: Sequence[str]):
+        self.values = list(values)
+        self.keys = [normalize(v) for v in self.values]
+        self.positions = {v: i for i, v in enumerate(self.values)}
+        self.deleted = set()    # Tombstoned positions
+        self.tail = []          # Positions added since the last build
+        self.indexed = len(self.values)  # Positions below this are in the sorted keys and postings
+
+        # Prefix tier: key positions sorted by key
+        self.order = sorted(range(len(self.keys)), key=self.keys.__getitem__)
+        self.sorted_keys = [self.keys[i] for i in self.order]
+
+        # Substring tiers: trigram -> positions of the keys containing it
+        self._build_postings([k.encode("utf-8") for k in self.keys])
+
+        # Candidates of the last query, when few enough to narrow the next one
+        self.last_query: Optional[str] = None
+        self.last_candidates: Optional[np.ndarray] = None
+
+    def _build_postings(self, encoded: List[bytes]):
+        # "\n" + key0 + "\n" + key1 ... + "\n": byte j belongs to the key whose
+        # "\n" + key block holds it. A trigram with "\n" in the middle spans
+        # two keys and is dropped; one with "\n" at an end marks a key edge.
+        text = np.frombuffer(b"\n" + b"\n".join(encoded) + b"\n", dtype=np.uint8).astype(np.uint32)
+        if len(text) < 3:
+            self.grams = np.empty(0, dtype=np.uint32)
+            self.starts = self.ends = np.empty(0, dtype=np.int64)
+            self.postings = np.empty(0, dtype=np.uint32)
+            return
+        owner = np.repeat(np.arange(len(encoded), dtype=np.uint64), [len(k) + 1 for k in encoded])
+        codes = (text[:-2] << 16) | (text[1:-1] << 8) | text[2:]
+        within = text[1:-1] != 10
+        # Sorting (trigram, key) pairs groups the postings by trigram, with
+        # each posting list in key order and repeats within a key removed
+        pairs = np.unique((codes[within].astype(np.uint64) << 32) | owner[:len(codes)][within])
+        self.postings = (pairs & 0xFFFFFFFF).astype(np.uint32)
+        self.grams, self.starts = np.unique((pairs >> 32).astype(np.uint32), return_index=True)
+        self.ends = np.append(self.starts[1:], len(pairs))
+
+    def __len__(self):
+        return len(self.values) - len(self.deleted)
+
+    def __contains__(self, value: str):
+        return value in self.positions
+
+    def add(self, value: str):
+        """Add a value (no-op if present); it matches like any other value."""
+        if value in self.positions:
+            return
+        self.positions[value] = len(self.values)
+        self.tail.append(len(self.values))
+        self.values.append(value)
+        self.keys.append(normalize(value))
+        self._maybe_compact()
+
+    def remove(self, value: str):
+        """Remove a value if present."""
+        i = self.positions.pop(value, None)
+        if i is None:
+            return
+        self.deleted.add(i)
+        self._maybe_compact()
+
+    def replace(self, old: str, new: str):
+        self.remove(old)
+        self.add(new)
+
+    def _maybe_compact(self):
+        limit = max(self.MIN_TAIL, len(self.values) // 8)
+        if len(self.tail) > limit or len(self.deleted) > limit:
+            self.build([v for i, v in enumerate(self.values) if i not in self.deleted])
+
+    def search(self, query: str, limit: int = 50) -> List[str]:
+        """Return the top `limit` values matching the query."""
+        return list(islice(self.iter_matches(query), limit))
+
+    def iter_matches(self, query: str) -> Iterator[str]:
+        """Yield matching values, best first. An empty query yields every value."""
+        values = self.values
+        for i in self.iter_positions(query):
+            yield values[i]
+
+    def iter_positions(self, query: str) -> Iterator[int]:
+        """Yield positions in self.values of matching values, best first."""
+        q = normalize(query)
+        deleted = self.deleted
+        if not q:
+            for i in range(len(self.values)):
+                if i not in deleted:
+                    yield i
+            return
+
+        positions = self._scan(q)
+        if deleted:
+            positions = (i for i in positions if i not in deleted)
+        yield from positions
+
+    def _tier(self, key: str, q: str) -> int:
+        if key.startswith(q):
+            return 0
+        if (" " + q) in key:
+            return 1
+        return 2
+
+    def _posting(self, gram: bytes) -> np.ndarray:
+        code = (gram[0] << 16) | (gram[1] << 8) | gram[2]
+        k = np.searchsorted(self.grams, code)
+        if k == len(self.grams) or self.grams[k] != code:
+            return self.postings[:0]
+        return self.postings[self.starts[k]:self.ends[k]]
+
+    def _postings_containing(self, needle: bytes) -> List[np.ndarray]:
+        """Postings of every indexed trigram that contains a 1- or 2-byte needle."""
+        grams = self.grams
+        if len(needle) == 2:
+            code = (needle[0] << 8) | needle[1]
+            mask = ((grams >> 8) == code) | ((grams & 0xFFFF) == code)
+        else:
+            byte = needle[0]
+            mask = ((grams >> 16) == byte) | (((grams >> 8) & 0xFF) == byte) | ((grams & 0xFF) == byte)
+        return [self.postings[s:e] for s, e in zip(self.starts[mask], self.ends[mask])]
+
+    @staticmethod
+    def _intersect(candidates: np.ndarray, posting: np.ndarray) -> np.ndarray:
+        # Both sorted and unique; binary search the smaller in the larger
+        if len(candidates) > len(posting):
+            candidates, posting = posting, candidates
+        if not len(candidates) or not len(posting):
+            return candidates[:0]
+        found = np.searchsorted(posting, candidates)
+        found[found == len(posting)] = 0
+        return candidates[posting[found] == candidates]
+
+    def _trigram_postings(self, q: str, needle: bytes) -> List[np.ndarray]:
+        """
+        Postings whose intersection holds every key containing a needle of
+        three or more bytes, smallest first. Narrowed from the last query's
+        candidates when q extends it; remembered for the next query when the
+        result is small.
+        """
+        if self.last_candidates is not None and q.startswith(self.last_query):
+            # Only the trigrams the extension added can remove candidates
+            known = len(self.last_query.encode("utf-8"))
+            lists = [self.last_candidates] + [self._posting(needle[j:j + 3])
+                                              for j in range(max(0, known - 2), len(needle) - 2)]
+        else:
+            lists = [self._posting(g) for g in {needle[j:j + 3] for j in range(len(needle) - 2)}]
+        lists.sort(key=len)
+
+        if len(lists[0]) > self.CANDIDATE_LIMIT:
+            self.last_query = self.last_candidates = None
+            return lists
+        candidates = lists[0]
+        for posting in lists[1:]:
+            if not len(candidates):
+                break
+            candidates = self._intersect(candidates, posting)
+        self.last_query, self.last_candidates = q, candidates
+        return [candidates]
+
+    @staticmethod
+    def _blocks(posting: np.ndarray, step: int) -> Iterator[np.ndarray]:
+        # Small blocks first so a top-K lookup stops early, growing so a
+        # long run without hits still takes few numpy calls
+        start = 0
+        while start < len(posting):
+            yield posting[start:start + step]
+            start += step
+            step = min(step * 2, 65536)
+
+    @staticmethod
+    def _iter_all(lists: List[np.ndarray]) -> Iterator[int]:
+        """Positions in every list, in order. Lists sorted smallest first."""
+        first, rest = lists[0], lists[1:]
+        for block in SearchIndex._blocks(first, 256):
+            for posting in rest:
+                if not len(block):
+                    break
+                block = SearchIndex._intersect(block, posting)
+            yield from block.tolist()
+
+    @staticmethod
+    def _iter_any(lists: List[np.ndarray]) -> Iterator[int]:
+        """Positions in any of the lists, in order, each once."""
+        def positions(posting):
+            for block in SearchIndex._blocks(posting, 8):
+                yield from block.tolist()
+
+        last = -1
+        for i in merge(*(positions(posting) for posting in lists)):
+            if i != last:
+                yield i
+                last = i
+
+    def _iter_candidates(self, needle: bytes, lists: Optional[List[np.ndarray]] = None) -> Iterator[int]:
+        """Indexed positions, in order, of keys that may contain the needle."""
+        if len(needle) >= 3:
+            return self._iter_all(lists)
+        return self._iter_any(self._postings_containing(needle))
+
+    def _scan(self, q: str) -> Iterator[int]:
+        # Values added since the build are few; tier them directly
+        keys = self.keys
+        tail_tiers = ([], [], [])
+        for i in self.tail:
+            if q in keys[i]:
+                tail_tiers[self._tier(keys[i], q)].append(i)
+
+        # Tier 1: binary search the sorted keys for the prefix range
+        if tail_tiers[0]:
+            tail_tiers[0].sort(key=keys.__getitem__)
+            yield from merge(self._prefix_range(q), tail_tiers[0], key=keys.__getitem__)
+        else:
+            yield from self._prefix_range(q)
+
+        # Tiers 2 and 3: candidates for " query", then for "query"
+        needle = q.encode("utf-8")
+        word = b" " + needle
+        if len(needle) >= 3:
+            lists = self._trigram_postings(q, needle)
+            word_lists = sorted(lists + [self._posting(word[:3])], key=len)
+        else:
+            lists = word_lists = None
+            if len(word) >= 3:
+                word_lists = [self._posting(word)]
+        for tier, candidates, tail_hits in (
+                (1, self._iter_candidates(word, word_lists), tail_tiers[1]),
+                (2, self._iter_candidates(needle, lists), tail_tiers[2])):
+            for i in candidates:
+                key = keys[i]
+                if q in key and self._tier(key, q) == tier:
+                    yield i
+            yield from tail_hits
+
+    def _prefix_range(self, q: str) -> Iterator[int]:
+        sorted_keys = self.sorted_keys
+        pos = bisect_left(sorted_keys, q)
+        while pos < len(sorted_keys) and sorted_keys[pos].startswith(q):
+            yield self.order[pos]
+            pos += 1
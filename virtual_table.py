@@ -0,0 +1,268 @@
+import customtkinter as ctk
+from typing import Callable, List, Optional, Sequence, Tuple
+
+class VirtualTable(ctk.CTkFrame):
+    """
+    Table that only creates widgets for the rows on screen.
+
+    The data source is any sequence (len() and indexing), usually the list
+    of rows returned by a query. A small pool of row frames is created to
+    fill the visible height and recycled while scrolling, so the widget
+    count stays constant however many records the source holds.
+
+    Columns listed in `editable` are drawn as entries. Edits are reported
+    through on_edit; the source is expected to change and the table to be
+    re-rendered from it, so the entries never hold state of their own.
+    """
+
+    NORMAL_COLOR = ("gray85", "gray25")
+    SELECTED_COLOR = ("gray75", "gray35")
+
+    def __init__(self, parent, columns: List[Tuple[str, int]],
+                 formatter: Callable[[Sequence], Sequence[str]],
+                 row_height: int = 32,
+                 on_select: Optional[Callable[[Sequence], None]] = None,
+                 editable: Sequence[int] = (),
+                 on_edit: Optional[Callable[[int, int, str], None]] = None,
+                 action: Optional[Tuple[str, Callable[[int], None]]] = None):
+        """
+        Args:
+            parent: Parent widget
+            columns: (title, width) of each column
+            formatter: Converts a source row into one display string per column
+            row_height: Height of a row in pixels, including padding
+            on_select: Called with the source row when a row is selected
+            editable: Indexes of the columns drawn as entries
+            on_edit: Called as on_edit(index, column, text) while a cell is edited
+            action: (text, callback) for a button at the end of each row,
+                called with the source index of the row
+        """
+        super().__init__(parent)
+        self.columns = columns
+        self.formatter = formatter
+        self.row_height = row_height
+        self.on_select = on_select
+        self.editable = set(editable)
+        self.on_edit = on_edit
+        self.action = action
+        self.editing = None         # (slot, column) of the entry with focus
+
+        self.source: Sequence = []
+        self.first = 0              # Index of the source row drawn in the top slot
+        self.selected_index = -1    # Index into the source, -1 for no selection
+        self.pool = []              # Recycled row frames
+        self.visible_rows = 0
+
+        self.setup_ui()
+        self.setup_bindings()
+
+    def setup_ui(self):
+        # Header
+        header_frame = ctk.CTkFrame(self)
+        header_frame.pack(fill="x", padx=5, pady=5)
+        for col, width in self.columns:
+            ctk.CTkLabel(header_frame, text=col, width=width,
+                        font=("Arial", 12, "bold")).pack(side="left", padx=2)
+
+        # Body: recycled rows plus a scrollbar mapped onto the source
+        self.body = ctk.CTkFrame(self, fg_color="transparent")
+        self.body.pack(fill="both", expand=True, padx=5, pady=5)
+
+        self.scrollbar = ctk.CTkScrollbar(self.body, command=self._on_scrollbar)
+        self.scrollbar.pack(side="right", fill="y")
+
+        self.rows_frame = ctk.CTkFrame(self.body, fg_color="transparent")
+        self.rows_frame.pack(side="left", fill="both", expand=True)
+        # Pool size follows the frame height, never the other way round
+        self.rows_frame.pack_propagate(False)
+
+    def setup_bindings(self):
+        self.rows_frame.bind('<Configure>', self._on_resize)
+        self._bind_wheel(self.rows_frame)
+        self.bind('<Up>', lambda e: self.move_selection(-1))
+        self.bind('<Down>', lambda e: self.move_selection(1))
+        self.bind('<Prior>', lambda e: self.move_selection(-max(1, self.visible_rows - 1)))
+        self.bind('<Next>', lambda e: self.move_selection(max(1, self.visible_rows - 1)))
+
+    def _bind_wheel(self, widget):
+        widget.bind('<MouseWheel>', self._on_mousewheel)
+        widget.bind('<Button-4>', lambda e: self.scroll_to(self.first - 3))
+        widget.bind('<Button-5>', lambda e: self.scroll_to(self.first + 3))
+
+    def _create_row(self, slot):
+        row = ctk.CTkFrame(self.rows_frame, height=self.row_height - 4,
+                          fg_color=self.NORMAL_COLOR)
+        row.slot = slot
+        row.index = -1  # Source index drawn in this row, -1 when unused
+        row.color = self.NORMAL_COLOR
+        row.cells = []
+        row.texts = []  # Last text written to each label, to skip no-op configures
+        labels = []
+        for col, (_, width) in enumerate(self.columns):
+            if col in self.editable:
+                cell = ctk.CTkEntry(row, width=width, height=self.row_height - 8)
+                self._bind_entry(cell, slot, col)
+            else:
+                cell = ctk.CTkLabel(row, text="", width=width, anchor="w")
+                labels.append(cell)
+            cell.pack(side="left", padx=2)
+            self._bind_wheel(cell)
+            row.cells.append(cell)
+            row.texts.append("")
+
+        if self.action:
+            text, callback = self.action
+            ctk.CTkButton(row, text=text, width=30, height=24,
+                         command=lambda s=slot: callback(self.first + s)).pack(side="left", padx=(5, 0))
+
+        for widget in [row] + labels:
+            widget.bind('<Button-1>', lambda e, s=slot: self._on_click(s))
+        self._bind_wheel(row)
+        return row
+
+    def _bind_entry(self, entry, slot, col):
+        entry.bind('<FocusIn>', lambda e: self._on_entry_focus(slot, col))
+        entry.bind('<FocusOut>', lambda e: self._on_entry_blur(slot, col))
+        entry.bind('<KeyRelease>', lambda e: self._on_entry_key(e, slot, col))
+        entry.bind('<Up>', lambda e: self._move_cell(-1, col))
+        entry.bind('<Down>', lambda e: self._move_cell(1, col))
+        entry.bind('<Escape>', lambda e: self._canvas.focus_set())
+
+    def _on_entry_focus(self, slot, col):
+        self.editing = (slot, col)
+        index = self.first + slot
+        if index != self.selected_index:
+            self.select(index)
+
+    def _on_entry_blur(self, slot, col):
+        if self.editing == (slot, col):
+            self.editing = None
+        # Replace whatever was typed with the value the source ended up with
+        self.render()
+
+    def _on_entry_key(self, event, slot, col):
+        if event.keysym in ('Up', 'Down', 'Escape', 'Tab'):
+            return
+        index = self.first + slot
+        if self.on_edit and index < len(self.source):
+            self.on_edit(index, col, self.pool[slot].cells[col].get())
+
+    def _move_cell(self, delta, col):
+        """Move the selection and the edit cursor to the same column one row up or down."""
+        self.move_selection(delta)
+        slot = self.selected_index - self.first
+        if 0 <= slot < len(self.pool):
+            self.pool[slot].cells[col].focus_set()
+        return "break"
+
+    def _on_resize(self, event):
+        visible = max(1, event.height // self.row_height)
+        if visible == self.visible_rows:
+            return
+        self.visible_rows = visible
+        while len(self.pool) < visible:
+            self.pool.append(self._create_row(len(self.pool)))
+        self.scroll_to(self.first)
+
+    def _on_mousewheel(self, event):
+        # Windows reports multiples of 120, macOS small deltas
+        step = -3 if event.delta > 0 else 3
+        self.scroll_to(self.first + step)
+
+    def _on_scrollbar(self, *args):
+        if args[0] == "moveto":
+            self.scroll_to(int(float(args[1]) * len(self.source)))
+        elif args[0] == "scroll":
+            amount = int(args[1])
+            if args[2] == "pages":
+                amount *= max(1, self.visible_rows - 1)
+            self.scroll_to(self.first + amount)
+
+    def _on_click(self, slot):
+        # CTkFrame.bind() binds to the inner canvas, so the key bindings
+        # only fire while the canvas, not the frame, has the focus
+        self._canvas.focus_set()
+        self.select(self.first + slot)
+
+    def set_source(self, rows: Sequence):
+        """Replace the data source and redraw from the top."""
+        self.source = rows
+        self.first = 0
+        self.selected_index = -1
+        self.render()
+
+    def refresh(self):
+        """Redraw after the source changed in place, keeping the scroll position."""
+        if self.selected_index >= len(self.source):
+            self.selected_index = len(self.source) - 1
+        self.scroll_to(self.first)
+
+    def scroll_to(self, first: int):
+        """Scroll so that source row `first` is drawn in the top slot."""
+        max_first = max(0, len(self.source) - self.visible_rows)
+        self.first = min(max(0, first), max_first)
+        self.render()
+
+    def see(self, index: int):
+        """Scroll the minimum amount needed to show source row `index`."""
+        if index < self.first:
+            self.scroll_to(index)
+        elif index >= self.first + self.visible_rows:
+            self.scroll_to(index - self.visible_rows + 1)
+
+    def select(self, index: int):
+        if not 0 <= index < len(self.source):
+            return
+        self.selected_index = index
+        self.see(index)
+        self.render()
+        if self.on_select:
+            self.on_select(self.source[index])
+
+    def move_selection(self, delta: int):
+        if not self.source:
+            return "break"
+        start = self.selected_index if self.selected_index >= 0 else self.first - 1
+        self.select(min(max(0, start + delta), len(self.source) - 1))
+        return "break"
+
+    def selected_row(self) -> Optional[Sequence]:
+        if 0 <= self.selected_index < len(self.source):
+            return self.source[self.selected_index]
+        return None
+
+    def render(self):
+        """Draw the current window of the source into the row pool."""
+        total = len(self.source)
+        for slot, row in enumerate(self.pool):
+            index = self.first + slot
+            if slot >= self.visible_rows or index >= total:
+                row.pack_forget()
+                row.index = -1
+                continue
+
+            moved = row.index != index
+            for i, text in enumerate(self.formatter(self.source[index])):
+                cell = row.cells[i]
+                if i in self.editable:
+                    if self.editing == (slot, i) and not moved:
+                        continue  # Don't rewrite the entry the user is typing in
+                    if cell.get() != text:
+                        cell.delete(0, "end")
+                        cell.insert(0, text)
+                elif row.texts[i] != text:
+                    cell.configure(text=text)
+                    row.texts[i] = text
+            row.index = index
+            color = self.SELECTED_COLOR if index == self.selected_index else self.NORMAL_COLOR
+            if row.color != color:
+                row.configure(fg_color=color)
+                row.color = color
+            if not row.winfo_manager():
+                row.pack(fill="x", pady=2)
+
+        if total:
+            self.scrollbar.set(self.first / total,
+                               min(1.0, (self.first + self.visible_rows) / total))
+        else:
+            self.scrollbar.set(0.0, 1.0)